@@ -0,0 +1,29 @@
+"""add counters date for profiles
+
+Revision ID: 4f2a9c1d7e3b
+Revises: 7dffb9826abe
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4f2a9c1d7e3b"
+down_revision = "7dffb9826abe"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("profiles", sa.Column("counters_date", sa.Date(), nullable=True))
+    # Counters were reset lazily by modified_at so far
+    op.execute("UPDATE profiles SET counters_date = DATE(modified_at)")
+    op.create_index("idx_profiles_counters_date", "profiles", ["counters_date"])
+
+
+def downgrade():
+    op.drop_index("idx_profiles_counters_date", table_name="profiles")
+    op.drop_column("profiles", "counters_date")
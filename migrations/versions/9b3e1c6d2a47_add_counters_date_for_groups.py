@@ -0,0 +1,30 @@
+"""add counters date for groups
+
+Revision ID: 9b3e1c6d2a47
+Revises: 4f2a9c1d7e3b
+Create Date: 2026-10-18 11:02:17.540913
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9b3e1c6d2a47"
+down_revision = "4f2a9c1d7e3b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("groups", sa.Column("counters_date", sa.Date(), nullable=True))
+    # Today's clicks are read by range, the view filtered on DATE(created_at)
+    op.create_index("idx_events_created_at", "events", ["created_at"])
+    op.create_index("idx_profiles_owner", "profiles", ["owner"])
+
+
+def downgrade():
+    op.drop_index("idx_profiles_owner", table_name="profiles")
+    op.drop_index("idx_events_created_at", table_name="events")
+    op.drop_column("groups", "counters_date")
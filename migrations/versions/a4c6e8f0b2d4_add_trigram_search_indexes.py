@@ -0,0 +1,44 @@
+"""add trigram search indexes for posts and profiles
+
+Revision ID: a4c6e8f0b2d4
+Revises: f1b3d5e7a9c2
+Create Date: 2026-10-18 18:57:21.604113
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "a4c6e8f0b2d4"
+down_revision = "f1b3d5e7a9c2"
+branch_labels = None
+depends_on = None
+
+# Columns of the search parameter, see post_services / profiles_services
+SEARCH_COLUMNS = {
+    "posts": ["title", "content", "username", "tw_post_id"],
+    "profiles": ["username", "user_access", "status"],
+}
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public;")
+    # One index per column: ILIKE '%term%' on any of them becomes a
+    # BitmapOr of index scans
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            op.create_index(
+                f"idx_{table}_{column}_trgm",
+                table,
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+
+
+def downgrade():
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            op.drop_index(f"idx_{table}_{column}_trgm", table_name=table)
+    # The extension stays, other tenant schemas share it
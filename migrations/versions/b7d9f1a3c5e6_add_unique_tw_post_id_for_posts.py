@@ -0,0 +1,39 @@
+"""add unique tw_post_id for posts
+
+Revision ID: b7d9f1a3c5e6
+Revises: a4c6e8f0b2d4
+Create Date: 2026-10-18 19:34:08.271950
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b7d9f1a3c5e6"
+down_revision = "a4c6e8f0b2d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_or_update_post could race into duplicates, keep the latest row
+    # of each tweet
+    op.execute(
+        """
+        DELETE FROM posts p
+        USING (
+            SELECT post_id, ROW_NUMBER() OVER (
+                PARTITION BY tw_post_id ORDER BY created_at DESC, post_id DESC
+            ) AS position
+            FROM posts
+        ) AS d
+        WHERE p.post_id = d.post_id AND d.position > 1
+        """
+    )
+    # Target of INSERT ... ON CONFLICT (tw_post_id) in bulk_upsert_posts
+    op.create_unique_constraint("posts_tw_post_id_key", "posts", ["tw_post_id"])
+
+
+def downgrade():
+    op.drop_constraint("posts_tw_post_id_key", "posts", type_="unique")
@@ -0,0 +1,146 @@
+"""partition events by day and add daily_profile_event_stats
+
+Revision ID: c8d4f0a2b6e1
+Revises: 9b3e1c6d2a47
+Create Date: 2026-10-18 14:26:53.207418
+
+"""
+
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c8d4f0a2b6e1"
+down_revision = "9b3e1c6d2a47"
+branch_labels = None
+depends_on = None
+
+# Partitions created ahead, the daily maintain_event_partitions job keeps
+# the window moving (postgres 10 has no default partition)
+DAYS_AHEAD = 14
+
+EVENTS_COLUMNS = """
+    event_id VARCHAR(128) NOT NULL DEFAULT uuid_generate_v4(),
+    event_type VARCHAR(128),
+    profile_id VARCHAR(128) NOT NULL,
+    profile_id_interact VARCHAR(128),
+    schedule_id VARCHAR(128),
+    mission_id VARCHAR(128),
+    user_id VARCHAR(128),
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+    issue TEXT
+"""
+COLUMN_NAMES = (
+    "event_id, event_type, profile_id, profile_id_interact, schedule_id, "
+    "mission_id, user_id, created_at, issue"
+)
+
+
+def create_partition_indexes(name):
+    # postgres 10 cannot index the partitioned table itself
+    op.execute(f"CREATE UNIQUE INDEX {name}_event_id_idx ON {name} (event_id)")
+    op.execute(
+        f"CREATE INDEX {name}_profile_id_idx "
+        f"ON {name} (profile_id, event_type, created_at)"
+    )
+    op.execute(
+        f"CREATE INDEX {name}_profile_id_interact_idx "
+        f"ON {name} (profile_id_interact, event_type, created_at)"
+    )
+    op.execute(f"CREATE INDEX {name}_created_at_idx ON {name} (created_at)")
+
+
+def upgrade():
+    # Unused since update_click reconciles from the groups counters, and it
+    # would keep a reference to the old table
+    op.execute("DROP VIEW IF EXISTS group_summary_view")
+    op.drop_index("idx_events_created_at", table_name="events")
+    op.execute("ALTER TABLE events RENAME TO events_unpartitioned")
+    op.execute(f"CREATE TABLE events ({EVENTS_COLUMNS}) PARTITION BY RANGE (created_at)")
+
+    today = datetime.datetime.utcnow().date()
+    # Everything recorded before the migration lands in one archive partition,
+    # detached by maintain_event_partitions once older than the retention
+    op.execute(
+        "CREATE TABLE events_archive PARTITION OF events "
+        f"FOR VALUES FROM (MINVALUE) TO ('{today.isoformat()}')"
+    )
+    create_partition_indexes("events_archive")
+    for offset in range(DAYS_AHEAD + 1):
+        day = today + datetime.timedelta(days=offset)
+        name = f"events_{day:%Y%m%d}"
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF events FOR VALUES "
+            f"FROM ('{day.isoformat()}') "
+            f"TO ('{(day + datetime.timedelta(days=1)).isoformat()}')"
+        )
+        create_partition_indexes(name)
+
+    op.execute(
+        f"INSERT INTO events ({COLUMN_NAMES}) "
+        f"SELECT {COLUMN_NAMES} FROM events_unpartitioned"
+    )
+    op.execute("DROP TABLE events_unpartitioned")
+
+    op.create_table(
+        "daily_profile_event_stats",
+        sa.Column("profile_id", sa.String(length=128), nullable=False),
+        sa.Column("event_type", sa.String(length=128), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("received_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("given_count", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("profile_id", "event_type", "day"),
+    )
+    op.create_index(
+        "idx_daily_profile_event_stats_day", "daily_profile_event_stats", ["day"]
+    )
+    op.execute(
+        """
+        INSERT INTO daily_profile_event_stats
+            (profile_id, event_type, day, received_count, given_count)
+        SELECT profile_id, event_type, day, SUM(received), SUM(given)
+        FROM (
+            SELECT profile_id, event_type, DATE(created_at) AS day,
+                1 AS received, 0 AS given
+            FROM events WHERE issue = 'OK' AND event_type IS NOT NULL
+            UNION ALL
+            SELECT profile_id_interact, event_type, DATE(created_at), 0, 1
+            FROM events
+            WHERE issue = 'OK' AND event_type IS NOT NULL
+            AND profile_id_interact IS NOT NULL
+        ) AS s
+        GROUP BY profile_id, event_type, day
+        """
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "idx_daily_profile_event_stats_day", table_name="daily_profile_event_stats"
+    )
+    op.drop_table("daily_profile_event_stats")
+
+    op.execute("ALTER TABLE events RENAME TO events_partitioned")
+    op.execute(
+        f"""
+        CREATE TABLE events (
+            {EVENTS_COLUMNS},
+            PRIMARY KEY (event_id),
+            FOREIGN KEY (profile_id) REFERENCES profiles (profile_id),
+            FOREIGN KEY (profile_id_interact) REFERENCES profiles (profile_id),
+            FOREIGN KEY (schedule_id) REFERENCES mission_schedule (schedule_id),
+            FOREIGN KEY (mission_id) REFERENCES mission (mission_id)
+        )
+        """
+    )
+    op.execute(
+        f"INSERT INTO events ({COLUMN_NAMES}) "
+        f"SELECT {COLUMN_NAMES} FROM events_partitioned"
+    )
+    # Drops the attached partitions too, detached ones are left alone
+    op.execute("DROP TABLE events_partitioned")
+    op.create_index("idx_events_created_at", "events", ["created_at"])
+    # group_summary_view is not restored, nothing reads it any more
@@ -0,0 +1,118 @@
+"""add numeric metrics and posted_at for posts
+
+Revision ID: c9e1a3b5d7f8
+Revises: b7d9f1a3c5e6
+Create Date: 2026-10-18 20:05:47.118364
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c9e1a3b5d7f8"
+down_revision = "b7d9f1a3c5e6"
+branch_labels = None
+depends_on = None
+
+METRIC_COLUMNS = ["like_count", "comment_count", "share_count", "view_count"]
+
+
+def upgrade():
+    for column in METRIC_COLUMNS:
+        op.add_column("posts", sa.Column(column, sa.BigInteger(), nullable=True))
+    op.add_column("posts", sa.Column("posted_at", sa.DateTime(), nullable=True))
+
+    # Metrics as the crawlers read them: "87", "1,234", "1.2K", "3M", and
+    # the vietnamese "1,2 N" (nghìn) / "3 Tr" (triệu) where the comma is
+    # the decimal separator. Anything else is NULL.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION parse_post_metric(value TEXT) RETURNS BIGINT AS $$
+        DECLARE
+            parts TEXT[];
+        BEGIN
+            parts := regexp_match(
+                upper(replace(coalesce(value, ''), ' ', '')),
+                '^([0-9][0-9.,]*)(K|N|M|TR|B)?$'
+            );
+            IF parts IS NULL THEN
+                RETURN NULL;
+            END IF;
+            IF parts[2] IS NULL THEN
+                RETURN replace(replace(parts[1], ',', ''), '.', '')::BIGINT;
+            END IF;
+            RETURN round(
+                replace(parts[1], ',', '.')::NUMERIC * CASE parts[2]
+                    WHEN 'K' THEN 1000 WHEN 'N' THEN 1000
+                    WHEN 'M' THEN 1000000 WHEN 'TR' THEN 1000000
+                    ELSE 1000000000 END
+            )::BIGINT;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+        """
+    )
+    # post_date is the ISO datetime of the tweet, stored in UTC
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION parse_post_date(value TEXT) RETURNS TIMESTAMP AS $$
+        BEGIN
+            IF coalesce(value, '') = '' THEN
+                RETURN NULL;
+            END IF;
+            RETURN value::TIMESTAMPTZ AT TIME ZONE 'UTC';
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql STABLE
+        """
+    )
+    # postgres 10 has no generated columns, a trigger keeps them in sync
+    # on every write path (create_or_update_post, the bulk upsert, PUT)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION posts_sync_metric_columns() RETURNS trigger AS $$
+        BEGIN
+            NEW.like_count := parse_post_metric(NEW."like");
+            NEW.comment_count := parse_post_metric(NEW.comment);
+            NEW.share_count := parse_post_metric(NEW.share);
+            NEW.view_count := parse_post_metric(NEW."view");
+            NEW.posted_at := parse_post_date(NEW.post_date);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER posts_sync_metric_columns "
+        'BEFORE INSERT OR UPDATE OF "like", comment, share, "view", post_date '
+        "ON posts FOR EACH ROW EXECUTE PROCEDURE posts_sync_metric_columns()"
+    )
+    # Backfill through the trigger
+    op.execute("UPDATE posts SET post_date = post_date")
+
+    # Top posts of a profile (or of the team) in a posted_at window: an
+    # index range scan, then a top-N sort of the window on the metric
+    op.execute(
+        "CREATE INDEX idx_posts_profile_posted_at ON posts (profile_id, posted_at) "
+        "WHERE is_deleted = FALSE"
+    )
+    op.execute(
+        "CREATE INDEX idx_posts_posted_at ON posts (posted_at) "
+        "WHERE is_deleted = FALSE"
+    )
+
+
+def downgrade():
+    op.drop_index("idx_posts_posted_at", table_name="posts")
+    op.drop_index("idx_posts_profile_posted_at", table_name="posts")
+    op.execute("DROP TRIGGER IF EXISTS posts_sync_metric_columns ON posts")
+    op.execute("DROP FUNCTION IF EXISTS posts_sync_metric_columns()")
+    op.execute("DROP FUNCTION IF EXISTS parse_post_date(TEXT)")
+    op.execute("DROP FUNCTION IF EXISTS parse_post_metric(TEXT)")
+    op.drop_column("posts", "posted_at")
+    for column in reversed(METRIC_COLUMNS):
+        op.drop_column("posts", column)
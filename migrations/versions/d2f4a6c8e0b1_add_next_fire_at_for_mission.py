@@ -0,0 +1,64 @@
+"""add next_fire_at for mission
+
+Revision ID: d2f4a6c8e0b1
+Revises: c9e1a3b5d7f8
+Create Date: 2026-10-18 20:41:33.950276
+
+"""
+
+import datetime
+
+from alembic import op
+import pytz
+import sqlalchemy as sa
+from croniter import croniter
+
+
+# revision identifiers, used by Alembic.
+revision = "d2f4a6c8e0b1"
+down_revision = "c9e1a3b5d7f8"
+branch_labels = None
+depends_on = None
+
+# Same computation as mission_services.compute_next_fire_at
+CRON_TIMEZONE = "Asia/Ho_Chi_Minh"
+
+
+def next_fire_at(cron_expression):
+    now = datetime.datetime.now(pytz.timezone(CRON_TIMEZONE))
+    try:
+        next_fire = croniter(cron_expression, now).get_next(datetime.datetime)
+    except Exception:
+        return None
+    return next_fire.astimezone(pytz.utc).replace(tzinfo=None)
+
+
+def upgrade():
+    op.add_column("mission", sa.Column("next_fire_at", sa.DateTime(), nullable=True))
+    # The schedule poll selects the due missions of a user on these
+    op.create_index(
+        "idx_mission_user_next_fire_at", "mission", ["user_id", "next_fire_at"]
+    )
+    op.execute(
+        "CREATE INDEX idx_mission_force_start ON mission (user_id) "
+        "WHERE force_start = TRUE"
+    )
+
+    connection = op.get_bind()
+    missions = connection.execute(
+        sa.text(
+            "SELECT mission_id, mission_json ->> 'cron' AS cron FROM mission "
+            "WHERE COALESCE(mission_json ->> 'cron', '') <> ''"
+        )
+    ).fetchall()
+    for mission in missions:
+        connection.execute(
+            sa.text("UPDATE mission SET next_fire_at = :value WHERE mission_id = :id"),
+            {"value": next_fire_at(mission.cron), "id": mission.mission_id},
+        )
+
+
+def downgrade():
+    op.drop_index("idx_mission_force_start", table_name="mission")
+    op.drop_index("idx_mission_user_next_fire_at", table_name="mission")
+    op.drop_column("mission", "next_fire_at")
@@ -0,0 +1,37 @@
+"""add tenant_job_runs
+
+Revision ID: e3b5c7d9f1a4
+Revises: d2f4a6c8e0b1
+Create Date: 2026-10-18 23:12:08.417395
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e3b5c7d9f1a4"
+down_revision = "d2f4a6c8e0b1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tenant_job_runs",
+        sa.Column("job_name", sa.String(length=128), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("duration_ms", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("writes_seen", sa.BigInteger(), nullable=True),
+        sa.Column("run_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("error_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("skip_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("job_name"),
+    )
+
+
+def downgrade():
+    op.drop_table("tenant_job_runs")
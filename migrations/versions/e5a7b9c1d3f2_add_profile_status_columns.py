@@ -0,0 +1,81 @@
+"""add typed profile status columns
+
+Revision ID: e5a7b9c1d3f2
+Revises: c8d4f0a2b6e1
+Create Date: 2026-10-18 16:48:05.912374
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a7b9c1d3f2"
+down_revision = "c8d4f0a2b6e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("profiles", sa.Column("is_verified", sa.Boolean(), nullable=True))
+    op.add_column("profiles", sa.Column("is_suspended", sa.Boolean(), nullable=True))
+    op.add_column("profiles", sa.Column("is_monetizable", sa.Boolean(), nullable=True))
+    op.add_column(
+        "profiles", sa.Column("account_status", sa.String(length=64), nullable=True)
+    )
+
+    # postgres 10 has no generated columns, a trigger keeps them in sync.
+    # CAST(json -> key AS TEXT) is what the former filters compared, so
+    # only JSON booleans map to true/false.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION profiles_sync_status_columns() RETURNS trigger AS $$
+        BEGIN
+            NEW.is_verified := CASE CAST(NEW.profile_data -> 'verify' AS TEXT)
+                WHEN 'true' THEN TRUE WHEN 'false' THEN FALSE END;
+            NEW.is_suspended := CASE CAST(NEW.profile_data -> 'suspended' AS TEXT)
+                WHEN 'true' THEN TRUE WHEN 'false' THEN FALSE END;
+            NEW.is_monetizable := CASE CAST(NEW.profile_data -> 'monetizable' AS TEXT)
+                WHEN 'true' THEN TRUE WHEN 'false' THEN FALSE END;
+            NEW.account_status := json_extract_path_text(NEW.profile_data, 'account_status');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER profiles_sync_status_columns "
+        "BEFORE INSERT OR UPDATE OF profile_data ON profiles "
+        "FOR EACH ROW EXECUTE PROCEDURE profiles_sync_status_columns()"
+    )
+    # Backfill through the trigger
+    op.execute("UPDATE profiles SET profile_data = profile_data")
+
+    # Same predicates as the dispatcher receiver/giver queries. click_count
+    # is left out so counter increments stay HOT updates.
+    op.execute(
+        "CREATE INDEX idx_profiles_receivers ON profiles (owner) "
+        "WHERE main_profile = TRUE AND is_disable = FALSE"
+    )
+    op.execute(
+        "CREATE INDEX idx_profiles_givers ON profiles (owner) "
+        "WHERE main_profile = FALSE AND is_disable = FALSE "
+        "AND is_verified = TRUE AND is_suspended = FALSE"
+    )
+    op.execute(
+        "CREATE INDEX idx_profiles_account_status ON profiles (account_status) "
+        "WHERE is_disable = FALSE"
+    )
+
+
+def downgrade():
+    op.drop_index("idx_profiles_account_status", table_name="profiles")
+    op.drop_index("idx_profiles_givers", table_name="profiles")
+    op.drop_index("idx_profiles_receivers", table_name="profiles")
+    op.execute("DROP TRIGGER IF EXISTS profiles_sync_status_columns ON profiles")
+    op.execute("DROP FUNCTION IF EXISTS profiles_sync_status_columns()")
+    op.drop_column("profiles", "account_status")
+    op.drop_column("profiles", "is_monetizable")
+    op.drop_column("profiles", "is_suspended")
+    op.drop_column("profiles", "is_verified")
@@ -0,0 +1,32 @@
+"""add keyset pagination indexes for profiles and posts
+
+Revision ID: f1b3d5e7a9c2
+Revises: e5a7b9c1d3f2
+Create Date: 2026-10-18 18:12:40.531877
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "f1b3d5e7a9c2"
+down_revision = "e5a7b9c1d3f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pages read (created_at, id) < cursor from these, the events
+    # partitions already have their created_at index
+    op.create_index(
+        "idx_profiles_created_at_profile_id", "profiles", ["created_at", "profile_id"]
+    )
+    op.create_index(
+        "idx_posts_created_at_post_id", "posts", ["created_at", "post_id"]
+    )
+
+
+def downgrade():
+    op.drop_index("idx_posts_created_at_post_id", table_name="posts")
+    op.drop_index("idx_profiles_created_at_profile_id", table_name="profiles")
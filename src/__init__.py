@@ -17,6 +17,9 @@ import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
 
 from .config import DevelopmentConfig, StagingConfig, ProductionConfig, Config
+from .log_config import configure_logging
+from .utilities.db_pool import register_tenant_pool
+from .utilities.profiling import register_profiling
 
 # Initialize Flask app and set config
 app = Flask(__name__)
@@ -37,11 +40,19 @@ else:
         ],
     )
 
+configure_logging(app.config["LOG_LEVEL"])
+
 # Set CORS config
 CORS(app=app, origins=app.config["CORS_ORIGIN"], supports_credentials=True)
 
 # Set configuration for DB
 db = SQLAlchemy(app)
+if app.config["DB_POOL_MODE"] == "queue":
+    with app.app_context():
+        register_tenant_pool(db.engine)
+if app.config["PROFILING_ENABLED"]:
+    with app.app_context():
+        register_profiling(app, db.engine)
 executor = Executor(app)
 cache = Cache(app)
 migrate = Migrate(app, db, compare_type=True)
@@ -61,10 +72,22 @@ celery = Celery(
     broker=os.environ["CELERY_BROKER_URL"],
     backend=os.environ["CELERY_BROKER_URL"],
     beat_schedule={
-        "task-every-120-seconds": {
+        "reconcile-group-counts": {
             "task": "src.tasks.schedule.update_click",
-            "schedule": 120,
-        }
+            "schedule": app.config["GROUP_RECONCILE_INTERVAL"],
+        },
+        "maintain-event-partitions": {
+            "task": "src.tasks.schedule.maintain_event_partitions",
+            "schedule": crontab(minute=5),
+        },
+        "reset-click-daily": {
+            "task": "src.tasks.schedule.reset_click",
+            "schedule": crontab(hour=0, minute=0),
+        },
+        "maintain-tables-daily": {
+            "task": "src.tasks.schedule.maintain_tables",
+            "schedule": crontab(hour=3, minute=30),
+        },
     },
     timezone="Asia/Bangkok",
 )
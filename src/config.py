@@ -26,7 +26,18 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ["DATABASE_URI"]
     SQLALCHEMY_ECHO = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {"poolclass": NullPool}
+    # null: a new connection per checkout, queue: pooled per process
+    DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "null")
+    if DB_POOL_MODE == "queue":
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            "pool_pre_ping": True,
+            "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+            "max_overflow": int(os.environ.get("DB_POOL_MAX_OVERFLOW", 10)),
+            "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+            "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS = {"poolclass": NullPool}
     CORS_ORIGIN = os.environ["CORS_ORIGIN"]
     UPLOAD_FOLDER = os.environ["UPLOAD_FOLDER"]
     SENTRY_CONFIG = os.environ["SENTRY_CONFIG"]
@@ -50,6 +61,73 @@ class Config:
     CACHE_DEFAULT_TIMEOUT: 120
     CACHE_TYPE = os.environ.get("CACHE_TYPE", "SimpleCache")
     CACHE_REDIS_URL = os.environ["CACHE_REDIS_URL"]
+    DISPATCH_POOL_ENABLED = os.environ.get("DISPATCH_POOL_ENABLED", "true") == "true"
+    DISPATCH_POOL_BACKEND = os.environ.get(
+        "DISPATCH_POOL_BACKEND", "redis" if CACHE_TYPE == "RedisCache" else "memory"
+    )
+    DISPATCH_POOL_TTL = int(os.environ.get("DISPATCH_POOL_TTL", 300))
+    # none: one UPDATE per event, request: one UPDATE per request,
+    # worker: buffered per process and flushed by size or age
+    COUNTER_BUFFER_MODE = os.environ.get("COUNTER_BUFFER_MODE", "request")
+    COUNTER_BUFFER_SIZE = int(os.environ.get("COUNTER_BUFFER_SIZE", 500))
+    COUNTER_FLUSH_INTERVAL = int(os.environ.get("COUNTER_FLUSH_INTERVAL", 5))
+    # Upper bound for an admin expiry change to reach already issued tokens
+    USER_EXPIRY_CACHE_TTL = int(os.environ.get("USER_EXPIRY_CACHE_TTL", 300))
+    # Timezone of the daily counter reset (same as celery beat)
+    TEAMS_TIMEZONE = os.environ.get("TEAMS_TIMEZONE", "Asia/Bangkok")
+    COUNTER_RESET_CHUNK_SIZE = int(os.environ.get("COUNTER_RESET_CHUNK_SIZE", 1000))
+    # HMA client: token cache, connection pool, timeouts (seconds) and retries
+    HMA_TOKEN_TTL = int(os.environ.get("HMA_TOKEN_TTL", 3600))
+    HMA_POOL_SIZE = int(os.environ.get("HMA_POOL_SIZE", 20))
+    HMA_CONNECT_TIMEOUT = float(os.environ.get("HMA_CONNECT_TIMEOUT", 5))
+    HMA_READ_TIMEOUT = float(os.environ.get("HMA_READ_TIMEOUT", 30))
+    HMA_RETRIES = int(os.environ.get("HMA_RETRIES", 3))
+    HMA_BACKOFF_FACTOR = float(os.environ.get("HMA_BACKOFF_FACTOR", 0.5))
+    # Wall clock budget of the HMA calls of a request, under uWSGI harakiri (13s),
+    # and HMA calls in flight per process beyond which requests fail fast
+    HMA_CALL_TIMEOUT = float(os.environ.get("HMA_CALL_TIMEOUT", 8))
+    HMA_MAX_CONCURRENCY = int(os.environ.get("HMA_MAX_CONCURRENCY", 8))
+    HMA_BROWSER_DATA_TTL = int(os.environ.get("HMA_BROWSER_DATA_TTL", 3600))
+    PROFILE_IMPORT_CONCURRENCY = int(os.environ.get("PROFILE_IMPORT_CONCURRENCY", 8))
+    PROFILE_IMPORT_TTL = int(os.environ.get("PROFILE_IMPORT_TTL", 86400))
+    DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL", 3600))
+    # Daily events partitions created ahead / kept attached (0 keeps all)
+    EVENTS_PARTITION_DAYS_AHEAD = int(os.environ.get("EVENTS_PARTITION_DAYS_AHEAD", 14))
+    EVENTS_PARTITION_RETENTION_DAYS = int(
+        os.environ.get("EVENTS_PARTITION_RETENTION_DAYS", 0)
+    )
+    # Seconds between reconciliations of the incremental group counts
+    GROUP_RECONCILE_INTERVAL = int(os.environ.get("GROUP_RECONCILE_INTERVAL", 900))
+    # Tenants processed in parallel by the periodic jobs (src.tasks.tenant_jobs)
+    TENANT_JOB_CONCURRENCY = int(os.environ.get("TENANT_JOB_CONCURRENCY", 4))
+    # Daily maintain_tables: VACUUM (ANALYZE) of the tables with this share of
+    # dead rows (and this many), ANALYZE of those with this share modified
+    MAINTENANCE_DEAD_RATIO = float(os.environ.get("MAINTENANCE_DEAD_RATIO", 0.2))
+    MAINTENANCE_MIN_DEAD_TUPLES = int(
+        os.environ.get("MAINTENANCE_MIN_DEAD_TUPLES", 1000)
+    )
+    MAINTENANCE_ANALYZE_RATIO = float(os.environ.get("MAINTENANCE_ANALYZE_RATIO", 0.2))
+    MAINTENANCE_CONCURRENCY = int(os.environ.get("MAINTENANCE_CONCURRENCY", 1))
+    EVENTS_BULK_MAX_SIZE = int(os.environ.get("EVENTS_BULK_MAX_SIZE", 1000))
+    POSTS_BULK_MAX_SIZE = int(os.environ.get("POSTS_BULK_MAX_SIZE", 5000))
+    TOP_POSTS_DEFAULT_DAYS = int(os.environ.get("TOP_POSTS_DEFAULT_DAYS", 7))
+    TOP_POSTS_MAX_LIMIT = int(os.environ.get("TOP_POSTS_MAX_LIMIT", 100))
+    # Listings: page size of keyset pages and lifetime of count=cached counts
+    PAGINATION_DEFAULT_PER_PAGE = int(os.environ.get("PAGINATION_DEFAULT_PER_PAGE", 20))
+    PAGINATION_COUNT_TTL = int(os.environ.get("PAGINATION_COUNT_TTL", 60))
+    # Cached listings of cache_services, the profiles and groups ones for less
+    # time as their counters are also written by the events
+    TENANT_CACHE_TTL = int(os.environ.get("TENANT_CACHE_TTL", 300))
+    TENANT_CACHE_COUNTERS_TTL = int(os.environ.get("TENANT_CACHE_COUNTERS_TTL", 30))
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    # Share of the requests logged (errors always are) and largest JSON body
+    # logged with them, in bytes (0: no bodies)
+    REQUEST_LOG_SAMPLE_RATE = float(os.environ.get("REQUEST_LOG_SAMPLE_RATE", 0.1))
+    REQUEST_LOG_MAX_BODY = int(os.environ.get("REQUEST_LOG_MAX_BODY", 2048))
+    # Request metrics of GET /metrics, PROMETHEUS_MULTIPROC_DIR under uWSGI
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false") == "true"
+    # Statements slower than this are logged with the endpoint (0: never)
+    PROFILING_SLOW_SQL_MS = int(os.environ.get("PROFILING_SLOW_SQL_MS", 500))
 
 
 class ProductionConfig(Config):
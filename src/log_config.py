@@ -1,32 +1,104 @@
-import os
+import atexit
+import copy
+import datetime
+import json
 import logging
-from logging.config import dictConfig
-
-# Config app logging
-# dictConfig(
-#     {
-#         'version': 1,
-#         'formatters': {
-#             'default': {
-#                 'format': '[%(asctime)s] [%(levelname)s] - [%(name)s] - %(message)s',
-#             }
-#         },
-#         'handlers': {
-#             'console': {
-#                 'class': 'logging.StreamHandler',
-#                 'stream': 'ext://flask.logging.wsgi_errors_stream',
-#                 'formatter': 'default',
-#             }
-#         },
-#         'root': {'level': 'INFO', 'handlers': ['console']},
-#     }
-# )
-#
-# # Disable debug logs from some noisy packages
-# logging.getLogger('sqlalchemy').setLevel(logging.ERROR)
-# # logging.getLogger('botocore').setLevel(logging.ERROR)
-# logging.getLogger('werkzeug').setLevel(logging.ERROR)
-# logging.getLogger('sentry').setLevel(logging.ERROR)
-
-
-_logger = logging.getLogger()
\ No newline at end of file
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    postfork = None
+
+# Keys whose values never reach the logs, at any depth of a logged dict
+REDACTED_KEYS = {"password", "fa", "cookies", "gpt_key", "proxy", "jwt"}
+REDACTED = "***"
+
+
+def is_redacted(key):
+    key = str(key).lower()
+    # e.g. hideMyAccPassword of the settings
+    return key in REDACTED_KEYS or "password" in key
+
+
+def redact(value):
+    """Copy of a dict / list with the values of the REDACTED_KEYS masked."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if is_redacted(key) else redact(val)
+            for key, val in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def sample(rate):
+    """Whether to log one more request out of a rate between 0 and 1."""
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line. A dict message becomes fields of the object
+    (redacted), any other message the "message" field.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.utcfromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if isinstance(record.msg, dict):
+            entry.update(redact(record.msg))
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler leaving the formatting to the listener thread. The stock
+    one formats on the calling thread and flattens dict messages.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if not isinstance(record.msg, dict):
+            # The arguments may change once the call returned
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def configure_logging(level):
+    """
+    Log JSON lines to stderr through a queue: the request threads only
+    enqueue the records, a listener thread formats and writes them. The
+    listener is restarted in each uWSGI worker, threads do not survive
+    the fork.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    if postfork:
+        postfork(listener.start)
+
+    root = logging.getLogger()
+    root.handlers = [RecordQueueHandler(records)]
+    root.setLevel(level)
+    # Disable debug logs from some noisy packages
+    for name in ("sqlalchemy", "werkzeug", "urllib3"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    return listener
+
+
+_logger = logging.getLogger()
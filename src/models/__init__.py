@@ -21,3 +21,5 @@ from src.models.posts import Posts
 from src.models.profiles import Profiles
 from src.models.user_group import UserGroup
 from src.models.groups import Groups
+from src.models.daily_profile_event_stats import DailyProfileEventStats
+from src.models.tenant_job_run import TenantJobRun
@@ -0,0 +1,27 @@
+from src import db
+
+
+class DailyProfileEventStats(db.Model):
+    """
+    Rollup of the OK events of a profile per event type and day, kept when
+    the daily events partitions are detached
+    """
+
+    __tablename__ = "daily_profile_event_stats"
+
+    profile_id = db.Column(db.String(128), primary_key=True)
+    event_type = db.Column(db.String(128), primary_key=True)
+    day = db.Column(db.Date(), primary_key=True)
+    # Events where the profile is the receiver (profile_id)
+    received_count = db.Column(db.Integer, nullable=False, server_default="0")
+    # Events where the profile is the giver (profile_id_interact)
+    given_count = db.Column(db.Integer, nullable=False, server_default="0")
+
+    def repr_name(self):
+        return {
+            "profile_id": self.profile_id,
+            "event_type": self.event_type,
+            "day": self.day.isoformat(),
+            "received_count": self.received_count,
+            "given_count": self.given_count,
+        }
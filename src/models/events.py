@@ -8,6 +8,8 @@ class Events(db.Model):
     Model for mission groups
     """
 
+    # Partitioned by day on created_at (see event_partition_services): the
+    # primary and foreign keys below only exist on the ORM side
     __tablename__ = "events"
 
     event_id = db.Column(
@@ -30,6 +32,9 @@ class Events(db.Model):
     created_at = db.Column(db.DateTime(), nullable=False, server_default=func.now())
     issue = db.Column(db.Text(), nullable=True)
 
+    # Relationships read by repr_name, see model_helper.repr_loader_options
+    repr_relationships = ("receiver", "giver")
+
     def repr_name(self):
         return {
             "event_id": self.event_id,
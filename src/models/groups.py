@@ -35,6 +35,8 @@ class Groups(db.Model):
         db.Integer, default=0
     )  # New column for receiver count
     profile_giver_count = db.Column(db.Integer, default=0)  # New column for receiver count
+    # Day (in TEAMS_TIMEZONE) click_count and receiver_count belong to
+    counters_date = db.Column(db.Date(), nullable=True)
 
     def repr_name(self):
         return {
@@ -28,6 +28,8 @@ class Mission(db.Model):
     group_id = db.Column(db.String(128), ForeignKey("groups.group_id"), nullable=True)
     user_id = db.Column(db.String(128), nullable=False)
     mission_json = db.Column(JSONB, comment="JSON for mission")
+    # Next fire time (UTC) of mission_json["cron"], kept by mission_services
+    next_fire_at = db.Column(db.DateTime(), nullable=True)
     mission_schedule = relationship(
         "MissionSchedule", cascade="all,delete", backref="mission"
     )
@@ -42,6 +44,8 @@ class Mission(db.Model):
         comment="Timestamp indicating when the record was created",
     )
     mission_tasks = relationship("MissionTask", back_populates="mission")
+    # Relationships read by repr_name, see model_helper.repr_loader_options
+    repr_relationships = ("mission_schedule", "mission_tasks")
 
     def __init__(self, mission_name, group_id, user_id):
         self.mission_name = mission_name
@@ -18,6 +18,8 @@ class MissionTask(db.Model):
     # Relationships
     mission = relationship("Mission", back_populates="mission_tasks")
     task = relationship("Task", back_populates="mission_tasks")
+    # Relationships read by repr_name, see model_helper.repr_loader_options
+    repr_relationships = ("task",)
 
     def __init__(self, mission_id, tasks_id):
         self.tasks_id = tasks_id
@@ -1,5 +1,5 @@
 from src import db
-from sqlalchemy import text, ForeignKey, func
+from sqlalchemy import text, FetchedValue, ForeignKey, func
 from sqlalchemy.orm import relationship
 
 
@@ -15,7 +15,7 @@ class Posts(db.Model):
     )
     title = db.Column(db.String(255), nullable=True)
     content = db.Column(db.Text(), nullable=True)
-    tw_post_id = db.Column(db.String(255), nullable=False)
+    tw_post_id = db.Column(db.String(255), nullable=False, unique=True)
     profile_id = db.Column(
         db.String(128), ForeignKey("profiles.profile_id"), nullable=False
     )
@@ -27,10 +27,45 @@ class Posts(db.Model):
     share = db.Column(db.String(128), nullable=True)
     view = db.Column(db.String(128), nullable=True)
     post_date = db.Column(db.String(128), nullable=True)
+    # Parsed from the strings above ("1.2K", ISO post_date) by the
+    # posts_sync_metric_columns trigger, read only. FetchedValue expires them
+    # on flush so the ORM reloads the values of the trigger
+    like_count = db.Column(
+        db.BigInteger,
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+    comment_count = db.Column(
+        db.BigInteger,
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+    share_count = db.Column(
+        db.BigInteger,
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+    view_count = db.Column(
+        db.BigInteger,
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
+    posted_at = db.Column(
+        db.DateTime(),
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
     is_deleted = db.Column(db.Boolean, server_default="false")
     # Relationships
     profile = relationship("Profiles", foreign_keys=[profile_id])
     user = relationship("User", foreign_keys=[crawl_by])
+    # Relationships read by repr_name, see model_helper.repr_loader_options
+    repr_relationships = ("profile", "user")
 
     def repr_name(self):
         return {
@@ -45,6 +80,11 @@ class Posts(db.Model):
             "tw_post_id": self.tw_post_id,
             "is_deleted": self.is_deleted,
             "post_date": self.post_date,
+            "like_count": self.like_count,
+            "comment_count": self.comment_count,
+            "share_count": self.share_count,
+            "view_count": self.view_count,
+            "posted_at": self.posted_at.isoformat() if self.posted_at else None,
             "profile_crawl": self.profile.username if self.profile else None,
             "user_crawl": self.user.username if self.user else None,
             "created_at": self.created_at.strftime("%d-%m-%Y %H:%M"),
@@ -25,6 +25,12 @@ class Profiles(db.Model):
     cookies = db.Column(db.Text(), nullable=True, server_default="")
     notes = db.Column(db.Text(), nullable=True, server_default="")
     profile_data = db.Column(db.JSON(), nullable=True)
+    # Copied from profile_data by the profiles_sync_status_columns trigger,
+    # read only: filter on these instead of casting the JSON
+    is_verified = db.Column(db.Boolean, nullable=True)
+    is_suspended = db.Column(db.Boolean, nullable=True)
+    is_monetizable = db.Column(db.Boolean, nullable=True)
+    account_status = db.Column(db.String(64), nullable=True)
     browser_data = db.Column(db.Text(), nullable=True, server_default="")
     tz_info = db.Column(db.JSON(), nullable=True)
     status = db.Column(db.String(128), nullable=True, server_default="")
@@ -47,6 +53,8 @@ class Profiles(db.Model):
     click_count = db.Column(db.Integer, nullable=True, server_default="0")
     comment_count = db.Column(db.Integer, nullable=True, server_default="0")
     like_count = db.Column(db.Integer, nullable=True, server_default="0")
+    # Day (in TEAMS_TIMEZONE) the click/comment/like counters belong to
+    counters_date = db.Column(db.Date(), nullable=True)
     is_disable = db.Column(db.Boolean, server_default="false", nullable=True)
     interactions_giver = db.relationship(
         "Events", foreign_keys="Events.profile_id", backref="receiver", lazy=True
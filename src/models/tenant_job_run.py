@@ -0,0 +1,35 @@
+from src import db
+
+
+class TenantJobRun(db.Model):
+    """
+    Last run of a periodic job (src.tasks.tenant_jobs) in the team schema,
+    one row per job
+    """
+
+    __tablename__ = "tenant_job_runs"
+
+    job_name = db.Column(db.String(128), primary_key=True)
+    # ok, error or skipped (no activity since the last ok run)
+    status = db.Column(db.String(16), nullable=False)
+    started_at = db.Column(db.DateTime(), nullable=False)
+    duration_ms = db.Column(db.Integer, nullable=False)
+    error = db.Column(db.Text)
+    # Writes to the tables the job reads when it last ran ok, see
+    # tenant_jobs.ACTIVITY_QUERY
+    writes_seen = db.Column(db.BigInteger)
+    run_count = db.Column(db.BigInteger, nullable=False, server_default="0")
+    error_count = db.Column(db.BigInteger, nullable=False, server_default="0")
+    skip_count = db.Column(db.BigInteger, nullable=False, server_default="0")
+
+    def repr_name(self):
+        return {
+            "job_name": self.job_name,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "run_count": self.run_count,
+            "error_count": self.error_count,
+            "skip_count": self.skip_count,
+        }
@@ -26,6 +26,19 @@ page_parser.add_argument(
 page_parser.add_argument(
     "filter", type=str, help="The filters to be applied to function", location="args"
 )
+page_parser.add_argument(
+    "cursor",
+    type=str,
+    help="Keyset pagination: empty for the first page, then the next_cursor",
+    location="args",
+)
+page_parser.add_argument(
+    "count",
+    type=str,
+    choices=("exact", "cached", "estimate", "none"),
+    help="result_count mode, exact by page and none by cursor by default",
+    location="args",
+)
 
 profile_page_parse = page_parser.copy()
 profile_page_parse.add_argument(
@@ -76,6 +89,34 @@ profile_page_parser.add_argument(
     "filter", type=str, help="Search by type", location="args", default="all"
 )
 
+top_posts_parser = reqparse.RequestParser()
+top_posts_parser.add_argument(
+    "metric",
+    type=str,
+    choices=("view", "like", "comment", "share"),
+    default="view",
+    help="Metric to rank the posts by",
+    location="args",
+)
+top_posts_parser.add_argument(
+    "profile_id", type=str, help="Profile of the posts, all if empty", location="args"
+)
+top_posts_parser.add_argument(
+    "start_date",
+    type=inputs.datetime_from_iso8601,
+    help="start of the posted_at window like 2021-05-03T13:56:20 (UTC)",
+    location="args",
+)
+top_posts_parser.add_argument(
+    "end_date",
+    type=inputs.datetime_from_iso8601,
+    help="end of the posted_at window like 2021-05-03T13:56:20 (UTC)",
+    location="args",
+)
+top_posts_parser.add_argument(
+    "limit", type=int, default=10, help="Number of posts", location="args"
+)
+
 filter_parser = reqparse.RequestParser()
 filter_parser.add_argument(
     "filter", type=str, help="The filters to be applied to function", location="args"
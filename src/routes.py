@@ -1,33 +1,49 @@
 import json
+import logging
 import os
+import time
 import traceback
 
 from werkzeug.exceptions import NotFound as InvalidURLException
-from flask import jsonify, request
+from flask import g, jsonify, request
 from sentry_sdk import capture_exception
 from src import app
 from src import db
 from src import jwt
 from src import v1
+from src.services import counter_services
+from src.utilities import profiling
+from src.utilities.custom_decorator import requires_apikey
 from src.version_handler import version_1_web, api_version_1_web
-from src.log_config import _logger
+from src.log_config import _logger, redact, sample
 
 app.register_blueprint(version_1_web, url_prefix="/api/v1")
 
 
 @app.before_request
 def log_request_info():
-    _logger.info(
-        {
-            "request": {
-                "remote_addr": request.remote_addr,
-                "method": request.method,
-                "scheme": request.scheme,
-                "full_path": request.full_path,
-                "data": request.get_data(),
-            }
-        }
-    )
+    # Sampled up front, the unsampled requests cost nothing more
+    g.request_log = sample(app.config["REQUEST_LOG_SAMPLE_RATE"])
+    g.request_start = time.perf_counter()
+
+
+def request_log_entry(response):
+    """Structured log of a request, its JSON body only when small."""
+    size = request.content_length
+    entry = {
+        "remote_addr": request.remote_addr,
+        "method": request.method,
+        "path": request.path,
+        "args": redact(request.args.to_dict()),
+        "status": response.status_code,
+        "duration_ms": round((time.perf_counter() - g.request_start) * 1000, 1),
+        "body_size": size,
+    }
+    max_body = app.config["REQUEST_LOG_MAX_BODY"]
+    if request.is_json and size is not None and size <= max_body:
+        # Parsed once for the controllers too
+        entry["body"] = redact(request.get_json(silent=True))
+    return {"request": entry}
 
 
 @app.errorhandler(InvalidURLException)
@@ -47,7 +63,7 @@ def exceptions(e):
         request.remote_addr,
         request.method,
         request.scheme,
-        request.full_path,
+        request.path,
         tb,
     )
     capture_exception(e)
@@ -60,20 +76,19 @@ def exceptions(e):
 
 @app.after_request
 def after_request(response):
-    _logger.debug(
-        "%s %s %s %s %s",
-        request.remote_addr,
-        request.method,
-        request.scheme,
-        request.full_path,
-        response.status_code,
-    )
+    if "request_start" not in g:
+        return response
+    if response.status_code >= 500:
+        _logger.error(request_log_entry(response))
+    elif g.request_log and _logger.isEnabledFor(logging.INFO):
+        _logger.info(request_log_entry(response))
     return response
 
 
 @app.after_request
 def after_request_func(response):
     if response.status_code in [200, 201]:
+        counter_services.flush_request_buffer()
         db.session.commit()
     return response
 
@@ -86,6 +101,18 @@ def ping():
     return jsonify({"Status": "Alive"}), 200
 
 
+@app.route("/metrics")
+@requires_apikey
+def metrics():
+    """
+    Request metrics in the Prometheus format, PROFILING_ENABLED only
+    """
+    if not profiling.enabled():
+        raise InvalidURLException()
+    body, content_type = profiling.render_metrics()
+    return app.response_class(body, mimetype=None, content_type=content_type)
+
+
 @jwt.user_claims_loader
 def add_claims_to_access_token(payload):
     """
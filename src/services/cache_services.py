@@ -0,0 +1,155 @@
+"""Per tenant cache of the hot listings, invalidated by the services writing them."""
+
+import functools
+import hashlib
+import logging
+import threading
+import uuid
+from collections import Counter
+
+from flask import has_request_context
+from flask_jwt_extended import get_jwt_claims
+from sqlalchemy import event
+
+from src import app, db, cache
+from src.utilities import profiling
+
+# Create module log
+_logger = logging.getLogger(__name__)
+
+# Cached reads, one namespace per table written by the invalidating services
+PROFILES = "profiles"
+GROUPS = "groups"
+TASKS = "tasks"
+SETTINGS = "settings"
+MISSIONS = "missions"
+NAMESPACES = (PROFILES, GROUPS, TASKS, SETTINGS, MISSIONS)
+
+# (namespace, teams_id) written by the current transaction
+_PENDING_KEY = "cache_invalidations"
+
+# Hits and misses of this process by namespace
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def current_teams_id():
+    """
+    Tenant of the session: the one of set_search_path until the end of the
+    transaction (the connection goes back to the pool on public), else the
+    one of the JWT claims.
+    """
+    teams_id = db.session.info.get("teams_id")
+    if teams_id is None and has_request_context():
+        teams_id = get_jwt_claims().get("teams_id")
+    return teams_id
+
+
+def _generation_key(namespace, teams_id):
+    return f"cache_generation:{namespace}:{teams_id}"
+
+
+def _generation(namespace, teams_id):
+    """
+    Current generation of a namespace of a tenant. Entries are keyed by
+    it, an invalidation starts a new one instead of finding the keys.
+    """
+    key = _generation_key(namespace, teams_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, timeout=0)
+        generation = cache.get(key)
+    return generation
+
+
+def _cache_key(namespace, teams_id, fn, args, kwargs):
+    digest = hashlib.sha1(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+    generation = _generation(namespace, teams_id)
+    name = f"{fn.__module__}.{fn.__name__}"
+    return f"cache:{namespace}:{teams_id}:{generation}:{name}:{digest}"
+
+
+def _record(namespace, outcome):
+    with _stats_lock:
+        _stats[(namespace, outcome)] += 1
+    # Summed over the workers on GET /metrics
+    profiling.count_cache(namespace, outcome)
+
+
+def tenant_cached(namespace, timeout_config="TENANT_CACHE_TTL"):
+    """
+    Cache the result of a read per tenant and arguments until the
+    namespace is invalidated or for the timeout_config seconds. Calls
+    without a tenant, or after a write of the namespace in the same
+    transaction, go to the database.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            teams_id = current_teams_id()
+            pending = db.session.info.get(_PENDING_KEY, set())
+            if teams_id is None or (namespace, teams_id) in pending:
+                _record(namespace, "bypass")
+                return fn(*args, **kwargs)
+
+            cache_key = _cache_key(namespace, teams_id, fn, args, kwargs)
+            # Wrapped so that a cached None (e.g. no settings) is a hit
+            cached = cache.get(cache_key)
+            if cached is not None:
+                _record(namespace, "hits")
+                return cached[0]
+            _record(namespace, "misses")
+            value = fn(*args, **kwargs)
+            cache.set(cache_key, (value,), timeout=app.config[timeout_config])
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(*namespaces, teams_id=None):
+    """
+    Drop the cached reads of the namespaces of a tenant (the current one
+    by default) once the transaction commits, so that no concurrent read
+    caches the rows being replaced. Nothing is dropped on a rollback.
+    """
+    teams_id = teams_id if teams_id is not None else current_teams_id()
+    if teams_id is None:
+        _logger.debug(f"No tenant to invalidate {namespaces}")
+        return
+    pending = db.session.info.setdefault(_PENDING_KEY, set())
+    pending.update((namespace, teams_id) for namespace in namespaces)
+
+
+@event.listens_for(db.session, "after_commit")
+def _apply_invalidations(session):
+    session.info.pop("teams_id", None)
+    for namespace, teams_id in session.info.pop(_PENDING_KEY, ()):
+        cache.set(_generation_key(namespace, teams_id), uuid.uuid4().hex, timeout=0)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard_invalidations(session, previous_transaction):
+    # A savepoint rollback keeps the writes of the outer transaction
+    if previous_transaction.parent is None:
+        session.info.pop("teams_id", None)
+        session.info.pop(_PENDING_KEY, None)
+
+
+def cache_stats():
+    """Hits, misses and bypasses by namespace, of this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    result = {}
+    for namespace in NAMESPACES:
+        hits = stats.get((namespace, "hits"), 0)
+        misses = stats.get((namespace, "misses"), 0)
+        result[namespace] = {
+            "hits": hits,
+            "misses": misses,
+            "bypass": stats.get((namespace, "bypass"), 0),
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+    return result
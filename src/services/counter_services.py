@@ -0,0 +1,326 @@
+"""Services for the per-profile click/comment/like counters."""
+
+import atexit
+import datetime
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt_claims
+from sqlalchemy import text
+
+from src import app, db
+from src.services import dispatch_services, groups_services, migration_services
+from src.utilities import date_util
+from src.v1.dto.event_type import EventType
+
+# Create module log
+_logger = logging.getLogger(__name__)
+
+COUNTER_COLUMNS = {
+    EventType.CLICK_ADS.value: "click_count",
+    EventType.COMMENT.value: "comment_count",
+    EventType.LIKE.value: "like_count",
+}
+# Clicks counted for the groups of the profile owner, by side of the event
+GROUP_CLICK_COLUMNS = {
+    "giver": "clicks_given",
+    "receiver": "clicks_received",
+}
+
+
+class CounterBuffer:
+    """
+    Accumulates counter deltas per profile so several increments become
+    a single UPDATE.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas = {}
+        self.created_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._deltas)
+
+    def add(self, profile_id, event_type, count=1, role=None):
+        with self._lock:
+            if not self._deltas:
+                self.created_at = time.monotonic()
+            deltas = self._deltas.setdefault(
+                profile_id,
+                {
+                    column: 0
+                    for column in [
+                        *COUNTER_COLUMNS.values(),
+                        *GROUP_CLICK_COLUMNS.values(),
+                    ]
+                },
+            )
+            column = COUNTER_COLUMNS.get(event_type)
+            if column:
+                deltas[column] += count
+            if event_type == EventType.CLICK_ADS.value and role in GROUP_CLICK_COLUMNS:
+                deltas[GROUP_CLICK_COLUMNS[role]] += count
+
+    def drain(self):
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+            self.created_at = time.monotonic()
+            return deltas
+
+    def merge(self, deltas, created_at=None):
+        """
+        Add back drained deltas, e.g. of a failed flush. An empty buffer
+        takes their created_at so they stay due.
+        """
+        with self._lock:
+            if not self._deltas and created_at is not None:
+                self.created_at = created_at
+            for profile_id, columns in deltas.items():
+                current = self._deltas.setdefault(profile_id, dict.fromkeys(columns, 0))
+                for column, delta in columns.items():
+                    current[column] = current.get(column, 0) + delta
+
+
+def local_today():
+    """Current day in the timezone the daily counters are reset in."""
+    return date_util.get_local_today(app.config["TEAMS_TIMEZONE"])
+
+
+def apply_deltas(deltas, teams_id=None, connection=None):
+    """
+    Apply {profile_id: {column: delta}} in one UPDATE, so concurrent
+    writers never lose increments. Counters still dated before today (the
+    daily reset has not reached the row yet) start again from zero.
+    The clicks given/received are then added to the groups of the owners.
+    Runs on the request session unless a connection is given, and must be
+    called with the team search path set.
+    """
+    if not deltas:
+        return []
+
+    params = {
+        "today": local_today(),
+        "now": datetime.datetime.utcnow(),
+    }
+    values = []
+    for index, (profile_id, columns) in enumerate(deltas.items()):
+        values.append(
+            f"(:profile_id_{index}, CAST(:click_{index} AS integer), "
+            f"CAST(:comment_{index} AS integer), CAST(:like_{index} AS integer))"
+        )
+        params[f"profile_id_{index}"] = profile_id
+        params[f"click_{index}"] = columns["click_count"]
+        params[f"comment_{index}"] = columns["comment_count"]
+        params[f"like_{index}"] = columns["like_count"]
+
+    statement = text(
+        f"""
+        UPDATE profiles AS p SET
+            click_count = CASE WHEN p.counters_date = :today
+                THEN COALESCE(p.click_count, 0) ELSE 0 END + d.click_count,
+            comment_count = CASE WHEN p.counters_date = :today
+                THEN COALESCE(p.comment_count, 0) ELSE 0 END + d.comment_count,
+            like_count = CASE WHEN p.counters_date = :today
+                THEN COALESCE(p.like_count, 0) ELSE 0 END + d.like_count,
+            today_post_count = CASE WHEN p.counters_date = :today
+                THEN p.today_post_count ELSE 0 END,
+            counters_date = :today,
+            modified_at = :now
+        FROM (VALUES {", ".join(values)})
+            AS d(profile_id, click_count, comment_count, like_count)
+        WHERE p.profile_id = d.profile_id
+        RETURNING p.profile_id, p.owner, p.main_profile, p.is_disable,
+            p.click_count, p.status, p.profile_data
+        """
+    )
+    rows = (connection or db.session).execute(statement, params).fetchall()
+    _logger.info(f"Update event count ok for {len(rows)} profiles")
+
+    owner_clicks = {}
+    for row in rows:
+        columns = deltas[row.profile_id]
+        given = columns.get("clicks_given", 0)
+        received = columns.get("clicks_received", 0)
+        if row.owner and (given or received):
+            clicks = owner_clicks.setdefault(row.owner, [0, 0])
+            clicks[0] += given
+            clicks[1] += received
+    groups_services.apply_click_deltas(owner_clicks, params["today"], connection)
+
+    if teams_id:
+        for row in rows:
+            dispatch_services.sync_profile(teams_id, SimpleNamespace(**row._mapping))
+    return rows
+
+
+def increment(profile_id, event_type, count=1, role=None):
+    """
+    Count an event for a profile, `role` being the side of the profile in
+    the event (giver or receiver). Depending on COUNTER_BUFFER_MODE the
+    increment is applied now, at the end of the request or when the
+    worker buffer is flushed.
+    """
+    mode = app.config["COUNTER_BUFFER_MODE"]
+    teams_id = get_jwt_claims()["teams_id"]
+    if mode == "request" and has_request_context():
+        if "counter_buffer" not in g:
+            g.counter_buffer = CounterBuffer()
+            g.counter_teams_id = teams_id
+        g.counter_buffer.add(profile_id, event_type, count, role)
+    elif mode == "worker":
+        _worker_buffer(teams_id).add(profile_id, event_type, count, role)
+        flush_worker_buffers()
+    else:
+        buffer = CounterBuffer()
+        buffer.add(profile_id, event_type, count, role)
+        apply_deltas(buffer.drain(), teams_id)
+
+
+def flush_request_buffer():
+    """Apply the increments buffered during the current request."""
+    if not has_request_context() or "counter_buffer" not in g:
+        return
+    buffer = g.pop("counter_buffer")
+    teams_id = g.pop("counter_teams_id")
+    apply_deltas(buffer.drain(), teams_id)
+
+
+_worker_buffers = {}
+_worker_lock = threading.Lock()
+_flusher = {"thread": None}
+
+
+def _worker_buffer(teams_id):
+    with _worker_lock:
+        _start_flusher()
+        if teams_id not in _worker_buffers:
+            _worker_buffers[teams_id] = CounterBuffer()
+        return _worker_buffers[teams_id]
+
+
+def _start_flusher():
+    """
+    Start the thread flushing the worker buffers as they age, once per
+    process: the threads of the uWSGI master do not survive the fork, the
+    first increment of each worker starts its own.
+    """
+    thread = _flusher["thread"]
+    if thread is not None and thread.is_alive():
+        return
+    thread = threading.Thread(
+        target=_flush_periodically, name="counter-flusher", daemon=True
+    )
+    _flusher["thread"] = thread
+    thread.start()
+
+
+def _flush_periodically():
+    # Half the interval: a buffer waits at most 1.5 COUNTER_FLUSH_INTERVAL
+    while _flusher["thread"] is threading.current_thread():
+        time.sleep(app.config["COUNTER_FLUSH_INTERVAL"] / 2)
+        try:
+            with app.app_context():
+                flush_worker_buffers()
+        except Exception as ex:
+            _logger.exception(ex)
+
+
+def flush_worker_buffers(force=False):
+    """
+    Apply the worker buffers that are full or older than
+    COUNTER_FLUSH_INTERVAL (all of them when forced), called on each
+    increment and by the flusher thread. Each tenant is
+    flushed on its own connection so the increments do not depend on the
+    outcome of the request that happened to trigger the flush. The
+    increments of a failed flush go back to the buffer.
+    """
+    with _worker_lock:
+        buffers = list(_worker_buffers.items())
+    for teams_id, buffer in buffers:
+        due = (
+            len(buffer) >= app.config["COUNTER_BUFFER_SIZE"]
+            or time.monotonic() - buffer.created_at
+            >= app.config["COUNTER_FLUSH_INTERVAL"]
+        )
+        if not len(buffer) or not (due or force):
+            continue
+        created_at = buffer.created_at
+        deltas = buffer.drain()
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    "SET search_path TO public, 'cs_" + str(teams_id) + "'"
+                )
+                apply_deltas(deltas, teams_id, connection)
+        except Exception as ex:
+            _logger.exception(ex)
+            # Retried by the next flush rather than lost
+            buffer.merge(deltas, created_at)
+
+
+atexit.register(flush_worker_buffers, force=True)
+
+
+def reset_daily_counters(teams_id, day=None, chunk_size=None):
+    """
+    Zero the daily counters of every profile not yet reset for `day`, in
+    chunks committed one by one. Rows already dated `day` are skipped, so
+    running it twice, or after a crash halfway, is safe.
+    Must be called with the team search path set, which is set again after
+    each chunk commit.
+    """
+    day = day or local_today()
+    chunk_size = chunk_size or app.config["COUNTER_RESET_CHUNK_SIZE"]
+    statement = text(
+        """
+        WITH due AS (
+            SELECT profile_id FROM profiles
+            WHERE counters_date IS NULL OR counters_date < :day
+            LIMIT :chunk_size
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE profiles AS p SET
+            click_count = 0,
+            comment_count = 0,
+            like_count = 0,
+            today_post_count = 0,
+            counters_date = :day
+        FROM due
+        WHERE p.profile_id = due.profile_id
+        """
+    )
+    pending = db.session.execute(
+        text(
+            "SELECT COUNT(*) FROM profiles "
+            "WHERE counters_date IS NULL OR counters_date < :day"
+        ),
+        {"day": day},
+    ).scalar()
+
+    reset = 0
+    chunks = 0
+    while True:
+        result = db.session.execute(
+            statement, {"day": day, "chunk_size": chunk_size}
+        )
+        db.session.commit()
+        # commit released the connection and the tenant of the session
+        migration_services.set_search_path(teams_id)
+        if not result.rowcount:
+            break
+        reset += result.rowcount
+        chunks += 1
+        _logger.info(f"Reset counters {teams_id} {day}: {reset}/{pending}")
+
+    dispatch_services.invalidate_pools(teams_id)
+    return {
+        "teams_id": teams_id,
+        "day": day.isoformat(),
+        "pending": pending,
+        "reset": reset,
+        "chunks": chunks,
+    }
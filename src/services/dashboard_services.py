@@ -1,159 +1,130 @@
-from sqlalchemy import func, cast, or_, Numeric, Text, select, text
-from src import db, app
-from src.models import User, Profiles
-
-
-def get_dashboard_data():
-    user_count = db.session.query(User).count()
-    profiles_count = db.session.query(Profiles).count()
+from sqlalchemy import text
+from src import db, app, cache
+from src.models import User, UserTeamsMapping
+
+# One pass over profiles, grouped by owner. The FILTER clauses keep the
+# predicates of the former per-user queries, on the typed status columns;
+# team_verified_profiles_count is the team-wide definition of a verified
+# profile.
+PROFILE_SUMMARY_QUERY = """
+    SELECT
+        p.owner,
+        COUNT(*) AS profiles_count,
+        COUNT(*) FILTER (
+            WHERE p.is_verified = TRUE
+            AND p.is_monetizable = FALSE
+            AND p.main_profile = FALSE
+            AND p.is_disable = FALSE
+        ) AS verified_profiles_count,
+        COUNT(*) FILTER (
+            WHERE p.is_verified = FALSE
+            AND p.is_disable = FALSE
+        ) AS unverified_profiles_count,
+        COUNT(*) FILTER (
+            WHERE p.account_status IN ('NotStarted', 'OK')
+            AND p.main_profile = TRUE
+            AND p.is_disable = FALSE
+        ) AS monetizable_profiles_count,
+        COUNT(*) FILTER (
+            WHERE p.account_status IN ('NotStarted', 'ERROR')
+            AND p.main_profile = FALSE
+            AND p.is_disable = FALSE
+        ) AS team_verified_profiles_count
+    FROM profiles p
+    GROUP BY p.owner
+"""
+
+PAYOUTS_QUERY = """
+    SELECT p.owner, SUM((value::numeric)) AS total_payout
+    FROM profiles p,
+    LATERAL json_array_elements_text(p.profile_data->'payouts') AS value
+    WHERE p.profile_data->'payouts' IS NOT NULL
+    AND json_array_length(p.profile_data->'payouts') > 1
+    GROUP BY p.owner
+"""
+
+
+def empty_summary():
+    return {
+        "profiles_count": 0,
+        "verified_profiles_count": 0,
+        "unverified_profiles_count": 0,
+        "monetizable_profiles_count": 0,
+        "total_earnings": 0,
+    }
 
-    verified_profiles_count = (
-        db.session.query(func.count(Profiles.username))
-        .filter(
-            Profiles.profile_data.isnot(None),
-            func.json_extract_path_text(Profiles.profile_data, "account_status").in_(
-                ["NotStarted", "ERROR"]
-            ),
-            Profiles.main_profile == False,
-            Profiles.is_disable == False,
-        )
-        .scalar()
-    )
 
-    unverified_profiles_count = (
-        db.session.query(func.count(Profiles.username))
-        .filter(
-            Profiles.profile_data.isnot(None),
-            cast(Profiles.profile_data["verify"], Text) == "false",
-            Profiles.is_disable == False,
-        )
-        .scalar()
-    )
+def get_summaries():
+    """
+    Summary of the profiles of every owner, {owner: summary}, from one
+    grouped count and one payouts aggregate.
+    """
+    summaries = {}
+    for row in db.session.execute(text(PROFILE_SUMMARY_QUERY)).fetchall():
+        summaries[row.owner] = {
+            "profiles_count": row.profiles_count,
+            "verified_profiles_count": row.verified_profiles_count,
+            "unverified_profiles_count": row.unverified_profiles_count,
+            "monetizable_profiles_count": row.monetizable_profiles_count,
+            "team_verified_profiles_count": row.team_verified_profiles_count,
+            "total_earnings": 0,
+        }
+    for row in db.session.execute(text(PAYOUTS_QUERY)).fetchall():
+        if row.owner in summaries and row.total_payout:
+            summaries[row.owner]["total_earnings"] = float(row.total_payout)
+    return summaries
 
-    monetizable_profiles_count = (
-        db.session.query(func.count(Profiles.username))
-        .filter(
-            Profiles.profile_data.isnot(None),
-            func.json_extract_path_text(Profiles.profile_data, "account_status").in_(
-                ["NotStarted", "OK"]
-            ),
-            Profiles.main_profile == True,
-            Profiles.is_disable == False,
-        )
-        .scalar()
-    )
 
-    # payout_elements = select(
-    #     [func.jsonb_array_elements(Profiles.profile_data["payouts"]).alias("element")]
-    # ).lateral("payout_elements")
+def _dashboard_cache_key(teams_id):
+    return f"dashboard:{teams_id}"
 
-    # Cast each element to float and sum them up
-    sql_query = """
-        SELECT SUM((value::numeric)) AS total_payout
-        FROM profiles p,
-        LATERAL json_array_elements_text(p.profile_data->'payouts') AS value
-        WHERE p.profile_data->'payouts' IS NOT NULL
-        AND json_array_length(p.profile_data->'payouts') > 1
-    """
 
-    # Execute the raw SQL query
-    result = db.session.execute(text(sql_query))
-    total_payouts = result.scalar()
+def get_dashboard_data(teams_id):
+    """Dashboard of a team, cached per team for DASHBOARD_CACHE_TTL."""
+    cache_key = _dashboard_cache_key(teams_id)
+    response_data = cache.get(cache_key)
+    if response_data is not None:
+        return response_data
 
-    users = User.query.filter_by().all()
-    summaries = []
+    summaries = get_summaries()
+    users = (
+        db.session.query(User.user_id, User.username)
+        .join(UserTeamsMapping, UserTeamsMapping.user_id == User.user_id)
+        .filter(UserTeamsMapping.teams_id == teams_id)
+        .all()
+    )
+    user_summaries = []
     for user in users:
-        user_summary = get_summary(user.user_id)
+        user_summary = empty_summary()
+        user_summary.update(
+            {
+                key: value
+                for key, value in summaries.get(user.user_id, {}).items()
+                if key in user_summary
+            }
+        )
         user_summary["username"] = user.username
-        summaries.append(user_summary)
+        user_summaries.append(user_summary)
 
     sorted_data = sorted(
-        summaries, key=lambda x: x["verified_profiles_count"], reverse=True
+        user_summaries, key=lambda x: x["verified_profiles_count"], reverse=True
     )
+    totals = summaries.values()
     response_data = {
-        "user_count": user_count,
-        "profiles_count": profiles_count,
-        "verified_profiles_count": verified_profiles_count,
-        "unverified_profiles_count": unverified_profiles_count,
-        "monetizable_profiles_count": monetizable_profiles_count,
-        "total_earnings": float(total_payouts),
+        "user_count": len(users),
+        "profiles_count": sum(item["profiles_count"] for item in totals),
+        "verified_profiles_count": sum(
+            item["team_verified_profiles_count"] for item in totals
+        ),
+        "unverified_profiles_count": sum(
+            item["unverified_profiles_count"] for item in totals
+        ),
+        "monetizable_profiles_count": sum(
+            item["monetizable_profiles_count"] for item in totals
+        ),
+        "total_earnings": sum(item["total_earnings"] for item in totals),
         "summaries": sorted_data,
     }
+    cache.set(cache_key, response_data, timeout=app.config["DASHBOARD_CACHE_TTL"])
     return response_data
 
-
-def get_summary(user_id):
-    profiles_count = (
-        db.session.query(Profiles)
-        .filter(
-            Profiles.owner == user_id,
-        )
-        .count()
-    )
-    if profiles_count == 0:
-        return {
-            "profiles_count": profiles_count,
-            "verified_profiles_count": 0,
-            "unverified_profiles_count": 0,
-            "monetizable_profiles_count": 0,
-            "total_earnings": 0,
-        }
-
-    verified_profiles_count = (
-        db.session.query(func.count(Profiles.username))
-        .filter(
-            Profiles.owner == user_id,
-            Profiles.profile_data.isnot(None),
-            cast(Profiles.profile_data["verify"], Text) == "true",
-            cast(Profiles.profile_data["monetizable"], Text) == "false",
-            Profiles.main_profile == False,
-            Profiles.is_disable == False,
-        )
-        .scalar()
-    )
-
-    unverified_profiles_count = (
-        db.session.query(func.count(Profiles.username))
-        .filter(
-            Profiles.owner == user_id,
-            Profiles.profile_data.isnot(None),
-            cast(Profiles.profile_data["verify"], Text) == "false",
-            Profiles.is_disable == False,
-        )
-        .scalar()
-    )
-
-    monetizable_profiles_count = (
-        db.session.query(func.count(Profiles.username))
-        .filter(
-            Profiles.owner == user_id,
-            Profiles.profile_data.isnot(None),
-            func.json_extract_path_text(Profiles.profile_data, "account_status").in_(
-                ["NotStarted", "OK"]
-            ),
-            Profiles.main_profile == True,
-            Profiles.is_disable == False,
-        )
-        .scalar()
-    )
-
-    sql_query = f"""
-        SELECT SUM((value::numeric)) AS total_payout
-        FROM profiles p,
-        LATERAL json_array_elements_text(p.profile_data->'payouts') AS value
-        WHERE p.profile_data->'payouts' IS NOT NULL
-        AND json_array_length(p.profile_data->'payouts') > 1
-        AND p."owner" = '{user_id}'
-    """
-
-    # Execute the raw SQL query
-    result = db.session.execute(text(sql_query))
-    total_payouts = result.scalar()
-
-    return {
-        "profiles_count": profiles_count,
-        "verified_profiles_count": verified_profiles_count,
-        "unverified_profiles_count": unverified_profiles_count,
-        "monetizable_profiles_count": monetizable_profiles_count,
-        "total_earnings": float(total_payouts) if total_payouts else 0,
-    }
@@ -0,0 +1,330 @@
+"""Services for dispatching receiver/giver pairs from precomputed pools."""
+
+import logging
+import random
+import threading
+import time
+
+import redis
+
+from src import app, db
+from src.models import Profiles
+
+# Create module log
+_logger = logging.getLogger(__name__)
+
+daily_limits = {"clickAds": 300}
+
+RECEIVER_POOL = "receivers"
+GIVER_POOL = "givers"
+ALL_OWNERS = "all"
+
+
+def _pool_key(teams_id, event_type, pool, owner=ALL_OWNERS):
+    return f"dispatch:{teams_id}:{event_type}:{pool}:{owner}"
+
+
+def _keys_index(teams_id):
+    return f"dispatch:{teams_id}:keys"
+
+
+def _fresh_key(teams_id):
+    return f"dispatch:{teams_id}:fresh"
+
+
+class MemoryPoolStore:
+    """
+    Per-process pool store. Every set is kept as a list plus a position
+    index so add, remove and sample are O(1) per member.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._members = {}
+        self._positions = {}
+        self._expires = {}
+
+    def _add(self, key, member):
+        positions = self._positions.setdefault(key, {})
+        if member in positions:
+            return
+        members = self._members.setdefault(key, [])
+        positions[member] = len(members)
+        members.append(member)
+
+    def _remove(self, key, member):
+        positions = self._positions.get(key, {})
+        index = positions.pop(member, None)
+        if index is None:
+            return
+        members = self._members[key]
+        last = members.pop()
+        if index < len(members):
+            members[index] = last
+            positions[last] = index
+
+    def add(self, keys, member):
+        with self._lock:
+            for key in keys:
+                self._add(key, member)
+
+    def remove(self, keys, member):
+        with self._lock:
+            for key in keys:
+                self._remove(key, member)
+
+    def sample(self, key, count):
+        with self._lock:
+            members = self._members.get(key, [])
+            return random.sample(members, min(count, len(members)))
+
+    def replace(self, teams_id, pools, ttl):
+        with self._lock:
+            prefix = f"dispatch:{teams_id}:"
+            for key in [key for key in self._members if key.startswith(prefix)]:
+                del self._members[key]
+                del self._positions[key]
+            for key, members in pools.items():
+                for member in members:
+                    self._add(key, member)
+            self._expires[teams_id] = time.monotonic() + ttl
+
+    def is_fresh(self, teams_id):
+        with self._lock:
+            return self._expires.get(teams_id, 0) > time.monotonic()
+
+    def invalidate(self, teams_id):
+        with self._lock:
+            self._expires.pop(teams_id, None)
+
+
+class RedisPoolStore:
+    """
+    Pool store shared by every worker process. Pools are Redis sets so
+    SRANDMEMBER hands out members in O(count).
+    """
+
+    def __init__(self, url):
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def add(self, keys, member):
+        pipe = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipe.sadd(key, member)
+        pipe.execute()
+
+    def remove(self, keys, member):
+        pipe = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipe.srem(key, member)
+        pipe.execute()
+
+    def sample(self, key, count):
+        if count <= 0:
+            return []
+        return self._client.srandmember(key, count)
+
+    def replace(self, teams_id, pools, ttl):
+        index_key = _keys_index(teams_id)
+        old_keys = self._client.smembers(index_key)
+        pipe = self._client.pipeline(transaction=True)
+        if old_keys:
+            pipe.delete(*old_keys)
+        pipe.delete(index_key)
+        for key, members in pools.items():
+            if members:
+                pipe.sadd(key, *members)
+                pipe.sadd(index_key, key)
+        pipe.set(_fresh_key(teams_id), 1, ex=ttl)
+        pipe.execute()
+
+    def is_fresh(self, teams_id):
+        return bool(self._client.exists(_fresh_key(teams_id)))
+
+    def invalidate(self, teams_id):
+        self._client.delete(_fresh_key(teams_id))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the pool store configured by DISPATCH_POOL_BACKEND."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if app.config["DISPATCH_POOL_BACKEND"] == "redis":
+                    _store = RedisPoolStore(app.config["CACHE_REDIS_URL"])
+                else:
+                    _store = MemoryPoolStore()
+    return _store
+
+
+def is_receiver(profile, event_type):
+    """Check a profile against the receiver predicates of the SQL path."""
+    return bool(
+        profile.main_profile is True
+        and profile.is_disable is False
+        and profile.click_count is not None
+        and profile.click_count < daily_limits[event_type]
+    )
+
+
+def is_giver(profile, event_type):
+    """
+    Check a profile against the giver predicates of the SQL path. Reads
+    profile_data: the is_verified/is_suspended columns are set by a
+    trigger and are stale on an ORM object until it is reloaded.
+    """
+    profile_data = profile.profile_data or {}
+    return bool(
+        profile.main_profile is False
+        and profile.is_disable is False
+        and profile.click_count is not None
+        and profile.click_count < daily_limits[event_type]
+        and profile_data.get("verify") is True
+        and profile_data.get("suspended") is False
+        and profile.status != "Wrong password"
+    )
+
+
+def build_pools(teams_id):
+    """
+    Rebuild every pool of the team from one scan of the profiles table.
+    Must be called with the team search path set.
+    """
+    pools = {}
+    for event_type, limit in daily_limits.items():
+        receivers = (
+            db.session.query(Profiles.profile_id, Profiles.owner)
+            .filter(
+                Profiles.click_count < limit,
+                Profiles.main_profile == True,
+                Profiles.is_disable == False,
+            )
+            .all()
+        )
+        givers = (
+            db.session.query(Profiles.profile_id, Profiles.owner)
+            .filter(
+                Profiles.click_count < limit,
+                Profiles.main_profile == False,
+                Profiles.is_disable == False,
+                Profiles.is_verified == True,
+                Profiles.is_suspended == False,
+                Profiles.status != "Wrong password",
+            )
+            .all()
+        )
+        for row in receivers:
+            for owner in (ALL_OWNERS, row.owner):
+                key = _pool_key(teams_id, event_type, RECEIVER_POOL, owner)
+                pools.setdefault(key, []).append(row.profile_id)
+        for row in givers:
+            key = _pool_key(teams_id, event_type, GIVER_POOL, row.owner)
+            pools.setdefault(key, []).append(row.profile_id)
+
+    get_store().replace(teams_id, pools, app.config["DISPATCH_POOL_TTL"])
+    _logger.info(f"Dispatch pools rebuilt for {teams_id}: {len(pools)} pools")
+
+
+def ensure_pools(teams_id):
+    """Rebuild the team pools when they are missing or past their TTL."""
+    if not get_store().is_fresh(teams_id):
+        build_pools(teams_id)
+
+
+def invalidate_pools(teams_id):
+    """Force a rebuild on the next poll, e.g. after the daily counter reset."""
+    if not app.config["DISPATCH_POOL_ENABLED"]:
+        return
+    try:
+        get_store().invalidate(teams_id)
+    except Exception as ex:
+        _logger.exception(ex)
+
+
+def sync_profile(teams_id, profile, previous_owner=None):
+    """
+    Add or remove a single profile from the team pools after it changed.
+    Called on event ingestion and on profile create/update/delete.
+    """
+    if not app.config["DISPATCH_POOL_ENABLED"]:
+        return
+    try:
+        store = get_store()
+        if previous_owner and previous_owner != profile.owner:
+            store.remove(
+                [
+                    _pool_key(teams_id, event_type, pool, previous_owner)
+                    for event_type in daily_limits
+                    for pool in (RECEIVER_POOL, GIVER_POOL)
+                ],
+                profile.profile_id,
+            )
+
+        for event_type in daily_limits:
+            receiver_keys = [
+                _pool_key(teams_id, event_type, RECEIVER_POOL, ALL_OWNERS),
+                _pool_key(teams_id, event_type, RECEIVER_POOL, profile.owner),
+            ]
+            giver_keys = [_pool_key(teams_id, event_type, GIVER_POOL, profile.owner)]
+            if is_receiver(profile, event_type):
+                store.add(receiver_keys, profile.profile_id)
+            else:
+                store.remove(receiver_keys, profile.profile_id)
+            if is_giver(profile, event_type):
+                store.add(giver_keys, profile.profile_id)
+            else:
+                store.remove(giver_keys, profile.profile_id)
+    except Exception as ex:
+        # The pools are rebuilt on TTL expiry, a failed update only delays it
+        _logger.exception(ex)
+
+
+def get_receivers(teams_id, event_type, threads, owner_ids=None):
+    """Hand out up to `threads` receivers, optionally limited to some owners."""
+    store = get_store()
+    if owner_ids is None:
+        return store.sample(
+            _pool_key(teams_id, event_type, RECEIVER_POOL, ALL_OWNERS), threads
+        )
+
+    receivers = []
+    for owner_id in owner_ids:
+        remaining = threads - len(receivers)
+        if remaining <= 0:
+            break
+        receivers.extend(
+            store.sample(
+                _pool_key(teams_id, event_type, RECEIVER_POOL, owner_id), remaining
+            )
+        )
+    random.shuffle(receivers)
+    return receivers
+
+
+def get_givers(teams_id, event_type, owner_id, threads, exclude_ids=()):
+    """Hand out up to `threads` givers owned by the polling user."""
+    exclude_ids = set(exclude_ids)
+    givers = get_store().sample(
+        _pool_key(teams_id, event_type, GIVER_POOL, owner_id),
+        threads + len(exclude_ids),
+    )
+    return [giver for giver in givers if giver not in exclude_ids][:threads]
+
+
+def get_dispatch_pairs(teams_id, event_type, owner_id, threads, receiver_owner_ids=None):
+    """
+    Replacement for get_profile_with_event_count_below_limit_v2 plus
+    find_unique_interaction_partner_v2 that never scans the profiles table
+    on the hot path.
+    """
+    ensure_pools(teams_id)
+    receivers = get_receivers(teams_id, event_type, threads, receiver_owner_ids)
+    if not receivers:
+        return [], []
+    givers = get_givers(teams_id, event_type, owner_id, threads, receivers)
+    return receivers, givers
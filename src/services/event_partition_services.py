@@ -0,0 +1,235 @@
+"""Services for the daily partitions of events and their rollup."""
+
+import datetime
+import logging
+import re
+
+from sqlalchemy import text
+
+from src import app, db
+
+# Create module log
+_logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^events_(\d{8})$")
+# Partition of the events recorded before events was partitioned (from
+# MINVALUE to the day of the migration)
+ARCHIVE_PARTITION = "events_archive"
+PARTITION_END = re.compile(r"TO \('([^']+)'\)")
+
+
+def day_bounds(day):
+    """
+    Start and end of a partition. Filtering created_at on this range
+    (instead of DATE(created_at) = day) lets postgres scan one partition.
+    """
+    start = datetime.datetime(day.year, day.month, day.day)
+    return start, start + datetime.timedelta(days=1)
+
+
+def today_bounds():
+    return day_bounds(datetime.datetime.utcnow().date())
+
+
+def partition_name(day):
+    return f"events_{day:%Y%m%d}"
+
+
+def create_partition(day):
+    """Create the partition of `day` and its indexes if missing."""
+    name = partition_name(day)
+    start, end = day_bounds(day)
+    db.session.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF events "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    # postgres 10 cannot index the partitioned table itself
+    db.session.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_event_id_idx ON {name} (event_id)"
+    )
+    db.session.execute(
+        f"CREATE INDEX IF NOT EXISTS {name}_profile_id_idx "
+        f"ON {name} (profile_id, event_type, created_at)"
+    )
+    db.session.execute(
+        f"CREATE INDEX IF NOT EXISTS {name}_profile_id_interact_idx "
+        f"ON {name} (profile_id_interact, event_type, created_at)"
+    )
+    db.session.execute(
+        f"CREATE INDEX IF NOT EXISTS {name}_created_at_idx ON {name} (created_at)"
+    )
+    return name
+
+
+def ensure_partitions(days_ahead=None):
+    """Create the partitions from today to EVENTS_PARTITION_DAYS_AHEAD days."""
+    if days_ahead is None:
+        days_ahead = app.config["EVENTS_PARTITION_DAYS_AHEAD"]
+    today = datetime.datetime.utcnow().date()
+    return [
+        create_partition(today + datetime.timedelta(days=offset))
+        for offset in range(days_ahead + 1)
+    ]
+
+
+def get_partitions(teams_id):
+    """(name, day) of the daily partitions attached to events."""
+    rows = db.session.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            JOIN pg_namespace n ON n.oid = parent.relnamespace
+            WHERE parent.relname = 'events' AND n.nspname = :schema
+            """
+        ),
+        {"schema": "cs_" + str(teams_id)},
+    ).fetchall()
+    partitions = []
+    for row in rows:
+        match = PARTITION_NAME.match(row.relname)
+        if match:
+            day = datetime.datetime.strptime(match.group(1), "%Y%m%d").date()
+            partitions.append((row.relname, day))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def get_archive_end(teams_id):
+    """Upper bound (exclusive day) of the attached archive partition or None."""
+    bound = db.session.execute(
+        text(
+            """
+            SELECT pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            JOIN pg_namespace n ON n.oid = parent.relnamespace
+            WHERE parent.relname = 'events' AND n.nspname = :schema
+            AND child.relname = :archive
+            """
+        ),
+        {"schema": "cs_" + str(teams_id), "archive": ARCHIVE_PARTITION},
+    ).scalar()
+    match = PARTITION_END.search(bound or "")
+    if not match:
+        return None
+    return datetime.datetime.fromisoformat(match.group(1)).date()
+
+
+def rollup_day(day):
+    """
+    Recompute the daily_profile_event_stats rows of `day` from its
+    partition. Idempotent, the counts are replaced and not added.
+    """
+    start, end = day_bounds(day)
+    result = db.session.execute(
+        text(
+            """
+            INSERT INTO daily_profile_event_stats
+                (profile_id, event_type, day, received_count, given_count)
+            SELECT profile_id, event_type, :day, SUM(received), SUM(given)
+            FROM (
+                SELECT profile_id, event_type, 1 AS received, 0 AS given
+                FROM events
+                WHERE created_at >= :start AND created_at < :end
+                AND issue = 'OK' AND event_type IS NOT NULL
+                UNION ALL
+                SELECT profile_id_interact, event_type, 0, 1
+                FROM events
+                WHERE created_at >= :start AND created_at < :end
+                AND issue = 'OK' AND event_type IS NOT NULL
+                AND profile_id_interact IS NOT NULL
+            ) AS s
+            GROUP BY profile_id, event_type
+            ON CONFLICT (profile_id, event_type, day) DO UPDATE SET
+                received_count = EXCLUDED.received_count,
+                given_count = EXCLUDED.given_count
+            """
+        ),
+        {"day": day, "start": start, "end": end},
+    )
+    return result.rowcount
+
+
+def rollup_archive():
+    """
+    Recompute the daily_profile_event_stats rows of every day of the
+    archive partition, e.g. of events bulk-loaded there since the
+    migration.
+    """
+    result = db.session.execute(
+        text(
+            f"""
+            INSERT INTO daily_profile_event_stats
+                (profile_id, event_type, day, received_count, given_count)
+            SELECT profile_id, event_type, day, SUM(received), SUM(given)
+            FROM (
+                SELECT profile_id, event_type, DATE(created_at) AS day,
+                    1 AS received, 0 AS given
+                FROM {ARCHIVE_PARTITION}
+                WHERE issue = 'OK' AND event_type IS NOT NULL
+                UNION ALL
+                SELECT profile_id_interact, event_type, DATE(created_at), 0, 1
+                FROM {ARCHIVE_PARTITION}
+                WHERE issue = 'OK' AND event_type IS NOT NULL
+                AND profile_id_interact IS NOT NULL
+            ) AS s
+            GROUP BY profile_id, event_type, day
+            ON CONFLICT (profile_id, event_type, day) DO UPDATE SET
+                received_count = EXCLUDED.received_count,
+                given_count = EXCLUDED.given_count
+            """
+        )
+    )
+    return result.rowcount
+
+
+def detach_partitions(teams_id, retention_days=None):
+    """
+    Detach the partitions older than EVENTS_PARTITION_RETENTION_DAYS (0
+    keeps them all) after a last rollup, the archive partition once all
+    its days are. Detached partitions stay as plain tables, to be archived
+    (pg_dump) and dropped.
+    """
+    if retention_days is None:
+        retention_days = app.config["EVENTS_PARTITION_RETENTION_DAYS"]
+    if not retention_days:
+        return []
+    cutoff = datetime.datetime.utcnow().date() - datetime.timedelta(
+        days=retention_days
+    )
+    detached = []
+    archive_end = get_archive_end(teams_id)
+    if archive_end is not None and archive_end <= cutoff:
+        rollup_archive()
+        db.session.execute(f"ALTER TABLE events DETACH PARTITION {ARCHIVE_PARTITION}")
+        detached.append(ARCHIVE_PARTITION)
+        _logger.info(f"Detached events partition {teams_id} {ARCHIVE_PARTITION}")
+    for name, day in get_partitions(teams_id):
+        if day >= cutoff:
+            break
+        rollup_day(day)
+        db.session.execute(f"ALTER TABLE events DETACH PARTITION {name}")
+        detached.append(name)
+        _logger.info(f"Detached events partition {teams_id} {name}")
+    return detached
+
+
+def maintain_partitions(teams_id):
+    """
+    Create the partitions ahead, refresh the rollup of yesterday and today
+    and detach the expired partitions. Must be called with the team search
+    path set.
+    """
+    today = datetime.datetime.utcnow().date()
+    created = ensure_partitions()
+    rolled_up = rollup_day(today - datetime.timedelta(days=1)) + rollup_day(today)
+    detached = detach_partitions(teams_id)
+    return {
+        "teams_id": teams_id,
+        "partitions": len(created),
+        "rolled_up": rolled_up,
+        "detached": detached,
+    }
@@ -1,13 +1,11 @@
-import datetime
-import math
-
 from sqlalchemy import text, or_, func
 
 from src import db, app
 from src.models import Profiles, Events
 from sqlalchemy.orm import aliased
-from src.v1.dto.event_type import EventType
-from src.log_config import _logger
+from src.services import counter_services, event_partition_services
+from src.utilities import pagination_util
+from src.utilities.model_helper import repr_loader_options
 
 
 def get_event_by_id(event_id):
@@ -27,11 +25,19 @@ def get_all_events(
     user_id="",
     receiver_username="",
     giver_username="",
+    cursor=None,
+    count=None,
+    teams_id=None,
 ):
+    """
+    Today's events, by page or, with a cursor, by keyset on
+    (created_at, event_id). See pagination_util.paginate for cursor and
+    count.
+    """
     # Aliases for Profiles table for giver and receiver
     giver_profile = aliased(Profiles)
     receiver_profile = aliased(Profiles)
-    today_date = datetime.datetime.utcnow().date()
+    today_start, today_end = event_partition_services.today_bounds()
     # Specify the column from Events for sorting
     if sort_by == "created_at":
         column = Events.created_at
@@ -44,11 +50,14 @@ def get_all_events(
     sorting_order = f"{column} {sort_order}"
     query = (
         db.session.query(Events)
+        .options(*repr_loader_options(Events))
         .join(giver_profile, Events.profile_id_interact == giver_profile.profile_id)
         .join(receiver_profile, Events.profile_id == receiver_profile.profile_id)
     )
 
-    query = query.filter(db.func.date(Events.created_at) == today_date)
+    query = query.filter(
+        Events.created_at >= today_start, Events.created_at < today_end
+    )
     query = query.filter(Events.issue == "OK")
     # Apply sorting
     if sorting_order:
@@ -81,22 +90,21 @@ def get_all_events(
         )
 
     # Apply pagination
-    count = query.count()
-    if per_page:
-        query = query.limit(per_page)
-    if page:
-        query = query.offset(per_page * (page - 1))
-
-    events = query.all()
+    events, details = pagination_util.paginate(
+        query,
+        page,
+        per_page,
+        cursor=cursor,
+        count=count,
+        keyset=[Events.created_at, Events.event_id],
+        sort_order=sort_order,
+        scope=teams_id,
+    )
 
     # Formatting the result
     formatted_result = [event.repr_name() for event in events]
 
-    return {
-        "data": formatted_result,
-        "result_count": count,
-        "max_pages": math.ceil(count / per_page),
-    }
+    return {"data": formatted_result, **details}
 
 
 def create_or_update_event(event_id, event_data):
@@ -119,8 +127,8 @@ def create_or_update_event(event_id, event_data):
         issue = event_data.get("issue")
 
         if issue == "OK":
-            update_count(profile_id_receiver, event_type)
-            update_count(profile_id_giver, event_type)
+            counter_services.increment(profile_id_receiver, event_type, role="receiver")
+            counter_services.increment(profile_id_giver, event_type, role="giver")
 
         for key, val in event_data.items():
             if hasattr(event_record, key):
@@ -132,44 +140,83 @@ def create_or_update_event(event_id, event_data):
     return event_record
 
 
-def update_count(profile_id, event_type):
-    profile_receiver = Profiles.query.filter(Profiles.profile_id == profile_id).first()
-    today = datetime.datetime.utcnow().date()
-    _logger.info(
-        f"Today is {today}  and profile date {profile_receiver.modified_at.date()}"
-    )
-    if today != profile_receiver.modified_at.date():
-        print(
-            f"Today is {today}  and profile date {profile_receiver.modified_at.date()}"
+def bulk_create_events(events_data, teams_id):
+    """
+    Validate and insert a batch of events with one multi-row INSERT, then
+    apply the counter deltas of every OK event with one UPDATE.
+    Invalid items are skipped and reported by their index in the batch.
+    """
+    errors = []
+    candidates = []
+    for index, event_data in enumerate(events_data):
+        if not isinstance(event_data, dict):
+            errors.append({"index": index, "message": "event must be an object"})
+            continue
+        missing = [
+            key
+            for key in ("event_type", "profile_id", "profile_id_interact")
+            if not event_data.get(key)
+        ]
+        if missing:
+            errors.append(
+                {"index": index, "message": f"{', '.join(missing)} is required"}
+            )
+            continue
+        candidates.append((index, event_data))
+
+    profile_ids = set()
+    for _, event_data in candidates:
+        profile_ids.add(event_data["profile_id"])
+        profile_ids.add(event_data["profile_id_interact"])
+    known_ids = set()
+    if profile_ids:
+        known_ids = {
+            row.profile_id
+            for row in db.session.query(Profiles.profile_id)
+            .filter(Profiles.profile_id.in_(profile_ids))
+            .all()
+        }
+
+    rows = []
+    counters = counter_services.CounterBuffer()
+    for index, event_data in candidates:
+        unknown = [
+            event_data[key]
+            for key in ("profile_id", "profile_id_interact")
+            if event_data[key] not in known_ids
+        ]
+        if unknown:
+            errors.append(
+                {"index": index, "message": f"profile not found {', '.join(unknown)}"}
+            )
+            continue
+        rows.append(
+            {
+                "event_type": event_data["event_type"],
+                "profile_id": event_data["profile_id"],
+                "profile_id_interact": event_data["profile_id_interact"],
+                "schedule_id": event_data.get("schedule_id") or None,
+                "mission_id": event_data.get("mission_id") or None,
+                "user_id": event_data.get("user_id") or None,
+                "issue": event_data.get("issue"),
+            }
         )
-        profile_receiver.click_count = 0
-        profile_receiver.comment_count = 0
-        profile_receiver.like_count = 0
+        if event_data.get("issue") == "OK":
+            counters.add(
+                event_data["profile_id"], event_data["event_type"], role="receiver"
+            )
+            counters.add(
+                event_data["profile_id_interact"],
+                event_data["event_type"],
+                role="giver",
+            )
+
+    if rows:
+        db.session.execute(Events.__table__.insert().values(rows))
+        counter_services.apply_deltas(counters.drain(), teams_id)
         db.session.flush()
 
-    click_count = profile_receiver.click_count
-    comment_count = profile_receiver.comment_count
-    like_count = profile_receiver.like_count
-
-    # update event count for profile
-    if event_type == EventType.CLICK_ADS.value:
-        if not click_count:
-            click_count = 0
-        click_count += 1
-        profile_receiver.click_count = click_count
-    elif event_type == EventType.COMMENT.value:
-        if not comment_count:
-            comment_count = 0
-        comment_count += 1
-        profile_receiver.comment_count = comment_count
-    elif event_type == EventType.LIKE.value:
-        if not like_count:
-            like_count = 0
-        like_count += 1
-        profile_receiver.like_count = like_count
-    profile_receiver.modified_at = datetime.datetime.utcnow()
-    _logger.info("Update event count ok")
-    db.session.flush()
+    return {"inserted": len(rows), "errors": errors}
 
 
 def delete_event(event_id):
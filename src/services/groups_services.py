@@ -2,11 +2,12 @@
 
 import logging
 
-from sqlalchemy import func
+from sqlalchemy import func, text
 
 from src import db, app
 from src.models.groups import Groups
-from src.views.groups import GroupViews
+from src.services import cache_services
+from src.utilities import date_util
 
 # Create module log
 _logger = logging.getLogger(__name__)
@@ -19,6 +20,7 @@ def create_group(data):
             new_group.__setattr__(key, val)
     db.session.add(new_group)
     db.session.flush()
+    cache_services.invalidate(cache_services.GROUPS)
     return new_group
 
 
@@ -26,6 +28,9 @@ def get_group_by_id(group_id):
     return Groups.query.filter_by(group_id=group_id).first()
 
 
+@cache_services.tenant_cached(
+    cache_services.GROUPS, timeout_config="TENANT_CACHE_COUNTERS_TTL"
+)
 def get_all_groups():
     groups = db.session.query(Groups).order_by(db.text("group_name asc")).all()
     groups = [group.repr_name() for group in groups]
@@ -39,6 +44,7 @@ def update_group(group_id, data):
             if hasattr(group, key):
                 group.__setattr__(key, val)
         db.session.flush()
+        cache_services.invalidate(cache_services.GROUPS)
         return group
     return None  # Or handle the case where the group is not found
 
@@ -48,14 +54,18 @@ def delete_group(group_id):
     if group:
         db.session.delete(group)
         db.session.flush()
+        cache_services.invalidate(cache_services.GROUPS)
         return True
     return False  # Or handle the case where the group is not found
 
 
 def get_group_below_threshold():
+    # Counts dated before today were not reset yet and are worth zero
+    today = date_util.get_local_today(app.config["TEAMS_TIMEZONE"])
     group = (
         Groups.query.filter(
             Groups.group_id == "4f712930-bb96-4aab-9a98-80794612e193",
+            Groups.counters_date == today,
             Groups.click_count > Groups.receiver_count,
         )
         .first()
@@ -64,6 +74,7 @@ def get_group_below_threshold():
     if not group:
         group = (
             Groups.query.filter(
+                Groups.counters_date == today,
                 Groups.click_count > Groups.receiver_count,
             )
             .order_by(func.random())
@@ -71,3 +82,134 @@ def get_group_below_threshold():
         )
 
     return group
+
+
+def apply_click_deltas(owner_clicks, today, connection=None):
+    """
+    Add {owner user_id: (clicks given, clicks received)} to the daily click
+    counts of the groups of each owner in one UPDATE. Counts dated before
+    `today` start again from zero.
+    """
+    if not owner_clicks:
+        return
+
+    params = {"today": today}
+    values = []
+    for index, (user_id, (given, received)) in enumerate(owner_clicks.items()):
+        values.append(
+            f"(:user_id_{index}, CAST(:given_{index} AS integer), "
+            f"CAST(:received_{index} AS integer))"
+        )
+        params[f"user_id_{index}"] = user_id
+        params[f"given_{index}"] = given
+        params[f"received_{index}"] = received
+
+    statement = text(
+        f"""
+        UPDATE groups AS g SET
+            click_count = CASE WHEN g.counters_date = :today
+                THEN COALESCE(g.click_count, 0) ELSE 0 END + d.given,
+            receiver_count = CASE WHEN g.counters_date = :today
+                THEN COALESCE(g.receiver_count, 0) ELSE 0 END + d.received,
+            counters_date = :today
+        FROM (
+            SELECT ug.group_id, SUM(v.given) AS given, SUM(v.received) AS received
+            FROM (VALUES {", ".join(values)}) AS v(user_id, given, received)
+            JOIN user_group ug ON ug.user_id = v.user_id
+            GROUP BY ug.group_id
+        ) AS d
+        WHERE g.group_id = d.group_id
+        """
+    )
+    (connection or db.session).execute(statement, params)
+
+
+def refresh_profile_counts(owner_ids=None, group_ids=None):
+    """
+    Recount the giver and receiver profiles of the given groups and of the
+    groups the owners belong to (of every group when neither is given).
+    """
+    params = {}
+    scope = ""
+    if owner_ids is not None or group_ids is not None:
+        params["owner_ids"] = [owner_id for owner_id in owner_ids or [] if owner_id]
+        params["group_ids"] = list(group_ids or [])
+        if not params["owner_ids"] and not params["group_ids"]:
+            return
+        scope = (
+            "WHERE gr.group_id = ANY(:group_ids) OR gr.group_id IN "
+            "(SELECT group_id FROM user_group WHERE user_id = ANY(:owner_ids))"
+        )
+
+    statement = text(
+        f"""
+        UPDATE groups AS g SET
+            profile_giver_count = c.givers,
+            profile_receiver_count = c.receivers
+        FROM (
+            SELECT gr.group_id,
+                COUNT(p.profile_id) FILTER (
+                    WHERE p.main_profile = FALSE
+                    AND p.is_verified = TRUE
+                    AND p.is_suspended = FALSE
+                ) AS givers,
+                COUNT(p.profile_id) FILTER (WHERE p.main_profile = TRUE) AS receivers
+            FROM groups gr
+            LEFT JOIN user_group ug ON ug.group_id = gr.group_id
+            LEFT JOIN profiles p ON p.owner = ug.user_id AND p.is_disable = FALSE
+            {scope}
+            GROUP BY gr.group_id
+        ) AS c
+        WHERE g.group_id = c.group_id
+        AND (g.profile_giver_count, g.profile_receiver_count)
+            IS DISTINCT FROM (c.givers, c.receivers)
+        """
+    )
+    db.session.execute(statement, params)
+    cache_services.invalidate(cache_services.GROUPS)
+
+
+def reconcile_click_counts(today):
+    """
+    Recompute the daily click counts of every group from today's events,
+    correcting the drift of the incremental counts (e.g. after users
+    moved between groups). Only the groups whose counts changed are written.
+    """
+    start, end = date_util.get_utc_day_bounds(today, app.config["TEAMS_TIMEZONE"])
+    statement = text(
+        """
+        UPDATE groups AS g SET
+            click_count = COALESCE(c.given, 0),
+            receiver_count = COALESCE(c.received, 0),
+            counters_date = :today
+        FROM groups AS g2
+        LEFT JOIN (
+            SELECT ug.group_id,
+                COUNT(*) FILTER (WHERE p.profile_id = e.profile_id_interact) AS given,
+                COUNT(*) FILTER (WHERE p.profile_id = e.profile_id) AS received
+            FROM events e
+            JOIN profiles p
+                ON p.profile_id IN (e.profile_id, e.profile_id_interact)
+            JOIN user_group ug ON ug.user_id = p.owner
+            WHERE e.created_at >= :start AND e.created_at < :end
+            AND e.issue = 'OK' AND e.event_type = 'clickAds'
+            GROUP BY ug.group_id
+        ) AS c ON c.group_id = g2.group_id
+        WHERE g.group_id = g2.group_id
+        AND (g.click_count, g.receiver_count, g.counters_date) IS DISTINCT FROM
+            (COALESCE(c.given, 0), COALESCE(c.received, 0), :today)
+        """
+    )
+    db.session.execute(statement, {"today": today, "start": start, "end": end})
+
+
+def reset_daily_counts(today):
+    """Zero the click counts of the groups not counted today yet."""
+    db.session.execute(
+        text(
+            "UPDATE groups SET click_count = 0, receiver_count = 0, "
+            "counters_date = :today "
+            "WHERE counters_date IS NULL OR counters_date < :today"
+        ),
+        {"today": today},
+    )
@@ -1,21 +1,127 @@
+import hashlib
+import json
 import os
+import threading
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 
 from flask_jwt_extended import get_jwt_claims
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from src import db
+from src import app, db, cache
 from src.models import Settings
 from src.services import setting_services, profiles_services
 
 base_url = os.environ.get("HMA_ENDPOINTS")
 appVersion = 3049
+ACCOUNT_DELETED = "Account has been deleted"
 
 _logger = logging.getLogger()
 
 
-def authenticate(username, password):
-    """Authenticate and get a token."""
+class HMAUnavailable(Exception):
+    """HMA did not answer in time or too many calls to it are in flight."""
+
+
+def _build_session():
+    """
+    Keep-alive session shared by every HMA call. Idempotent requests are
+    retried with backoff on connection errors and 502/503/504, POST is not.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=app.config["HMA_RETRIES"],
+        backoff_factor=app.config["HMA_BACKOFF_FACTOR"],
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "PUT", "DELETE"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=app.config["HMA_POOL_SIZE"],
+        pool_maxsize=app.config["HMA_POOL_SIZE"],
+        max_retries=retry,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = _build_session()
+
+# HMA calls of the request threads run here, bounded per process
+_pool = ThreadPoolExecutor(
+    max_workers=app.config["HMA_MAX_CONCURRENCY"], thread_name_prefix="hma"
+)
+_slots = threading.BoundedSemaphore(app.config["HMA_MAX_CONCURRENCY"])
+
+
+def call_with_deadline(fn, *args, timeout=None, **kwargs):
+    """
+    Run fn on the HMA pool and wait for it at most timeout seconds
+    (HMA_CALL_TIMEOUT by default), under the uWSGI harakiri whatever the
+    retries and socket timeouts of the call add up to. Raises
+    HMAUnavailable at once when HMA_MAX_CONCURRENCY calls are in flight,
+    and on timeout; the call is then left to end on its own.
+    """
+    if not _slots.acquire(blocking=False):
+        raise HMAUnavailable("Too many HMA calls in progress, please try again")
+    try:
+        future = _pool.submit(fn, *args, **kwargs)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=timeout or app.config["HMA_CALL_TIMEOUT"])
+    except TimeoutError:
+        raise HMAUnavailable("HMA is not responding, please try again")
+
+
+def _send(method, url, token=None, **kwargs):
+    if token:
+        kwargs["headers"] = {
+            **kwargs.get("headers", {}),
+            "Authorization": f"Bearer {token}",
+        }
+    kwargs.setdefault(
+        "timeout", (app.config["HMA_CONNECT_TIMEOUT"], app.config["HMA_READ_TIMEOUT"])
+    )
+    return _session.request(method, url, **kwargs)
+
+
+def _request(method, path, token, credentials=None, **kwargs):
+    """
+    Call HMA with a token. Given the (account, password) the token belongs
+    to, an expired token (401) is renewed and the call made once more.
+    """
+    response = _send(method, f"{base_url}{path}", token, **kwargs)
+    if response.status_code == 401 and credentials:
+        _logger.info("HMA token rejected, authenticate again")
+        token = authenticate(*credentials, force=True)
+        if token and token != ACCOUNT_DELETED:
+            response = _send(method, f"{base_url}{path}", token, **kwargs)
+    return response
+
+
+def _token_cache_key(username, password):
+    # The password is part of the key so new credentials get a new token
+    digest = hashlib.sha256(f"{username}:{password}".encode()).hexdigest()
+    return f"hma_token:{digest}"
+
+
+def authenticate(username, password, force=False):
+    """
+    Authenticate and get a token. Tokens are cached per HMA account for
+    HMA_TOKEN_TTL, force skips the cache (e.g. after a 401).
+    """
+    cache_key = _token_cache_key(username, password)
+    if not force:
+        hma_access_token = cache.get(cache_key)
+        if hma_access_token:
+            return hma_access_token
+
     url = f"{base_url}/auth"
     auth = (username, password)
     data = {"version": appVersion}
@@ -32,9 +138,10 @@ def authenticate(username, password):
     #         response = requests.get(url, headers=headers)
     #         if response.status_code == 200:
     #             return hma_access_token
-    response = requests.post(url, auth=auth, data=data)
+    response = _send("POST", url, auth=auth, data=data)
     if response.status_code == 200 and response.json()["code"] == 1:
         hma_access_token = response.json()["result"]["token"]
+        cache.set(cache_key, hma_access_token, timeout=app.config["HMA_TOKEN_TTL"])
         # if user_settings:
         #     settings = user_settings["settings"]
         #     settings["hma_access_token"] = hma_access_token
@@ -45,24 +152,21 @@ def authenticate(username, password):
         #         settings_record.settings = settings
         #         db.session.flush()
         return hma_access_token
+    cache.delete(cache_key)
     if response.status_code == 403:
-        return "Account has been deleted"
+        return ACCOUNT_DELETED
     return ""
 
 
-def get_account_info(token):
+def get_account_info(token, credentials=None):
     """Get account information."""
-    url = f"{base_url}/users/me"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers)
+    response = _request("GET", "/users/me", token, credentials)
     return response.json()
 
 
-def create_marco_browser_profile(token, data):
+def create_marco_browser_profile(token, data, credentials=None):
     """Create a Marco browser profile."""
-    url = f"{base_url}/browser/marco"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.post(url, headers=headers, json=data)
+    response = _request("POST", "/browser/marco", token, credentials, json=data)
     if response.status_code == 402:
         raise Exception("HMA Account limit excelled, please contact your administrator")
     elif response.status_code == 200:
@@ -80,12 +184,13 @@ def delete_browser_profile(profile_id, user_id, device_id):
     hma_token = authenticate(hma_account, hma_password)
     if not hma_token:
         return False
-    if hma_token == "Account has been deleted":
+    if hma_token == ACCOUNT_DELETED:
         return True
     """Delete a browser profile."""
-    url = f"{base_url}/browser/{profile_id}"
-    headers = {"Authorization": f"Bearer {hma_token}"}
-    response = requests.delete(url, headers=headers)
+    response = _request(
+        "DELETE", f"/browser/{profile_id}", hma_token, (hma_account, hma_password)
+    )
+    cache.delete(_browser_data_cache_key(profile_id))
     if response.json()["code"] == 1:
         return True
     if response.json()["code"] == 0 and response.json()["errors"] == "Not found":
@@ -93,20 +198,24 @@ def delete_browser_profile(profile_id, user_id, device_id):
     return False
 
 
-def list_browser_profiles(token):
+def list_browser_profiles(token, credentials=None):
     """List browser profiles."""
-    url = f"{base_url}/browser?appVersion={appVersion}"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers)
+    response = _request(
+        "GET", f"/browser?appVersion={appVersion}", token, credentials
+    )
     return response.json()
 
 
-def get_browser_data(token, hma_profile_id, tz_data):
+def get_browser_data(token, hma_profile_id, tz_data, credentials=None):
     """Get browser data for a specific profile."""
-    url = f"{base_url}/browser/marco/data/{hma_profile_id}"
-    headers = {"Authorization": f"Bearer {token}"}
     timezone_data = {"tz": tz_data}
-    response = requests.post(url, headers=headers, json=timezone_data)
+    response = _request(
+        "POST",
+        f"/browser/marco/data/{hma_profile_id}",
+        token,
+        credentials,
+        json=timezone_data,
+    )
     if response.status_code == 200:
         return True, response.json()
     if response.status_code == 404:
@@ -114,47 +223,144 @@ def get_browser_data(token, hma_profile_id, tz_data):
     return False, "HMA error can not get proxy timezone data"
 
 
-def update_browser_profile(token, profile_id, data):
+def _browser_data_cache_key(hma_profile_id):
+    return f"hma_browser_data:{hma_profile_id}"
+
+
+def _tz_digest(tz_data):
+    return hashlib.sha1(json.dumps(tz_data, sort_keys=True).encode()).hexdigest()
+
+
+def _fetch_browser_data(username, password, hma_profile_id, tz_data):
+    token = authenticate(username, password)
+    if not token:
+        return False, "HMA account not found, please check your settings"
+    if token == ACCOUNT_DELETED:
+        return False, ACCOUNT_DELETED
+    status, result = get_browser_data(
+        token, hma_profile_id, tz_data, credentials=(username, password)
+    )
+    if not status:
+        return False, "HMA profile not found error"
+    return True, result["result"]
+
+
+def get_cached_browser_data(username, password, hma_profile_id, tz_data):
+    """
+    Browser data of an HMA profile for a timezone. The last one fetched
+    per profile is kept HMA_BROWSER_DATA_TTL, opening the profile again
+    with the same timezone does not call HMA. Otherwise authenticate and
+    fetch within call_with_deadline, HMAUnavailable when HMA is slow.
+
+    :return: (True, browser data) or (False, error message)
+    """
+    cache_key = _browser_data_cache_key(hma_profile_id)
+    tz_digest = _tz_digest(tz_data)
+    cached = cache.get(cache_key)
+    if cached and cached["tz"] == tz_digest:
+        return True, cached["data"]
+
+    status, result = call_with_deadline(
+        _fetch_browser_data, username, password, hma_profile_id, tz_data
+    )
+    if status:
+        cache.set(
+            cache_key,
+            {"tz": tz_digest, "data": result},
+            timeout=app.config["HMA_BROWSER_DATA_TTL"],
+        )
+    return status, result
+
+
+def update_browser_profile(token, profile_id, data, credentials=None):
     """Update a browser profile."""
-    url = f"{base_url}/browser/{profile_id}"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.put(url, headers=headers, json=data)
+    response = _request("PUT", f"/browser/{profile_id}", token, credentials, json=data)
+    cache.delete(_browser_data_cache_key(profile_id))
     return response.json()
 
 
-def list_team_members(token, team_name):
+def list_team_members(token, team_name, credentials=None):
     """List team members."""
-    url = f"{base_url}/members/team/{team_name}"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers)
+    response = _request("GET", f"/members/team/{team_name}", token, credentials)
     return response.json()
 
 
-def create_team_member(token, team_name, data):
+def create_team_member(token, team_name, data, credentials=None):
     """Create a team member."""
-    url = f"{base_url}/members/team/{team_name}"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.post(url, headers=headers, json=data)
+    response = _request(
+        "POST",
+        f"/members/team/{team_name}",
+        token,
+        credentials,
+        json=data,
+    )
     return response.json()
 
 
-def update_team_member(token, team_name, member_email, data):
+def update_team_member(token, team_name, member_email, data, credentials=None):
     """Update profiles for a team member."""
-    url = f"{base_url}/members/team/{team_name}/{member_email}"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.put(url, headers=headers, json=data)
+    response = _request(
+        "PUT",
+        f"/members/team/{team_name}/{member_email}",
+        token,
+        credentials,
+        json=data,
+    )
     return response.json()
 
 
-def delete_team_member(token, team_name, member_email):
+def delete_team_member(token, team_name, member_email, credentials=None):
     """Delete a team member."""
-    url = f"{base_url}/members/team/{team_name}/{member_email}"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.delete(url, headers=headers)
+    response = _request(
+        "DELETE",
+        f"/members/team/{team_name}/{member_email}",
+        token,
+        credentials,
+    )
     return response.json()
 
 
-def create_hma_profile(username, device_id, user_id, hma_token, browser_version):
+def build_marco_profile_data(username, browser_version):
+    """Payload of a new Marco browser profile."""
+    return {
+        "name": username,
+        "os": "win",
+        "uploadCookiesToServer": True,
+        "uploadBookmarksToServer": True,
+        "uploadHistoryToServer": True,
+        "uploadLocalStorageToServer": True,
+        "resolution": "1920x1080",
+        "canvasMode": "noise",
+        "clientRectsMode": "noise",
+        "audioContextMode": "noise",
+        "webGLImageMode": "noise",
+        "webGLMetadataMode": "noise",
+        "browserVersion": int(browser_version),
+        "versionCode": appVersion,
+    }
+
+
+def index_hma_profiles(hma_profiles):
+    """{lower-cased name: HMA profile id} of a browser profiles listing."""
+    return {
+        item.get("name", "").lower().strip(): item["id"]
+        for item in hma_profiles.get("result", [])
+    }
+
+
+def create_hma_profile(
+    username,
+    device_id,
+    user_id,
+    hma_token,
+    browser_version,
+    hma_index=None,
+    credentials=None,
+):
+    """
+    Id of the HMA browser profile named `username`, created if missing.
+    Pass the index_hma_profiles of the account to skip listing it again.
+    """
     if not hma_token:
         settings = setting_services.get_settings_by_user_device(user_id, device_id)
         if not settings or "settings" not in settings.keys():
@@ -170,34 +376,17 @@ def create_hma_profile(username, device_id, user_id, hma_token, browser_version)
         hma_account = settings.get("hideMyAccAccount")
         hma_password = settings.get("hideMyAccPassword")
         hma_token = authenticate(hma_account, hma_password)
+        credentials = (hma_account, hma_password)
 
-    if not hma_token or hma_token == "Account has been deleted":
+    if not hma_token or hma_token == ACCOUNT_DELETED:
         return False
 
-    data = {
-        "name": username,
-        "os": "win",
-        "uploadCookiesToServer": True,
-        "uploadBookmarksToServer": True,
-        "uploadHistoryToServer": True,
-        "uploadLocalStorageToServer": True,
-        "resolution": "1920x1080",
-        "canvasMode": "noise",
-        "clientRectsMode": "noise",
-        "audioContextMode": "noise",
-        "webGLImageMode": "noise",
-        "webGLMetadataMode": "noise",
-        "browserVersion": int(browser_version),
-        "versionCode": appVersion,
-    }
-    hma_exist = get_hma_profiles(hma_token)
-    for item in hma_exist["result"]:
-        if (
-            username
-            and item.get("name", "").lower().strip() == username.lower().strip()
-        ):
-            return item["id"]
-    response = create_marco_browser_profile(hma_token, data)
+    data = build_marco_profile_data(username, browser_version)
+    if hma_index is None:
+        hma_index = index_hma_profiles(get_hma_profiles(hma_token, credentials))
+    if username and username.lower().strip() in hma_index:
+        return hma_index[username.lower().strip()]
+    response = create_marco_browser_profile(hma_token, data, credentials)
     if response["code"] == 1:
         profile_id = response["result"]["id"]
         return profile_id
@@ -213,41 +402,56 @@ def clear_unused_resourced(device_id, user_id):
         hma_account = settings.get("hideMyAccAccount")
         hma_password = settings.get("hideMyAccPassword")
         hma_token = authenticate(hma_account, hma_password)
+        credentials = (hma_account, hma_password)
 
         profiles = profiles_services.get_all_profiles(page=None, per_page=None)
         profiles = profiles.get("profiles", [])
         hma_profile_ids = [profile["hma_profile_id"] for profile in profiles]
-        hma_exist = get_hma_profiles(hma_token)
+        hma_exist = get_hma_profiles(hma_token, credentials)
         for item in hma_exist["result"]:
             if item["id"] not in hma_profile_ids:
-                url = f"{base_url}/browser/{item['id']}"
-                headers = {"Authorization": f"Bearer {hma_token}"}
                 name = item["name"]
                 _logger.info(f"found unused profile: {name}")
-                requests.delete(url, headers=headers)
+                _request("DELETE", f"/browser/{item['id']}", hma_token, credentials)
     except Exception as ex:
         _logger.exception(ex)
 
 
-def get_hma_profiles(hma_token):
-    url = f"{base_url}/browser?appVersion={appVersion}"
-    headers = {"Authorization": f"Bearer {hma_token}"}
-    response = requests.get(url, headers=headers)
+def get_hma_profiles(hma_token, credentials=None):
+    response = _request(
+        "GET", f"/browser?appVersion={appVersion}", hma_token, credentials
+    )
     if response.ok:
         return response.json()
     raise Exception("Please check your HMA account")
 
 
+def _proxy_url(proxy):
+    """host:port:username:password of the profiles as a proxy URL."""
+    splitter = proxy.split(":")
+    if len(splitter) == 4:
+        host, port, username, password = splitter
+        proxy = f"{username}:{password}@{host}:{port}"
+    return proxy if "://" in proxy else f"http://{proxy}"
+
+
 def get_tz_data(profile_data):
+    """
+    Timezone of the proxy of a profile, {} when it cannot be read within
+    call_with_deadline.
+    """
     try:
         proxy = profile_data.proxy
         if not proxy:
             raise Exception("Proxy not found exception")
-        splitter = proxy.split(":")
-        if len(splitter) == 4:
-            host, port, username, passowrd = splitter
-            proxy = f"{username}:{passowrd}@{host}:{port}"
-        response = requests.get("https://time.hidemyacc.com/", proxies={"http": proxy})
+        proxy = _proxy_url(proxy)
+        # The URL is https, an "http" only mapping went around the proxy
+        response = call_with_deadline(
+            _send,
+            "GET",
+            "https://time.hidemyacc.com/",
+            proxies={"http": proxy, "https": proxy},
+        )
         return response.json()
     except Exception as ex:
         _logger.exception(ex)
@@ -0,0 +1,124 @@
+"""Services for the VACUUM, ANALYZE and storage parameters of the tenant tables."""
+
+import logging
+import time
+
+from sqlalchemy import text
+
+from src import app, db
+
+# Create module log
+_logger = logging.getLogger(__name__)
+
+# Storage parameters of the tables updated all day (counters, modified_at):
+# room in each page for HOT updates, which need no index change and are
+# pruned without VACUUM, and autovacuum after a smaller share of dead rows.
+# The fillfactor applies to the pages written from then on.
+TABLE_SETTINGS = {
+    "profiles": {
+        "fillfactor": "80",
+        "autovacuum_vacuum_scale_factor": "0.02",
+        "autovacuum_analyze_scale_factor": "0.05",
+    },
+    "groups": {
+        "fillfactor": "80",
+        "autovacuum_vacuum_scale_factor": "0.05",
+    },
+}
+
+TABLE_STATS_QUERY = text(
+    """
+    SELECT s.relname, s.n_live_tup, s.n_dead_tup, s.n_mod_since_analyze,
+        s.n_tup_upd, s.n_tup_hot_upd, c.reloptions
+    FROM pg_stat_user_tables s
+    JOIN pg_class c ON c.oid = s.relid
+    WHERE s.schemaname = :schema
+    ORDER BY s.relname
+    """
+)
+
+
+def dead_ratio(table):
+    total = table.n_live_tup + table.n_dead_tup
+    return table.n_dead_tup / total if total else 0.0
+
+
+def table_action(table):
+    """
+    VACUUM (ANALYZE) for a table with more dead rows than autovacuum
+    should have left (MAINTENANCE_DEAD_RATIO of the rows and at least
+    MAINTENANCE_MIN_DEAD_TUPLES), ANALYZE for one whose statistics are
+    older than MAINTENANCE_ANALYZE_RATIO of its rows, else None.
+    """
+    if (
+        table.n_dead_tup >= app.config["MAINTENANCE_MIN_DEAD_TUPLES"]
+        and dead_ratio(table) >= app.config["MAINTENANCE_DEAD_RATIO"]
+    ):
+        return "VACUUM (ANALYZE)"
+    if table.n_mod_since_analyze >= max(
+        app.config["MAINTENANCE_MIN_DEAD_TUPLES"],
+        app.config["MAINTENANCE_ANALYZE_RATIO"] * table.n_live_tup,
+    ):
+        return "ANALYZE"
+    return None
+
+
+def settings_changes(table):
+    """The TABLE_SETTINGS of a table not set yet."""
+    current = dict(option.split("=", 1) for option in table.reloptions or [])
+    return {
+        name: value
+        for name, value in TABLE_SETTINGS.get(table.relname, {}).items()
+        if current.get(name) != value
+    }
+
+
+def maintain_tables(teams_id):
+    """
+    Tune the TABLE_SETTINGS and VACUUM or ANALYZE the tables of the tenant
+    schema that need it, see table_action. VACUUM cannot run in a
+    transaction: the statements run on a connection of their own in
+    autocommit, which also holds no snapshot back from the VACUUM.
+
+    Returns the actions taken by table.
+    """
+    schema = "cs_" + str(teams_id)
+    actions = []
+    with db.engine.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        quote = connection.dialect.identifier_preparer.quote
+        tables = connection.execute(TABLE_STATS_QUERY, {"schema": schema}).fetchall()
+        for table in tables:
+            name = f"{quote(schema)}.{quote(table.relname)}"
+            changes = settings_changes(table)
+            if changes:
+                options = ", ".join(f"{key} = {val}" for key, val in changes.items())
+                connection.execute(text(f"ALTER TABLE {name} SET ({options})"))
+                actions.append(
+                    {"table": table.relname, "action": "SET", "settings": changes}
+                )
+
+            action = table_action(table)
+            if action is None:
+                continue
+            start = time.perf_counter()
+            connection.execute(text(f"{action} {name}"))
+            actions.append(
+                {
+                    "table": table.relname,
+                    "action": action,
+                    "dead_tuples": table.n_dead_tup,
+                    "dead_ratio": round(dead_ratio(table), 3),
+                    "modified_since_analyze": table.n_mod_since_analyze,
+                    "duration_ms": round((time.perf_counter() - start) * 1000),
+                }
+            )
+
+    hot_updates = {
+        table.relname: round(table.n_tup_hot_upd / table.n_tup_upd, 3)
+        for table in tables
+        if table.relname in TABLE_SETTINGS and table.n_tup_upd
+    }
+    for action in actions:
+        _logger.info(f"{schema}: {action}")
+    return {"teams_id": teams_id, "actions": actions, "hot_updates": hot_updates}
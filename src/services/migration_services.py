@@ -17,6 +17,8 @@ def set_search_path(teams_id):
     """
     try:
         db.session.execute("SET search_path TO public, 'cs_" + str(teams_id) + "'")
+        # Tenant of the cached reads, see cache_services.current_teams_id
+        db.session.info["teams_id"] = teams_id
     except Exception as e:
         capture_exception(e)
         raise
@@ -2,7 +2,6 @@
 
 import logging
 import datetime
-import math
 import time
 
 from dateutil import tz
@@ -13,6 +12,7 @@ from sqlalchemy.orm.attributes import flag_modified
 
 from src import db, app
 from src.models import MissionInstance, Mission, Robot, MissionSchedule
+from src.utilities import pagination_util
 from src.utilities.date_util import convert_iso_str_to_date_time
 
 # Create module log
@@ -238,6 +238,9 @@ def search_mission_instance(
     sort_order="asc",
     distinct_field=None,
     filters=None,
+    cursor=None,
+    count=None,
+    teams_id=None,
 ):
     """
     Search mission_instance based on filters.
@@ -247,6 +250,10 @@ def search_mission_instance(
     :param str sort_by: Ordering parameter
     :param str sort_order: order by ascending or descending
     :param filters : filters for log
+    :param str cursor: keyset pages on (start_timestamp, mission_instance_id),
+        see pagination_util.paginate
+    :param str count: count mode, see pagination_util.COUNT_MODES
+    :param teams_id: tenant of cached counts
     :return status status of the response
     :return data data of the response
     """
@@ -283,22 +290,29 @@ def search_mission_instance(
             return False, query
 
         if distinct_field:
+            if cursor is not None:
+                return False, {"Message": "distinct_field needs page pagination"}
             field = getattr(MissionInstance, distinct_field, None)
             query = query.distinct(field)
 
-        count = query.count()
         if sorting_order:
             query = query.order_by(text(sorting_order))
-        if per_page:
-            query = query.limit(per_page)
-        if page:
-            query = query.offset(per_page * (page - 1))
-        query = query.all()
-        data = [format_mission_instance(i) for i in query]
+        rows, details = pagination_util.paginate(
+            query,
+            page,
+            per_page,
+            cursor=cursor,
+            count=count,
+            keyset=[MissionInstance.start_timestamp, MissionInstance.mission_instance_id],
+            sort_order=sort_order,
+            scope=teams_id,
+        )
+        data = [format_mission_instance(i) for i in rows]
         out_data["data"] = data
-        out_data["result_count"] = count
-        out_data["max_pages"] = math.ceil(count / per_page)
+        out_data.update(details)
         db.session.flush()
+    except ValueError as err:
+        return False, {"Message": str(err)}
     except Exception as err:
         _logger.exception(err)
         db.session.rollback()
@@ -2,7 +2,7 @@
 import random
 import pytz
 from flask_jwt_extended import get_jwt_claims
-from sqlalchemy import func, cast, or_, Text
+from sqlalchemy import func, or_
 
 from src import db, app, executor
 from src.models import (
@@ -17,6 +17,8 @@ from src.services import (
     groups_services,
     user_services,
     setting_services,
+    dispatch_services,
+    event_partition_services,
 )
 import datetime
 from croniter import croniter
@@ -24,7 +26,7 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
-daily_limits = {"clickAds": 300}
+daily_limits = dispatch_services.daily_limits
 
 
 # 30% clicks
@@ -140,16 +142,13 @@ def get_user_schedule(schedule_type):
 
     mission_should_start = []
     mission_force_start = []
-    missions = mission_services.get_missions_by_user_id(current_user_id)
-    for mission in missions:
-        mission_json = mission.get("mission_json")
-        cron_job = mission_json.get("cron")
-        if should_start_job(cron_job) or mission["force_start"]:
-            mission_schedule = mission["mission_schedule"]
-            mission_tasks = mission["mission_tasks"]
-            for item in mission_schedule:
-                item["tasks"] = mission_tasks
-            mission_should_start.extend(mission_schedule)
+    for mission in mission_services.get_due_missions(current_user_id):
+        mission_schedule = mission["mission_schedule"]
+        mission_tasks = mission["mission_tasks"]
+        for item in mission_schedule:
+            item["tasks"] = mission_tasks
+        mission_should_start.extend(mission_schedule)
+        if mission["force_start"]:
             mission_force_start.append(mission["mission_id"])
 
     for mission_id in mission_force_start:
@@ -174,24 +173,35 @@ def get_user_schedule(schedule_type):
 
     event_type = random.choice(list(daily_limits.keys()))
 
-    # user should be online within 5 minutes
-    profile_ids_receiver = get_profile_with_event_count_below_limit_v2(
-        event_type, threads
-    )
+    if app.config["DISPATCH_POOL_ENABLED"]:
+        profile_ids_receiver, unique_partner_ids = dispatch_services.get_dispatch_pairs(
+            teams_id,
+            event_type,
+            current_user_id,
+            threads,
+            receiver_owner_ids=get_receiver_owner_ids(),
+        )
+        if not profile_ids_receiver:
+            return mission_should_start, "mission_should_start"
+    else:
+        # user should be online within 5 minutes
+        profile_ids_receiver = get_profile_with_event_count_below_limit_v2(
+            event_type, threads
+        )
 
-    # Not found any user receiver
-    if not profile_ids_receiver:
-        return mission_should_start, "mission_should_start"
+        # Not found any user receiver
+        if not profile_ids_receiver:
+            return mission_should_start, "mission_should_start"
 
-    # Find a unique interaction partner from current user profiles
-    # days_limit = calculate_days_for_unique_interactions(
-    #     event_type
-    # )
-    days_limit = 1
+        # Find a unique interaction partner from current user profiles
+        # days_limit = calculate_days_for_unique_interactions(
+        #     event_type
+        # )
+        days_limit = 1
 
-    unique_partner_ids = find_unique_interaction_partner_v2(
-        profile_ids_receiver, event_type, days_limit, current_user_id, threads
-    )
+        unique_partner_ids = find_unique_interaction_partner_v2(
+            profile_ids_receiver, event_type, days_limit, current_user_id, threads
+        )
     tasks = db.session.query(Task).filter(Task.tasks_name == event_type).first()
     if not tasks:
         return mission_should_start, "clickAds"
@@ -239,6 +249,8 @@ def find_unique_interaction_partner(
             days=int(days_limit)
         )
 
+    today_start, today_end = event_partition_services.today_bounds()
+
     # Subquery to find profiles that have already interacted with the given profile
     interacted_subquery = (
         db.session.query(Events.profile_id_interact)
@@ -247,7 +259,7 @@ def find_unique_interaction_partner(
             Events.profile_id == profile_receiver,
             Events.event_type == event_type,
             Events.issue == "OK",
-            db.func.date(Events.created_at) >= start_date,
+            Events.created_at >= start_date,
         )
     )
 
@@ -257,7 +269,8 @@ def find_unique_interaction_partner(
         .filter(
             Events.issue == "OK",
             Events.event_type == event_type,
-            db.func.date(Events.created_at) == datetime.datetime.utcnow().date(),
+            Events.created_at >= today_start,
+            Events.created_at < today_end,
         )
         .group_by(Events.profile_id)
         .having(db.func.count() >= daily_limits[event_type])
@@ -270,7 +283,8 @@ def find_unique_interaction_partner(
         )
         .filter(
             Events.event_type == event_type,
-            db.func.date(Events.created_at) == datetime.datetime.utcnow().date(),
+            Events.created_at >= today_start,
+            Events.created_at < today_end,
         )
         .group_by(Events.profile_id_interact)
         .subquery()
@@ -284,8 +298,8 @@ def find_unique_interaction_partner(
     #     monetizable_filter = cast(Profiles.profile_data["monetizable"], Text) == "false"
     #     additional_filters = (monetizable_filter,)
     # else:
-    monetizable_filter = cast(Profiles.profile_data["monetizable"], Text) == "false"
-    verified_filter = cast(Profiles.profile_data["verify"], Text) == "true"
+    monetizable_filter = Profiles.is_monetizable == False
+    verified_filter = Profiles.is_verified == True
     additional_filters = (monetizable_filter, verified_filter)
 
     account = (
@@ -341,7 +355,6 @@ def find_unique_interaction_partner_v2(
     # func.json_extract_path_text(Profiles.profile_data, "account_status").in_(
     #     ["NotStarted", 'ERROR']
     # ),
-    verified_filter = cast(Profiles.profile_data["verify"], Text) == "true"
     # additional_filters = (verified_filter)
 
     top_accounts = (
@@ -353,8 +366,8 @@ def find_unique_interaction_partner_v2(
             Profiles.click_count < daily_limits[event_type],
             Profiles.main_profile == False,
             Profiles.is_disable == False,
-            cast(Profiles.profile_data["verify"], Text) == "true",
-            cast(Profiles.profile_data["suspended"], Text) == "false",
+            Profiles.is_verified == True,
+            Profiles.is_suspended == False,
             Profiles.status != "Wrong password",
         )
         .order_by(func.random())
@@ -375,13 +388,10 @@ def calculate_days_for_unique_interactions(event_type):
     total_accounts = (
         db.session.query(Profiles)
         .filter(
-            Profiles.profile_data.isnot(None),
             Profiles.main_profile == False,
             Profiles.is_disable == False,
-            func.json_extract_path_text(Profiles.profile_data, "account_status").in_(
-                ["NotStarted", "ERROR"]
-            ),
-            cast(Profiles.profile_data["verify"], Text) == "true",
+            Profiles.account_status.in_(["NotStarted", "ERROR"]),
+            Profiles.is_verified == True,
         )
         .count()
     )
@@ -399,7 +409,7 @@ def calculate_days_for_unique_interactions(event_type):
 
 
 def get_profile_with_event_count_below_limit(event_type):
-    today = datetime.datetime.utcnow().date()
+    today_start, today_end = event_partition_services.today_bounds()
     active_cutoff = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
 
     # Step 1: Query active user IDs
@@ -414,7 +424,8 @@ def get_profile_with_event_count_below_limit(event_type):
         .filter(
             Events.event_type == event_type,
             Events.issue == "OK",
-            db.func.date(Events.created_at) == today,
+            Events.created_at >= today_start,
+            Events.created_at < today_end,
         )
         .group_by(Events.profile_id)
         .subquery()
@@ -442,11 +453,8 @@ def get_profile_with_event_count_below_limit(event_type):
                 event_count_subquery.c.event_count < daily_limits[event_type],
                 event_count_subquery.c.event_count.is_(None),
             ),
-            Profiles.profile_data.isnot(None),
-            func.json_extract_path_text(Profiles.profile_data, "account_status").in_(
-                ["NotStarted", "OK"]
-            ),
-            Profiles.main_profile.is_(True),
+            Profiles.account_status.in_(["NotStarted", "OK"]),
+            Profiles.main_profile == True,
         )
         .order_by(func.random())
         .first()
@@ -469,20 +477,17 @@ def get_profile_with_event_count_below_limit_v2(event_type, threads):
     # choose_otp = random.choice(["random", "normal"])
     additional_filters = []
     # if choose_otp == "normal":
-    group_founded = groups_services.get_group_below_threshold()
-    if group_founded:
-        user_receiver = user_services.get_user_receiver_by_group_id(
-            group_founded.group_id
-        )
-        user_receiver = [user.user_id for user in user_receiver]
+    user_receiver = get_receiver_owner_ids()
+    if user_receiver is not None:
         additional_filters.append(Profiles.owner.in_(user_receiver))
 
     profiles = (
         db.session.query(Profiles.profile_id)
         .filter(
             Profiles.click_count < daily_limits[event_type],
-            Profiles.main_profile.is_(True),
-            Profiles.is_disable.is_(False),
+            # = TRUE / = FALSE match the predicate of idx_profiles_receivers
+            Profiles.main_profile == True,
+            Profiles.is_disable == False,
             *additional_filters
         )
         .order_by(func.random())
@@ -494,3 +499,15 @@ def get_profile_with_event_count_below_limit_v2(event_type, threads):
     # profile = random.choice(profiles) if profiles else None
 
     return [profile.profile_id for profile in profiles]
+
+
+def get_receiver_owner_ids():
+    """
+    Owners of the group that currently gives more clicks than it receives,
+    in random order. None when no group is below its threshold.
+    """
+    group_founded = groups_services.get_group_below_threshold()
+    if not group_founded:
+        return None
+    user_receiver = user_services.get_user_receiver_by_group_id(group_founded.group_id)
+    return [user.user_id for user in user_receiver]
@@ -1,21 +1,39 @@
 import datetime
+import logging
+import uuid
 
+import pytz
+from croniter import croniter
 from flask_jwt_extended import get_jwt_claims
+from sqlalchemy import or_
+
 from src import db, app
 from src.models import Mission, MissionSchedule, MissionTask
-from src.services import profiles_services
+from src.services import cache_services, profiles_services
+from src.utilities.model_helper import repr_loader_options
 from src.v1.controllers.utils import generate_crontab_schedule
 
+# Create module log
+_logger = logging.getLogger(__name__)
+
+# Timezone of the mission crons (same as should_start_job)
+CRON_TIMEZONE = "Asia/Ho_Chi_Minh"
+# A mission starts on the polls of the minute before its fire time
+FIRE_WINDOW = datetime.timedelta(minutes=1)
+# Rows per multi-row INSERT of the schedules of a new mission
+INSERT_BATCH_SIZE = 1000
+
 
+@cache_services.tenant_cached(cache_services.MISSIONS)
 def get_all_missions(user_id):
     """Retrieve all missions."""
-    sorting_order = "created_at desc"
     # Now use this session for querying
     missions = [
         item.repr_name()
         for item in db.session.query(Mission)
+        .options(*repr_loader_options(Mission))
         .filter(Mission.user_id == user_id)
-        .order_by(db.text(sorting_order))
+        .order_by(Mission.created_at.desc())
         .all()
     ]
 
@@ -32,11 +50,85 @@ def get_missions_by_user_id(user_id):
     """Retrieve all missions. by given user id"""
     missions = [
         item.repr_name()
-        for item in db.session.query(Mission).filter_by(user_id=user_id).all()
+        for item in db.session.query(Mission)
+        .options(*repr_loader_options(Mission))
+        .filter_by(user_id=user_id)
+        .all()
     ]
     return missions
 
 
+def compute_next_fire_at(cron_expression, now=None):
+    """
+    Next fire time of a cron after now, as a naive UTC datetime like the
+    other timestamps. None without a (valid) cron.
+    """
+    if not cron_expression:
+        return None
+    now = now or datetime.datetime.utcnow()
+    local_now = pytz.utc.localize(now).astimezone(pytz.timezone(CRON_TIMEZONE))
+    try:
+        next_fire = croniter(cron_expression, local_now).get_next(datetime.datetime)
+    except Exception as ex:
+        _logger.warning(f"Invalid mission cron {cron_expression}: {ex}")
+        return None
+    return next_fire.astimezone(pytz.utc).replace(tzinfo=None)
+
+
+def refresh_next_fire_at(mission, now=None):
+    """Recompute next_fire_at after the cron of the mission was set."""
+    mission.next_fire_at = compute_next_fire_at(
+        (mission.mission_json or {}).get("cron"), now
+    )
+
+
+def get_due_missions(user_id, now=None):
+    """
+    Missions of the user to start on this poll: the force_start ones and
+    those firing within FIRE_WINDOW, selected on next_fire_at. Fire times
+    already passed move to the next occurrence. Only the due missions are
+    loaded, with their schedules and tasks eagerly.
+    """
+    now = now or datetime.datetime.utcnow()
+    candidates = (
+        db.session.query(
+            Mission.mission_id,
+            Mission.mission_json,
+            Mission.next_fire_at,
+            Mission.force_start,
+        )
+        .filter(
+            Mission.user_id == user_id,
+            or_(Mission.force_start == True, Mission.next_fire_at <= now + FIRE_WINDOW),
+        )
+        .all()
+    )
+    due_ids = []
+    for candidate in candidates:
+        next_fire_at = candidate.next_fire_at
+        if next_fire_at is not None and next_fire_at <= now:
+            next_fire_at = compute_next_fire_at(
+                (candidate.mission_json or {}).get("cron"), now
+            )
+            Mission.query.filter_by(mission_id=candidate.mission_id).update(
+                {"next_fire_at": next_fire_at}, synchronize_session=False
+            )
+        if candidate.force_start or (
+            next_fire_at is not None and next_fire_at <= now + FIRE_WINDOW
+        ):
+            due_ids.append(candidate.mission_id)
+    if not due_ids:
+        return []
+
+    missions = (
+        db.session.query(Mission)
+        .options(*repr_loader_options(Mission))
+        .filter(Mission.mission_id.in_(due_ids))
+        .all()
+    )
+    return [mission.repr_name() for mission in missions]
+
+
 def get_missions_by_id(mission_id):
     """Retrieve all missions. by given user id"""
     mission = (
@@ -50,6 +142,7 @@ def set_force_start_false(mission_id):
     mission = Mission.query.filter_by(mission_id=mission_id).first()
     mission.force_start = False
     db.session.flush()
+    cache_services.invalidate(cache_services.MISSIONS)
 
 
 def create_mission(data):
@@ -106,6 +199,7 @@ def create_mission(data):
     schedule_json = {"cron": cron, "loop_count": 1}
     new_mission.mission_json = schedule_json
     new_mission.status = "unknown"
+    refresh_next_fire_at(new_mission)
 
     if not data.get("profile_ids", ""):
         # fetch by from group_id
@@ -123,22 +217,50 @@ def create_mission(data):
             )
 
     profile_ids = [item.profile_id for item in profiles_selected]
-    for profile_id in profile_ids:
-        mission_schedule_instance = MissionSchedule(
-            group_id, profile_id, new_mission.mission_id, schedule_json
-        )
-        db.session.add(mission_schedule_instance)
-
-    tasks = data.get("tasks")
-    for task in tasks:
-        mission_task = MissionTask(new_mission.mission_id, task)
-        if config:
-            mission_task.config = config
-        db.session.add(mission_task)
-    db.session.flush()  # save tasks
+    insert_mission_schedules(
+        new_mission.mission_id, group_id, profile_ids, schedule_json
+    )
+    insert_mission_tasks(new_mission.mission_id, data.get("tasks"), config)
+    cache_services.invalidate(cache_services.MISSIONS)
     return new_mission
 
 
+def insert_mission_schedules(mission_id, group_id, profile_ids, schedule_json):
+    """
+    Insert one schedule per profile with multi-row INSERTs of
+    INSERT_BATCH_SIZE rows. The schedule ids are generated here instead of
+    by uuid_generate_v4(), nothing has to be read back per row.
+    """
+    rows = [
+        {
+            "schedule_id": str(uuid.uuid4()),
+            "group_id": group_id,
+            "profile_id": profile_id,
+            "mission_id": mission_id,
+            "schedule_json": schedule_json,
+        }
+        for profile_id in profile_ids
+    ]
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.session.execute(
+            MissionSchedule.__table__.insert().values(
+                rows[start : start + INSERT_BATCH_SIZE]
+            )
+        )
+    return len(rows)
+
+
+def insert_mission_tasks(mission_id, tasks_ids, config=None):
+    """Link the tasks to the mission with one INSERT, repeated tasks once."""
+    rows = [
+        {"mission_id": mission_id, "tasks_id": tasks_id, "config": config or None}
+        for tasks_id in dict.fromkeys(tasks_ids or [])
+    ]
+    if rows:
+        db.session.execute(MissionTask.__table__.insert().values(rows))
+    return len(rows)
+
+
 def update_mission(mission_id, data):
     """Update an existing mission."""
     mission = Mission.query.filter_by(mission_id=mission_id).first()
@@ -146,8 +268,10 @@ def update_mission(mission_id, data):
         for key, val in data.items():
             if hasattr(mission, key):
                 mission.__setattr__(key, val)
+        refresh_next_fire_at(mission)
         # Update other fields as necessary
         db.session.flush()
+        cache_services.invalidate(cache_services.MISSIONS)
     return mission
 
 
@@ -159,4 +283,5 @@ def delete_mission(mission_id):
     # remove mission
     Mission.query.filter_by(mission_id=mission_id).delete()
     db.session.flush()
+    cache_services.invalidate(cache_services.MISSIONS)
     return True
@@ -1,9 +1,37 @@
-import math
+import datetime
 
-from sqlalchemy import or_
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert
 
 from src import db, app
 from src.models.posts import Posts  # Importing the Posts model
+from src.models.profiles import Profiles
+from src.services import search_services
+from src.utilities import pagination_util
+from src.utilities.model_helper import repr_loader_options
+
+# Columns of the search parameter, each has a trigram index
+SEARCH_COLUMNS = [Posts.title, Posts.username, Posts.content, Posts.tw_post_id]
+
+# Columns a bulk upsert never writes from the request data
+PROTECTED_COLUMNS = {
+    "post_id",
+    "created_at",
+    "crawl_by",
+    "like_count",
+    "comment_count",
+    "share_count",
+    "view_count",
+    "posted_at",
+}
+
+# Metrics of the top posts, by name of the string column they come from
+TOP_POSTS_METRICS = {
+    "like": Posts.like_count,
+    "comment": Posts.comment_count,
+    "share": Posts.share_count,
+    "view": Posts.view_count,
+}
 
 
 def get_post_by_id(tw_post_id):
@@ -20,43 +48,97 @@ def get_all_posts(
     search="",
     profile_id="",
     user_id="",
+    cursor=None,
+    count=None,
+    teams_id=None,
 ):
+    """
+    Posts not deleted, by page or, with a cursor, by keyset on
+    (created_at, post_id), in which case sort_by must be created_at. See
+    pagination_util.paginate for cursor and count.
+    """
     column = getattr(Posts, sort_by, None)
     if not column:
         return False, {"Message": "Invalid sort_by key provided"}
-    sorting_order = sort_by + " " + sort_order
-    query = Posts.query.filter(Posts.is_deleted == False)
-    # Apply sorting
-    if sorting_order:
-        query = query.order_by(db.text(sorting_order))
+    if cursor and column is not Posts.created_at:
+        raise ValueError("Cursor pages are ordered on created_at only")
+    query = Posts.query.options(*repr_loader_options(Posts)).filter(
+        Posts.is_deleted == False
+    )
+    search = (search or "").strip()
     if search:
-        query = query.filter(
-            or_(
-                Posts.title.ilike(f"%{search}%"),
-                Posts.username.ilike(f"%{search}%"),
-                Posts.content.ilike(f"%{search}%"),
-                Posts.tw_post_id.ilike(f"%{search}%"),
-            )
+        query = query.filter(search_services.search_filter(SEARCH_COLUMNS, search))
+        # Best matches first, keyset pages keep their own order
+        query = query.order_by(
+            search_services.search_rank(SEARCH_COLUMNS, search).desc()
         )
+    # Apply sorting, on the column as the eager loads join tables with the
+    # same column names
+    query = query.order_by(
+        column.desc() if sort_order.lower() == "desc" else column.asc()
+    )
     if profile_id:
         query = query.filter(Posts.profile_id == profile_id)
     if user_id:
         query = query.filter(Posts.crawl_by == user_id)
 
     # Apply pagination
-    count = query.count()
-
-    if per_page:
-        query = query.limit(per_page)
-    if page:
-        query = query.offset(per_page * (page - 1))
-    posts = query.all()
+    posts, details = pagination_util.paginate(
+        query,
+        page,
+        per_page,
+        cursor=cursor,
+        count=count,
+        keyset=[Posts.created_at, Posts.post_id],
+        sort_order=sort_order,
+        scope=teams_id,
+    )
     # Formatting the result
     formatted_result = [post.repr_name() for post in posts]
+    return {"data": formatted_result, **details}
+
+
+def _naive_utc(value):
+    """posted_at is a UTC timestamp without time zone."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def get_top_posts(metric="view", profile_id=None, start=None, end=None, limit=10):
+    """
+    Posts with the highest metric posted in [start, end), of one profile or
+    of the team. The window defaults to the last TOP_POSTS_DEFAULT_DAYS.
+
+    :param str metric: One of TOP_POSTS_METRICS
+    :param str profile_id: Profile of the posts, all profiles if empty
+    :param datetime start: Start of the posted_at window (UTC)
+    :param datetime end: End of the posted_at window (UTC), now by default
+    :param int limit: Number of posts, at most TOP_POSTS_MAX_LIMIT
+    """
+    column = TOP_POSTS_METRICS.get(metric)
+    if column is None:
+        raise ValueError("Invalid metric")
+    end = _naive_utc(end) or datetime.datetime.utcnow()
+    start = _naive_utc(start) or end - datetime.timedelta(
+        days=app.config["TOP_POSTS_DEFAULT_DAYS"]
+    )
+    limit = min(limit or 10, app.config["TOP_POSTS_MAX_LIMIT"])
+    # Same predicate as the partial posted_at indexes
+    query = Posts.query.options(*repr_loader_options(Posts)).filter(
+        Posts.is_deleted == False,
+        Posts.posted_at >= start,
+        Posts.posted_at < end,
+        column.isnot(None),
+    )
+    if profile_id:
+        query = query.filter(Posts.profile_id == profile_id)
+    posts = query.order_by(column.desc(), Posts.posted_at.desc()).limit(limit).all()
     return {
-        "data": formatted_result,
-        "result_count": count,
-        "max_pages": math.ceil(count / per_page),
+        "metric": metric,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "data": [post.repr_name() for post in posts],
     }
 
 
@@ -81,6 +163,82 @@ def create_or_update_post(tw_post_id, post_data):
     return post_record
 
 
+def bulk_upsert_posts(posts_data, crawl_by):
+    """
+    Insert or update a batch of posts by tw_post_id with
+    INSERT ... ON CONFLICT, one statement per set of columns (normally the
+    whole batch). A tw_post_id repeated in the batch keeps its last item.
+    Invalid items are skipped and reported by their index in the batch.
+    """
+    columns = set(Posts.__table__.columns.keys()) - PROTECTED_COLUMNS
+    errors = []
+    candidates = {}
+    duplicates = 0
+    for index, post_data in enumerate(posts_data):
+        if not isinstance(post_data, dict):
+            errors.append({"index": index, "message": "post must be an object"})
+            continue
+        missing = [
+            key for key in ("tw_post_id", "profile_id") if not post_data.get(key)
+        ]
+        if missing:
+            errors.append(
+                {"index": index, "message": f"{', '.join(missing)} is required"}
+            )
+            continue
+        row = {key: val for key, val in post_data.items() if key in columns}
+        row["crawl_by"] = crawl_by
+        if row["tw_post_id"] in candidates:
+            duplicates += 1
+        candidates[row["tw_post_id"]] = (index, row)
+
+    profile_ids = {row["profile_id"] for _, row in candidates.values()}
+    known_ids = set()
+    if profile_ids:
+        known_ids = {
+            row.profile_id
+            for row in db.session.query(Profiles.profile_id)
+            .filter(Profiles.profile_id.in_(profile_ids))
+            .all()
+        }
+
+    batches = {}
+    for index, row in candidates.values():
+        if row["profile_id"] not in known_ids:
+            errors.append(
+                {"index": index, "message": f"profile not found {row['profile_id']}"}
+            )
+            continue
+        batches.setdefault(tuple(sorted(row)), []).append(row)
+
+    inserted = updated = 0
+    for batch_columns, batch in batches.items():
+        statement = insert(Posts.__table__).values(batch)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Posts.tw_post_id],
+            set_={
+                column: statement.excluded[column]
+                for column in batch_columns
+                if column != "tw_post_id"
+            },
+        )
+        # xmax is 0 on a row version written by an insert, not an update
+        statement = statement.returning(literal_column("(xmax = 0)").label("inserted"))
+        for result in db.session.execute(statement).fetchall():
+            if result.inserted:
+                inserted += 1
+            else:
+                updated += 1
+    db.session.flush()
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "duplicates": duplicates,
+        "errors": errors,
+    }
+
+
 def delete_post(tw_post_id):
     """Delete a post by its ID."""
     post_record = Posts.query.filter_by(tw_post_id=tw_post_id).first()
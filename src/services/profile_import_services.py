@@ -0,0 +1,263 @@
+"""Services for bulk profile imports."""
+
+import datetime
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.dialects.postgresql import insert
+
+from src import app, db, cache, executor
+from src.models.profiles import Profiles
+from src.services import (
+    cache_services,
+    dispatch_services,
+    groups_services,
+    hma_services,
+    migration_services,
+)
+
+# Create module log
+_logger = logging.getLogger(__name__)
+
+# Columns an import never writes from the request data
+PROTECTED_COLUMNS = {
+    "profile_id",
+    "click_count",
+    "comment_count",
+    "like_count",
+    "counters_date",
+    "is_verified",
+    "is_suspended",
+    "is_monetizable",
+    "account_status",
+}
+
+
+def _import_cache_key(teams_id, import_id):
+    return f"profile_import:{teams_id}:{import_id}"
+
+
+class ImportProgress:
+    """Status of an import, saved to the cache as it progresses."""
+
+    def __init__(self, teams_id, import_id, total):
+        self._lock = threading.Lock()
+        self.teams_id = teams_id
+        self.state = {
+            "import_id": import_id,
+            "status": "pending",
+            "total": total,
+            "imported": 0,
+            "skipped": 0,
+            "failed": 0,
+            "errors": [],
+            "started_at": datetime.datetime.utcnow().isoformat(),
+            "finished_at": None,
+        }
+        self.save()
+
+    def save(self):
+        cache.set(
+            _import_cache_key(self.teams_id, self.state["import_id"]),
+            self.state,
+            timeout=app.config["PROFILE_IMPORT_TTL"],
+        )
+
+    def update(self, **values):
+        with self._lock:
+            self.state.update(values)
+            self.save()
+
+    def add(self, key, count=1):
+        with self._lock:
+            self.state[key] += count
+            self.save()
+
+    def fail(self, username, message):
+        with self._lock:
+            self.state["failed"] += 1
+            self.state["errors"].append({"username": username, "message": message})
+            self.save()
+
+
+def get_import(teams_id, import_id):
+    return cache.get(_import_cache_key(teams_id, import_id))
+
+
+def start_import(
+    profiles,
+    user_id,
+    device_id,
+    teams_id,
+    hma_token,
+    browser_version,
+    credentials=None,
+    hma_profiles=None,
+):
+    """Register an import and run it in the background executor."""
+    import_id = str(uuid.uuid4())
+    progress = ImportProgress(teams_id, import_id, len(profiles))
+    executor.submit(
+        run_import,
+        progress,
+        profiles,
+        user_id,
+        device_id,
+        teams_id,
+        hma_token,
+        browser_version,
+        credentials,
+        hma_profiles,
+    )
+    return progress.state
+
+
+def run_import(
+    progress,
+    profiles,
+    user_id,
+    device_id,
+    teams_id,
+    hma_token,
+    browser_version,
+    credentials=None,
+    hma_profiles=None,
+):
+    """
+    Import profiles: one HMA listing, browser profiles created with
+    PROFILE_IMPORT_CONCURRENCY parallel calls, then one upsert of the
+    Profiles rows.
+    """
+    progress.update(status="running")
+    try:
+        migration_services.set_search_path(teams_id)
+        rows = _prepare_rows(progress, profiles, user_id)
+        if hma_profiles is None:
+            hma_profiles = hma_services.get_hma_profiles(hma_token, credentials)
+        hma_index = hma_services.index_hma_profiles(hma_profiles)
+
+        def create_browser_profile(row):
+            try:
+                hma_profile_id = hma_services.create_hma_profile(
+                    row["username"],
+                    device_id,
+                    user_id,
+                    hma_token,
+                    browser_version,
+                    hma_index=hma_index,
+                    credentials=credentials,
+                )
+            except Exception as ex:
+                _logger.exception(ex)
+                hma_profile_id = None
+            if not hma_profile_id:
+                progress.fail(row["username"], "Can not create the HMA profile")
+                return None
+            row["hma_profile_id"] = hma_profile_id
+            return row
+
+        with ThreadPoolExecutor(
+            max_workers=app.config["PROFILE_IMPORT_CONCURRENCY"]
+        ) as pool:
+            rows = [row for row in pool.map(create_browser_profile, rows) if row]
+
+        upserted = upsert_profiles(rows, user_id)
+        groups_services.refresh_profile_counts([user_id])
+        db.session.commit()
+        dispatch_services.invalidate_pools(teams_id)
+        progress.update(
+            status="done",
+            imported=upserted,
+            finished_at=datetime.datetime.utcnow().isoformat(),
+        )
+        _logger.info(f"Profile import {progress.state['import_id']}: {progress.state}")
+    except Exception as ex:
+        db.session.rollback()
+        _logger.exception(ex)
+        progress.update(
+            status="failed",
+            message=str(ex),
+            finished_at=datetime.datetime.utcnow().isoformat(),
+        )
+    return progress.state
+
+
+def _prepare_rows(progress, profiles, user_id):
+    """
+    Profiles rows of the request, keeping the rules of create_profile: a
+    username used by another owner's enabled profile is skipped.
+    """
+    columns = set(Profiles.__table__.columns.keys()) - PROTECTED_COLUMNS
+    now = datetime.datetime.utcnow()
+    rows = {}
+    for data in profiles:
+        username = (data.get("username") or "").strip()
+        if not username:
+            progress.add("skipped")
+            continue
+        row = {}
+        for key, val in data.items():
+            if key not in columns:
+                continue
+            if isinstance(val, str):
+                val = val.strip()
+            if val:
+                row[key] = val
+        row.update(
+            {
+                "username": username,
+                "owner": user_id,
+                "user_access": user_id,
+                "created_at": now,
+                "is_disable": False,
+                "cookies": "",
+            }
+        )
+        if username in rows:
+            progress.add("skipped")
+        rows[username] = row
+
+    taken = {
+        profile.username
+        for profile in db.session.query(Profiles.username)
+        .filter(
+            Profiles.username.in_(list(rows)),
+            Profiles.owner != user_id,
+            Profiles.is_disable == False,
+        )
+        .all()
+    }
+    for username in taken:
+        progress.fail(username, "Username belongs to another user")
+        del rows[username]
+    return list(rows.values())
+
+
+def upsert_profiles(rows, user_id):
+    """
+    Insert the rows, updating the profiles that already exist by
+    username. Rows sharing the same columns (normally the whole import)
+    go in one statement.
+    """
+    batches = {}
+    for row in rows:
+        batches.setdefault(tuple(sorted(row)), []).append(row)
+
+    upserted = 0
+    for columns, batch in batches.items():
+        statement = insert(Profiles.__table__).values(batch)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Profiles.username],
+            set_={
+                column: statement.excluded[column]
+                for column in columns
+                if column != "username"
+            },
+            # Never take over an enabled profile of another owner
+            where=(Profiles.owner == user_id) | (Profiles.is_disable == True),
+        ).returning(Profiles.profile_id)
+        upserted += len(db.session.execute(statement).fetchall())
+    cache_services.invalidate(cache_services.PROFILES)
+    return upserted
@@ -2,17 +2,19 @@
 
 import datetime
 import logging
-import math
-
-from sqlalchemy import or_, func, cast, Text
 
 from src import db
 from src.models.profiles import Profiles
-from src.services import hma_services, migration_services
+from src.services import hma_services, migration_services, dispatch_services
+from src.services import cache_services, groups_services, search_services
+from src.utilities import pagination_util
 
 # Create module log
 _logger = logging.getLogger(__name__)
 
+# Columns of the search parameter, each has a trigram index
+SEARCH_COLUMNS = [Profiles.username, Profiles.user_access, Profiles.status]
+
 
 def create_profile(data, device_id, user_id, hma_token, browser_version, teams_id):
     migration_services.set_search_path(teams_id)
@@ -46,8 +48,12 @@ def create_profile(data, device_id, user_id, hma_token, browser_version, teams_i
     profile.hma_profile_id = hma_profile_id
     profile.cookies = ""
     db.session.add(profile)
+    db.session.flush()
+    groups_services.refresh_profile_counts([profile.owner])
+    cache_services.invalidate(cache_services.PROFILES, teams_id=teams_id)
     db.session.commit()
-    print(f"Add ok {username}")
+    dispatch_services.sync_profile(teams_id, profile)
+    _logger.info(f"Add ok {username}")
     return profile
 
 
@@ -55,6 +61,9 @@ def get_profile_by_id(profile_id):
     return Profiles.query.get(profile_id)
 
 
+@cache_services.tenant_cached(
+    cache_services.PROFILES, timeout_config="TENANT_CACHE_COUNTERS_TTL"
+)
 def get_all_profiles(
     page=0,
     per_page=20,
@@ -63,7 +72,15 @@ def get_all_profiles(
     search="",
     user_id="",
     filter_by_type="all",
+    cursor=None,
+    count=None,
+    teams_id=None,
 ):
+    """
+    Enabled profiles, oldest first, by page or, with a cursor, by keyset on
+    (created_at, profile_id). See pagination_util.paginate for cursor and
+    count.
+    """
     # column = getattr(Teams, sort_by, None)
     # if not column:
     #     return False, {"Message": "Invalid sort_by Key provided"}
@@ -72,64 +89,51 @@ def get_all_profiles(
     # Apply sorting
     # if sorting_order:
     query = query.filter(Profiles.is_disable == False)
-    query = query.order_by(db.text("created_at asc"))
+    search = (search or "").strip()
     if search:
-        query = query.filter(
-            or_(
-                Profiles.username.ilike(f"%{search}%"),
-                Profiles.user_access.ilike(f"%{search}%"),
-                Profiles.status.ilike(f"%{search}%"),
-            )
+        query = query.filter(search_services.search_filter(SEARCH_COLUMNS, search))
+        # Best matches first, keyset pages keep their own order
+        query = query.order_by(
+            search_services.search_rank(SEARCH_COLUMNS, search).desc()
         )
+    query = query.order_by(db.text("created_at asc"))
     if user_id:
         query = query.filter(Profiles.owner == user_id)
 
     if filter_by_type == "main_account":
         query = query.filter(Profiles.main_profile == True)
     elif filter_by_type == "monetizable":
-        query = query.filter(
-            func.json_extract_path_text(Profiles.profile_data, "account_status").in_(
-                ["OK"]
-            )
-        )
+        query = query.filter(Profiles.account_status == "OK")
     elif filter_by_type == "error":
-        query = query.filter(
-            func.json_extract_path_text(Profiles.profile_data, "account_status").in_(
-                ["ERROR"]
-            )
-        )
+        query = query.filter(Profiles.account_status == "ERROR")
     elif filter_by_type == "AdsEligible":
-        query = query.filter(
-            func.json_extract_path_text(Profiles.profile_data, "account_status").in_(
-                ["AdsEligible"]
-            )
-        )
+        query = query.filter(Profiles.account_status == "AdsEligible")
     elif filter_by_type == "suspended":
-        query = query.filter(cast(Profiles.profile_data["suspended"], Text) == "true")
+        query = query.filter(Profiles.is_suspended == True)
     elif filter_by_type == "verified":
-        query = query.filter(cast(Profiles.profile_data["verify"], Text) == "true")
+        query = query.filter(Profiles.is_verified == True)
     elif filter_by_type == "not_verified":
-        query = query.filter(cast(Profiles.profile_data["verify"], Text) == "false")
+        query = query.filter(Profiles.is_verified == False)
     elif filter_by_type == "unknown":
         query = query.filter(Profiles.profile_data.is_(None))
     elif filter_by_type == "clone_account":
         query = query.filter(Profiles.main_profile == False)
 
     # Apply pagination
-    count = query.count()
-
-    if per_page:
-        query = query.limit(per_page)
-    if page:
-        query = query.offset(per_page * (page - 1))
-    profiles = query.all()
+    profiles, details = pagination_util.paginate(
+        query,
+        page,
+        per_page,
+        cursor=cursor,
+        count=count,
+        keyset=[Profiles.created_at, Profiles.profile_id],
+        # Same order as the pages, sort_order is not applied to profiles
+        sort_order="asc",
+        scope=teams_id,
+    )
     # Formatting the result
     formatted_result = [profile.repr_data() for profile in profiles]
-    return {
-        "profiles": formatted_result,
-        "result_count": count,
-        "max_pages": math.ceil(count / per_page),
-    }
+    return {"profiles": formatted_result, **details}
 
 
 def get_user_profiles(user_id):
@@ -139,9 +143,10 @@ def get_user_profiles(user_id):
     return {"profiles": formatted_result}
 
 
-def update_profile(profile_id, data):
+def update_profile(profile_id, data, teams_id=None):
     profile = Profiles.query.get(profile_id)
     if profile:
+        previous_owner = profile.owner
         for key, value in data.items():
             if key == "username":
                 continue
@@ -152,19 +157,27 @@ def update_profile(profile_id, data):
                 setattr(profile, key, value)
         profile.modified_at = datetime.datetime.utcnow()
         db.session.flush()
+        groups_services.refresh_profile_counts({previous_owner, profile.owner})
+        cache_services.invalidate(cache_services.PROFILES, teams_id=teams_id)
+        if teams_id:
+            dispatch_services.sync_profile(teams_id, profile, previous_owner)
         return profile
     return None
 
 
-def delete_profile(profile_id, user_id, device_id):
+def delete_profile(profile_id, user_id, device_id, teams_id=None):
     profile = Profiles.query.get(profile_id)
     profile.is_disable = True
     profile.hma_profile_id = ""
+    if teams_id:
+        dispatch_services.sync_profile(teams_id, profile)
     # Events.query.filter_by(profile_id=profile_id).delete()
     # Events.query.filter_by(profile_id_interact=profile_id).delete()
     # Posts.query.filter_by(profile_id=profile_id).delete()
     # db.session.delete(profile)
     db.session.flush()
+    groups_services.refresh_profile_counts([profile.owner])
+    cache_services.invalidate(cache_services.PROFILES, teams_id=teams_id)
     return True
 
 
@@ -0,0 +1,32 @@
+"""Services for the text search of listings, backed by pg_trgm indexes."""
+
+import logging
+
+from sqlalchemy import func, or_
+
+# Create module log
+_logger = logging.getLogger(__name__)
+
+
+def escape_like(term):
+    """Search term as a literal ILIKE pattern, % and _ included."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_filter(columns, term):
+    """
+    Substring match of the term on any of the columns. Each column has a
+    gin_trgm_ops index, postgres combines them with a BitmapOr instead of
+    scanning the table.
+    """
+    # Terms under 3 characters have no trigram and still scan the table
+    pattern = f"%{escape_like(term)}%"
+    return or_(*[column.ilike(pattern, escape="\\") for column in columns])
+
+
+def search_rank(columns, term):
+    """
+    Relevance of a row: the best word_similarity of the term over the
+    columns, 1 for a whole word match. NULL columns are ignored.
+    """
+    return func.greatest(*[func.word_similarity(term, column) for column in columns])
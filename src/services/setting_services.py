@@ -1,7 +1,9 @@
 from src import db, app
 from src.models import Settings
+from src.services import cache_services
 
 
+@cache_services.tenant_cached(cache_services.SETTINGS)
 def get_settings_by_user_device(user_id, device_id):
     """Retrieve settings for a specific user and device."""
     settings_record = (
@@ -29,6 +31,7 @@ def create_or_update_settings(user_id, device_id, settings_data):
         db.session.add(settings_record)
 
     db.session.flush()
+    cache_services.invalidate(cache_services.SETTINGS)
     return settings_record.repr_name()
 
 
@@ -39,6 +42,7 @@ def delete_settings(user_id, device_id):
     ).first()
     if settings_record:
         db.session.delete(settings_record)
+        cache_services.invalidate(cache_services.SETTINGS)
         db.session.commit()
         return True
     return False
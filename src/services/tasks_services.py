@@ -1,7 +1,9 @@
 from src import db, app
 from src.models import Task
+from src.services import cache_services
 
 
+@cache_services.tenant_cached(cache_services.TASKS)
 def get_all_tasks():
     """Retrieve all tasks."""
     task_names = ["Check follow", "newsFeed", "Login", "Lấy cookie", "reUpPost"]
@@ -16,6 +18,7 @@ def create_task(data):
         tasks_name=data["tasks_name"], tasks_json=data.get("tasks_json", {})
     )
     db.session.add(new_task)
+    cache_services.invalidate(cache_services.TASKS)
     db.session.commit()
     return new_task
 
@@ -26,6 +29,7 @@ def update_task(task_id, data):
     if task:
         task.tasks_name = data.get("tasks_name", task.tasks_name)
         task.tasks_json = data.get("tasks_json", task.tasks_json)
+        cache_services.invalidate(cache_services.TASKS)
         db.session.commit()
     return task
 
@@ -35,6 +39,7 @@ def delete_task(task_id):
     task = Task.query.filter_by(tasks_id=task_id).first()
     if task:
         db.session.delete(task)
+        cache_services.invalidate(cache_services.TASKS)
         db.session.commit()
         return True
     return False
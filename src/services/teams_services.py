@@ -11,6 +11,7 @@ from src import db, app
 from src.models.teams import Teams
 from src.models.user_teams_mapping import UserTeamsMapping
 from src.services import user_services, migration_services
+from src.utilities import pagination_util
 
 # Create module log
 _logger = logging.getLogger(__name__)
@@ -107,7 +108,13 @@ def update_query(query, model, filters=None, throw_error=True):
 
 
 def fetch_teams(
-    page=0, per_page=20, sort_by="teams_name", sort_order="asc", filters=None
+    page=0,
+    per_page=20,
+    sort_by="teams_name",
+    sort_order="asc",
+    filters=None,
+    cursor=None,
+    count=None,
 ):
     """Fetch teams data based on sort and filters.
 
@@ -116,6 +123,10 @@ def fetch_teams(
     :param str sort_by: Attribute to sort results by
     :param str sort_order: 'asc' to sort ascending and 'desc' for descending
     :param dict filters: Filters for fetching results. eg: {"owner": "xyz"}
+    :param str cursor: When given, keyset pages on (created_at, teams_id)
+        and the result is {"data", "next_cursor", "result_count",
+        "max_pages"}, see pagination_util.paginate
+    :param str count: Count mode of keyset pages, see pagination_util.COUNT_MODES
     """
     # Check if sort_by key is valid
     column = getattr(Teams, sort_by, None)
@@ -131,6 +142,20 @@ def fetch_teams(
         # Apply sorting
         if sorting_order:
             query = query.order_by(text(sorting_order))
+        if cursor is not None:
+            # teams is a public table, cached counts are shared
+            result, details = pagination_util.paginate(
+                query,
+                per_page=per_page,
+                cursor=cursor,
+                count=count,
+                keyset=[Teams.created_at, Teams.teams_id],
+                sort_order=sort_order,
+                scope="public",
+            )
+            formatted_result = {"data": format_result(result), **details}
+            db.session.flush()
+            return True, formatted_result
         # Apply pagination
         if per_page:
             query = query.limit(per_page)
@@ -140,6 +165,8 @@ def fetch_teams(
         # Formatting the result
         formatted_result = format_result(result)
         db.session.flush()
+    except ValueError as err:
+        return False, {"Message": str(err)}
     except Exception as err:
         _logger.exception(err)
         db.session.rollback()
@@ -12,7 +12,7 @@ import pyotp
 import pyqrcode
 from cryptography.fernet import Fernet
 from flask_jwt_extended import create_refresh_token, get_jti, create_access_token
-from sqlalchemy import and_, func, text
+from sqlalchemy import and_, event, func, text
 from sqlalchemy.exc import SQLAlchemyError
 from itsdangerous import (
     TimedJSONWebSignatureSerializer as Serializer,
@@ -24,10 +24,10 @@ from sendgrid.helpers.mail import Mail
 
 from src import models
 from src import jwt
-from src import app, db
+from src import app, db, cache
 
 from src.enums.user_type import UserRoleEnums
-from src.services import teams_services, migration_services
+from src.services import teams_services, migration_services, groups_services
 from src.models import UserGroup, Groups, User
 from src.config import Config
 
@@ -397,6 +397,7 @@ def create_user_group_mapping(user_id, group_id):
     user_group_mapping.group_id = group_id
     db.session.add(user_group_mapping)
     db.session.flush()
+    groups_services.refresh_profile_counts([user_id])
 
 
 def extend_expired_date(user_id, expired_days):
@@ -405,6 +406,69 @@ def extend_expired_date(user_id, expired_days):
         expired_at = datetime.datetime.utcnow() + datetime.timedelta(days=expired_days)
         user.expired_at = expired_at
         db.session.flush()
+        invalidate_user_expired_at(user_id)
+
+
+# session.info key of the user_id whose cached expiry is dropped on commit
+_PENDING_EXPIRY_KEY = "pending_user_expiry_invalidations"
+
+
+def _expired_at_cache_key(user_id):
+    return f"user_expired_at:{user_id}"
+
+
+def get_user_expired_at(user_id, teams_id):
+    """
+    Expiry date of a user for custom_jwt_required. Served from the cache
+    for USER_EXPIRY_CACHE_TTL seconds so polling clients do not load the
+    user row on every request; None if the user does not exist.
+    """
+    cache_key = _expired_at_cache_key(user_id)
+    try:
+        expired_at = cache.get(cache_key)
+        if expired_at:
+            return expired_at
+    except Exception as e:
+        _logger.exception(e)
+
+    user = db.session.query(User).filter(User.user_id == user_id).first()
+    if not user:
+        return None
+    if not user.expired_at:
+        user.expired_at = user.created_at + datetime.timedelta(days=30)
+        db.session.commit()
+        migration_services.set_search_path(teams_id)
+    expired_at = user.expired_at
+
+    try:
+        cache.set(cache_key, expired_at, timeout=app.config["USER_EXPIRY_CACHE_TTL"])
+    except Exception as e:
+        _logger.exception(e)
+    return expired_at
+
+
+def invalidate_user_expired_at(user_id):
+    """
+    Drop the cached expiry once the transaction commits, so admin changes
+    apply on the next request and no read in between caches the old value.
+    """
+    db.session.info.setdefault(_PENDING_EXPIRY_KEY, set()).add(user_id)
+
+
+@event.listens_for(db.session, "after_commit")
+def _drop_expired_at(session):
+    for user_id in session.info.pop(_PENDING_EXPIRY_KEY, ()):
+        try:
+            cache.delete(_expired_at_cache_key(user_id))
+        except Exception as e:
+            _logger.exception(e)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard_expired_at(session, previous_transaction):
+    # A savepoint rollback keeps the writes of the outer transaction
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_EXPIRY_KEY, None)
 
 
 def update_user(
@@ -439,6 +503,7 @@ def update_user(
         user.password = password
 
     db.session.flush()
+    invalidate_user_expired_at(user.user_id)
     # Only map the new role, if it doesn't exist.
     if role_id:
         if not user.user_roles:
@@ -481,6 +546,7 @@ def delete_user(user_id, new_teams_owner):
         db.session.query(models.User).filter(models.User.user_id == user_id).delete()
         data = {"Message": "User successfully deleted"}
         db.session.flush()
+        invalidate_user_expired_at(user_id)
     except Exception as e:
         _logger.exception(e)
         db.session.rollback()
@@ -1022,7 +1088,13 @@ def delete_user_teams_mapping(user_id, teams_id):
 
 
 def delete_user_group_mapping(user_id):
+    group_ids = [
+        mapping.group_id
+        for mapping in UserGroup.query.filter(UserGroup.user_id == user_id).all()
+    ]
     models.UserGroup.query.filter(models.UserGroup.user_id == user_id).delete()
+    if group_ids:
+        groups_services.refresh_profile_counts(group_ids=group_ids)
 
 
 def delete_user_all_teams_mapping(user_id):
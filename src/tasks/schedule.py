@@ -1,111 +1,75 @@
-from src import db, celery
-from src.views.groups import GroupViews
-from src.models import Groups, Profiles
-from sqlalchemy import update
+from src import app, db, celery
+from src.services import counter_services, groups_services
+from src.services import event_partition_services, maintenance_services
+from src.tasks import tenant_jobs
 
+# Tables read by update_click, it is skipped for the tenants where none was
+# written since its last run
+RECONCILE_WATCHED_TABLES = ("events", "profiles", "user_group")
 
-@celery.task
-def clear_dead_tuple(*args, **kwargs):
-    print("VACUUM start")
-    try:
-        with db.app.app_context():
-            teams_id = "01cd2da0-3fe2-4335-a689-1bc482ad7c52"
-
-            # Use a context manager for the session to ensure proper handling
-            with db.session.begin(subtransactions=True):
-                # Set the search path
-                db.session.execute(
-                    "SET search_path TO public, 'cs_" + str(teams_id) + "'"
-                )
 
-                # Commit the changes before running VACUUM
-                db.session.commit()
+@celery.task
+def maintain_tables(*args, **kwargs):
+    """
+    Daily: VACUUM (ANALYZE) or ANALYZE the tenant tables autovacuum is
+    behind on and keep the storage parameters of the hot tables tuned.
+    The actions are returned by tenant.
+    """
+    with db.app.app_context():
+        return tenant_jobs.run_for_tenants(
+            "maintain_tables",
+            maintenance_services.maintain_tables,
+            concurrency=app.config["MAINTENANCE_CONCURRENCY"],
+        )
 
-                # Run VACUUM on each table
-                tables = [
-                    "groups",
-                    "auth_token_blacklist",
-                    "posts",
-                    "tasks",
-                    "mission_instance",
-                    "events",
-                    "profiles",
-                ]
 
-                for table in tables:
-                    statement = text(
-                        'VACUUM "cs_01cd2da0-3fe2-4335-a689-1bc482ad7c52".' + table
-                    )
-                    db.session.execute(statement)
+@celery.task
+def update_click(*args, **kwargs):
+    """
+    Reconcile the group counts maintained at event-ingest and
+    profile-change time with today's events and profiles.
+    """
+    today = counter_services.local_today()
 
-            print("VACUUM OK")
+    def reconcile(teams_id):
+        groups_services.refresh_profile_counts()
+        groups_services.reconcile_click_counts(today)
 
-    except Exception as e:
-        print(e)
+    with db.app.app_context():
+        return tenant_jobs.run_for_tenants(
+            "update_click", reconcile, watch=RECONCILE_WATCHED_TABLES
+        )
 
 
-@celery.task
-def update_click(*args, **kwargs):
-    teams_id = "01cd2da0-3fe2-4335-a689-1bc482ad7c52"
-    print("Update start")
-    with db.app.app_context():
-        db.session.execute("SET search_path TO public, 'cs_" + str(teams_id) + "'")
-        groups = GroupViews.query.filter().all()
-        """
-        total_profiles = db.Column(db.Integer)
-        profile_giver = db.Column(db.Integer)
-        profile_receiver = db.Column(db.Integer)
-        total_clicks_giver = db.Column(db.Integer)
-        total_clicks_receiver = db.Column(db.Integer)
-        """
-        for item in groups:
-            stmt = (
-                update(Groups)
-                .where(Groups.group_id == item.group_id)
-                .values(
-                    click_count=item.total_clicks_giver,
-                    receiver_count=item.total_clicks_receiver,
-                    profile_receiver_count=item.profile_receiver,
-                    profile_giver_count=item.profile_giver,
-                )
-            )
+@celery.task(bind=True)
+def reset_click(self, *args, **kwargs):
+    """
+    Daily reset of the profile counters at midnight (TEAMS_TIMEZONE), one
+    chunked UPDATE per tenant. Progress is published as task state.
+    """
+    day = counter_services.local_today()
 
-            db.session.execute(stmt)
-            db.session.flush()
-        db.session.commit()
-        print("Update ok")
-        return True
+    def reset(teams_id):
+        result = counter_services.reset_daily_counters(teams_id, day=day)
+        groups_services.reset_daily_counts(day)
+        return result
 
+    def progress(done, total):
+        self.update_state(
+            state="PROGRESS", meta={"done": done, "total": total, "day": str(day)}
+        )
 
-@celery.task
-def reset_click(*args, **kwargs):
-    teams_id = "01cd2da0-3fe2-4335-a689-1bc482ad7c52"
     with db.app.app_context():
-        db.session.execute("SET search_path TO public, 'cs_" + teams_id + "'")
-        # Update operation to set click_count to zero for all profiles
-        profiles = db.session.query(Profiles.profile_id).filter().all()
-        for profile in profiles:
-            reset_profile_click.apply_async(args=[profile.profile_id])
-        return True
+        return tenant_jobs.run_for_tenants("reset_click", reset, on_done=progress)
 
 
 @celery.task
-def reset_profile_click(*args, **kwargs):
-    try:
-        profile_id = args[0] if args else None
-        teams_id = "01cd2da0-3fe2-4335-a689-1bc482ad7c52"
-        with db.app.app_context():
-            db.session.execute("SET search_path TO public, 'cs_" + teams_id + "'")
-            profile = Profiles.query.filter_by(profile_id=profile_id).first()
-            if profile:
-                profile.click_count = 0
-                profile.comment_count = 0
-                profile.like_count = 0
-                profile.today_post_count = 0
-                db.session.flush()
-                db.session.commit()
-                print(f"reset_click_count {profile.username}")
-                return True
-            print(f"reset_click_count failed, profile not found")
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
+def maintain_event_partitions(*args, **kwargs):
+    """
+    Hourly: keep the daily events partitions ahead of time, refresh the
+    daily_profile_event_stats rollup and detach the expired partitions.
+    """
+    with db.app.app_context():
+        return tenant_jobs.run_for_tenants(
+            "maintain_event_partitions", event_partition_services.maintain_partitions
+        )
@@ -0,0 +1,160 @@
+import concurrent.futures
+import datetime
+import time
+from collections import Counter
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from src import app, db
+from src.config import Config
+from src.log_config import _logger
+from src.models import TenantJobRun
+from src.services import migration_services
+
+OK = "ok"
+ERROR = "error"
+SKIPPED = "skipped"
+
+# Rows written per tenant schema to some tables since the statistics reset,
+# the partitions (events) counted with their parent table
+ACTIVITY_QUERY = text(
+    """
+    SELECT s.schemaname,
+        SUM(s.n_tup_ins + s.n_tup_upd + s.n_tup_del) AS writes
+    FROM pg_stat_user_tables s
+    LEFT JOIN pg_inherits i ON i.inhrelid = s.relid
+    LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+    WHERE s.schemaname = ANY(:schemas)
+    AND COALESCE(parent.relname, s.relname) = ANY(:tables)
+    GROUP BY s.schemaname
+    """
+)
+
+
+def get_teams_ids():
+    """teams_id of every tenant schema."""
+    schemas = db.session.execute(Config.GET_ALL_SCHEMAS_QUERY).fetchall()
+    return [schema.schema_name[len("cs_") :] for schema in schemas]
+
+
+def tenant_writes(teams_ids, tables):
+    """Rows written to the tables by tenant, see ACTIVITY_QUERY."""
+    rows = db.session.execute(
+        ACTIVITY_QUERY,
+        {
+            "schemas": [f"cs_{teams_id}" for teams_id in teams_ids],
+            "tables": list(tables),
+        },
+    )
+    return {row.schemaname[len("cs_") :]: int(row.writes) for row in rows}
+
+
+def last_writes(job_name):
+    """writes_seen of the last ok run of the job in the current schema."""
+    return (
+        db.session.query(TenantJobRun.writes_seen)
+        .filter(TenantJobRun.job_name == job_name)
+        .scalar()
+    )
+
+
+def record_run(job_name, teams_id, started_at, run, writes):
+    """Upsert the tenant_job_runs row of the job in the tenant schema."""
+    migration_services.set_search_path(teams_id)
+    table = TenantJobRun.__table__
+    statement = insert(table).values(
+        job_name=job_name,
+        status=run["status"],
+        started_at=started_at,
+        duration_ms=run["duration_ms"],
+        error=run.get("error"),
+        # A failed run is retried on the next one whatever the activity
+        writes_seen=writes if run["status"] == OK else None,
+        run_count=1,
+        error_count=int(run["status"] == ERROR),
+        skip_count=int(run["status"] == SKIPPED),
+    )
+    columns = ["status", "started_at", "duration_ms", "error"]
+    if run["status"] != SKIPPED:
+        columns.append("writes_seen")
+    update = {column: statement.excluded[column] for column in columns}
+    for column in ("run_count", "error_count", "skip_count"):
+        update[column] = table.c[column] + statement.excluded[column]
+    db.session.execute(
+        statement.on_conflict_do_update(index_elements=[table.c.job_name], set_=update)
+    )
+
+
+def _run_tenant(job_name, job, teams_id, writes, skip_inactive):
+    with app.app_context():
+        started_at = datetime.datetime.utcnow()
+        start = time.perf_counter()
+        run = {"teams_id": teams_id, "status": OK}
+        try:
+            migration_services.set_search_path(teams_id)
+            if skip_inactive and writes is not None and writes == last_writes(job_name):
+                run["status"] = SKIPPED
+            else:
+                run["result"] = job(teams_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            _logger.exception(e)
+            run.update(status=ERROR, error=str(e))
+        run["duration_ms"] = round((time.perf_counter() - start) * 1000)
+        try:
+            record_run(job_name, teams_id, started_at, run, writes)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            _logger.exception(e)
+        finally:
+            db.session.remove()
+        return run
+
+
+def run_for_tenants(job_name, job, watch=None, on_done=None, concurrency=None):
+    """
+    Run job(teams_id) for every tenant schema, concurrency (default
+    TENANT_JOB_CONCURRENCY) tenants at a time, each in its own session and
+    transaction with the search path of the tenant set. With watch (table
+    names) the tenants whose tables had no writes since the last ok run of
+    the job are skipped. Each run is recorded in the tenant_job_runs of the
+    tenant and on_done(done, total) called as the tenants complete.
+
+    Returns the runs (teams_id, status, duration_ms, result or error).
+    """
+    start = time.perf_counter()
+    teams_ids = get_teams_ids()
+    writes = tenant_writes(teams_ids, watch) if watch and teams_ids else {}
+    # The threads use sessions of their own
+    db.session.commit()
+
+    runs = []
+    if concurrency is None:
+        concurrency = app.config["TENANT_JOB_CONCURRENCY"]
+    workers = max(1, min(concurrency, len(teams_ids)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _run_tenant,
+                job_name,
+                job,
+                teams_id,
+                writes.get(teams_id),
+                watch is not None,
+            )
+            for teams_id in teams_ids
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            runs.append(future.result())
+            if on_done:
+                on_done(len(runs), len(teams_ids))
+
+    statuses = Counter(run["status"] for run in runs)
+    _logger.info(
+        f"{job_name}: {len(runs)} tenants in {time.perf_counter() - start:.1f}s "
+        f"{dict(statuses)}"
+    )
+    return runs
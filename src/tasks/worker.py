@@ -1,12 +1,12 @@
 from src.services import (
+    counter_services,
     profiles_services,
     migration_services,
     mission_services,
     setting_services,
 )
-from src.services.profiles_services import create_profile
 from src.log_config import _logger
-from src import db, executor
+from src import db
 
 
 def delete_missions_schedule(mission_id, teams_id):
@@ -17,34 +17,15 @@ def delete_missions_schedule(mission_id, teams_id):
     _logger.debug("Delete mission ok")
 
 
-def create_profiles(profiles, user_id, device_id, teams_id, hma_token, browser_version):
-    success_number = 0
-    error_number = 0
-
-    for data in profiles:
-        data["owner"] = user_id  # set owner
-        data["user_access"] = user_id
-        executor.submit(
-            create_profile,
-            data,
-            device_id,
-            user_id,
-            hma_token,
-            browser_version,
-            teams_id,
-        )
-    return True
-
-
 def delete_profile(profile_id, user_id, device_id, teams_id):
     migration_services.set_search_path(teams_id)
-    profiles_services.delete_profile(profile_id, user_id, device_id)
+    profiles_services.delete_profile(profile_id, user_id, device_id, teams_id)
     db.session.commit()
 
 
 def update_profile(profile_id, teams_id, data):
     migration_services.set_search_path(teams_id)
-    profiles_services.update_profile(profile_id, data)
+    profiles_services.update_profile(profile_id, data, teams_id)
     db.session.commit()
 
 
@@ -64,7 +45,7 @@ def update_click_count(teams_id):
         f'            JOIN "groups" g ON g.group_id = ug.group_id \n'
         f"            JOIN events e ON e.profile_id_interact = p.profile_id \n"
         f"        WHERE\n"
-        f"            DATE(e.created_at) = CURRENT_DATE AND e.issue = 'OK'\n"
+        f"            e.created_at >= CURRENT_DATE AND e.created_at < CURRENT_DATE + 1 AND e.issue = 'OK'\n"
         f"        GROUP BY\n"
         f"            g.group_id \n"
         f"        HAVING\n"
@@ -81,7 +62,7 @@ def update_click_count(teams_id):
         f'            JOIN "groups" g ON g.group_id = ug.group_id \n'
         f"            JOIN events e ON e.profile_id  = p.profile_id \n"
         f"        WHERE\n"
-        f"            DATE(e.created_at) = CURRENT_DATE AND e.issue = 'OK'\n"
+        f"            e.created_at >= CURRENT_DATE AND e.created_at < CURRENT_DATE + 1 AND e.issue = 'OK'\n"
         f"        GROUP BY\n"
         f"            g.group_id \n"
         f"        HAVING\n"
@@ -110,11 +91,8 @@ def update_click_count(teams_id):
 
 def reset_click_count(teams_id):
     migration_services.set_search_path(teams_id)
-    # Update operation to set click_count to zero for all profiles
     try:
-        stmt = update(Profiles).values(click_count=0, comment_count=0, like_count=0)
-        db.session.execute(stmt)
-        db.session.commit()
+        counter_services.reset_daily_counters(teams_id)
     except Exception as e:
         db.session.rollback()
         _logger.error(e)
@@ -2,7 +2,7 @@ import os
 import logging
 
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime
 from flask import request
 from functools import wraps
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_claims, get_jwt_identity
@@ -10,7 +10,6 @@ from flask_jwt_extended.exceptions import NoAuthorizationError, InvalidHeaderErr
 from pydantic import ValidationError
 from jwt import ExpiredSignatureError
 from src import db
-from src.models import User
 from src.services import user_services
 
 _logger = logging.getLogger(__name__)
@@ -37,23 +36,11 @@ def custom_jwt_required():
                 if is_admin:
                     return fn(*args, **kwargs)
 
-                user = (
-                    db.session.query(User)
-                    .filter(User.user_id == claims["user_id"])
-                    .first()
+                expired_at = user_services.get_user_expired_at(
+                    claims["user_id"], claims["teams_id"]
                 )
-
-                if not user.expired_at:
-                    expired_at = user.created_at + timedelta(days=30)
-                    user.expired_at = expired_at
-                    db.session.commit()
-                    db.session.execute(
-                        "SET search_path TO public, 'cs_"
-                        + str(claims["teams_id"])
-                        + "'"
-                    )
-                else:
-                    expired_at = user.expired_at
+                if not expired_at:
+                    return {"message": "Not authorized"}, 401
 
                 if datetime.utcnow() < expired_at:
                     return fn(*args, **kwargs)
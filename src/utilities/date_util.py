@@ -32,3 +32,21 @@ def convert_timezone(timestamp, source_tz_string, target_tz_string):
     target_tz = tz.gettz(target_tz_string)
     datetime_obj = datetime_obj.replace(tzinfo=source_tz)
     return datetime_obj.astimezone(target_tz)
+
+def get_local_today(tz_string: str):
+    """Current date in the given timezone"""
+    return datetime.now(tz.gettz(tz_string)).date()
+
+def get_utc_day_bounds(day, tz_string: str):
+    """
+    Naive UTC datetimes of the start and the end of a local day, to filter
+    timestamp columns by range instead of by DATE(...)
+    """
+    local_tz = tz.gettz(tz_string)
+    start = datetime(day.year, day.month, day.day, tzinfo=local_tz)
+    end = start + timedelta(days=1)
+    utc = tz.tzutc()
+    return (
+        start.astimezone(utc).replace(tzinfo=None),
+        end.astimezone(utc).replace(tzinfo=None),
+    )
@@ -0,0 +1,52 @@
+import logging
+
+from sqlalchemy import event
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    postfork = None
+
+_logger = logging.getLogger(__name__)
+
+RESET_SEARCH_PATH = "SET search_path TO public"
+
+
+def reset_search_path(dbapi_connection):
+    """
+    Put a pooled connection back on the public schema. The SET is committed
+    so a later rollback cannot bring back the previous tenant search path.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(RESET_SEARCH_PATH)
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
+
+
+def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    reset_search_path(dbapi_connection)
+
+
+def on_checkin(dbapi_connection, connection_record):
+    if dbapi_connection is None:
+        return
+    try:
+        reset_search_path(dbapi_connection)
+    except Exception as ex:
+        # Broken connections are replaced on the next checkout pre-ping
+        _logger.warning(f"Reset search_path on checkin failed: {ex}")
+        connection_record.invalidate(ex)
+
+
+def register_tenant_pool(engine):
+    """
+    Make a pooled engine safe for schema-per-tenant requests: every
+    connection starts and ends on the public schema, and connections
+    inherited from the uWSGI master are dropped after fork.
+    """
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+    if postfork:
+        postfork(engine.dispose)
@@ -1,3 +1,7 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+
 def copy_entity_row(model, row, *model_args):
     # Make a copy of the original object
     new_row = model(*model_args)
@@ -7,3 +11,30 @@ def copy_entity_row(model, row, *model_args):
         setattr(new_row, attr, getattr(row, attr))
 
     return new_row
+
+
+def repr_loader_options(model, parent=None):
+    """
+    Loader options for the relationships read by model.repr_name, as
+    declared in model.repr_relationships: joinedload for a many-to-one
+    (one query), selectinload for a collection (one more query per
+    relationship and not per row). The related models' own declarations
+    are followed.
+
+    Usage: query.options(*repr_loader_options(Events))
+    """
+    options = []
+    mapper = inspect(model)
+    for name in getattr(model, "repr_relationships", ()):
+        relationship = mapper.relationships[name]
+        attribute = getattr(model, name)
+        if parent is None:
+            load = selectinload if relationship.uselist else joinedload
+        else:
+            load = (
+                parent.selectinload if relationship.uselist else parent.joinedload
+            )
+        loader = load(attribute)
+        options.append(loader)
+        options.extend(repr_loader_options(relationship.mapper.class_, loader))
+    return options
@@ -0,0 +1,166 @@
+"""Offset and keyset pagination of queries, with optional counts."""
+
+import base64
+import datetime
+import hashlib
+import json
+import math
+
+from sqlalchemy import literal, tuple_
+
+from src import app, db, cache
+
+# exact: COUNT(*) of the filters, cached: the same kept PAGINATION_COUNT_TTL
+# per tenant and filters, estimate: rows expected by the planner, none: no count
+COUNT_MODES = ("exact", "cached", "estimate", "none")
+
+
+def encode_cursor(values):
+    """Opaque cursor of the keyset values of the last row of a page."""
+    values = [
+        value.isoformat() if isinstance(value, datetime.datetime) else value
+        for value in values
+    ]
+    # default=str for uuid keys
+    return base64.urlsafe_b64encode(
+        json.dumps(values, default=str).encode()
+    ).decode()
+
+
+def decode_cursor(cursor, columns):
+    """Keyset values of a cursor, ValueError when it is not one of ours."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+    decoded = []
+    for column, value in zip(columns, values):
+        if isinstance(column.type, db.DateTime) and value is not None:
+            try:
+                value = datetime.datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def estimate_count(query):
+    """Rows the planner expects for the query, from EXPLAIN, without running it."""
+    compiled = query.order_by(None).statement.compile(dialect=db.engine.dialect)
+    plan = (
+        db.session.connection()
+        .exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params)
+        .scalar()
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_cache_key(query, scope):
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    digest = hashlib.sha1(
+        (str(compiled) + repr(sorted(compiled.params.items()))).encode()
+    ).hexdigest()
+    return f"count:{scope}:{digest}"
+
+
+def count_rows(query, mode="exact", scope=None):
+    """
+    Count of the query in the given COUNT_MODES mode, None for "none".
+    Cached counts are kept per scope (the teams_id of the tenant schema),
+    without a scope they are not cached.
+    """
+    if mode == "none":
+        return None
+    query = query.order_by(None)
+    if mode == "estimate":
+        return estimate_count(query)
+    if mode == "cached" and scope is not None:
+        cache_key = _count_cache_key(query, scope)
+        count = cache.get(cache_key)
+        if count is None:
+            count = query.count()
+            cache.set(cache_key, count, timeout=app.config["PAGINATION_COUNT_TTL"])
+        return count
+    return query.count()
+
+
+def keyset_page(query, columns, cursor, per_page, sort_order="desc"):
+    """
+    Rows after the cursor, ordered on the keyset columns (a timestamp and
+    the primary key as tie breaker), and the cursor of the next page. The
+    row comparison lets postgres start from the index instead of skipping
+    the previous pages.
+    """
+    descending = sort_order.lower() == "desc"
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        after = tuple_(
+            *[literal(value, column.type) for column, value in zip(columns, values)]
+        )
+        query = query.filter(key < after if descending else key > after)
+    query = query.order_by(None).order_by(
+        *[column.desc() if descending else column.asc() for column in columns]
+    )
+    rows = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return rows, next_cursor
+
+
+def paginate(
+    query,
+    page=None,
+    per_page=None,
+    cursor=None,
+    count=None,
+    keyset=None,
+    sort_order="desc",
+    scope=None,
+):
+    """
+    Page of a query and its pagination details.
+
+    Offset mode (cursor is None) keeps page / per_page and counts exactly
+    by default. Keyset mode starts with an empty cursor, follows the
+    returned next_cursor and skips the count by default.
+
+    :param query: Filtered and sorted query
+    :param int page: Page number, offset mode
+    :param int per_page: Page size
+    :param str cursor: next_cursor of the previous page, "" for the first one
+    :param str count: One of COUNT_MODES
+    :param list keyset: Columns of the keyset, e.g. [created_at, id]
+    :param str sort_order: 'asc' or 'desc', keyset mode
+    :param scope: Tenant of cached counts
+    :return: (rows, {"result_count", "max_pages"[, "next_cursor"]})
+    """
+    if count is not None and count not in COUNT_MODES:
+        raise ValueError("Invalid count mode")
+    if cursor is not None:
+        per_page = per_page or app.config["PAGINATION_DEFAULT_PER_PAGE"]
+        rows, next_cursor = keyset_page(query, keyset, cursor, per_page, sort_order)
+        result_count = count_rows(query, count or "none", scope)
+        details = {"next_cursor": next_cursor}
+    else:
+        result_count = count_rows(query, count or "exact", scope)
+        if per_page:
+            query = query.limit(per_page)
+        if page:
+            query = query.offset(per_page * (page - 1))
+        rows = query.all()
+        details = {}
+    details["result_count"] = result_count
+    details["max_pages"] = (
+        math.ceil(result_count / per_page)
+        if result_count is not None and per_page
+        else None
+    )
+    return rows, details
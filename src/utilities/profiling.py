@@ -0,0 +1,167 @@
+import logging
+import os
+import threading
+import time
+
+from flask import request
+from sqlalchemy import event
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+_logger = logging.getLogger(__name__)
+
+# Statements per request
+SQL_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+# Rows returned per request
+SQL_ROWS_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+_metrics = {}
+_settings = {"slow_statement_seconds": None}
+_local = threading.local()
+
+
+def _create_metrics():
+    histogram = prometheus_client.Histogram
+    labels = ["endpoint", "method"]
+    return {
+        "duration": histogram(
+            "http_request_duration_seconds",
+            "Latency of the requests",
+            labels + ["status"],
+        ),
+        "sql_count": histogram(
+            "http_request_sql_statements",
+            "SQL statements per request",
+            labels,
+            buckets=SQL_COUNT_BUCKETS,
+        ),
+        "sql_time": histogram(
+            "http_request_sql_seconds", "Database time per request", labels
+        ),
+        "sql_rows": histogram(
+            "http_request_sql_rows",
+            "Rows returned by the statements of a request",
+            labels,
+            buckets=SQL_ROWS_BUCKETS,
+        ),
+        # Per request like the others: a gauge would only keep the value of
+        # the last request of each worker
+        "slowest": histogram(
+            "http_request_slowest_sql_seconds",
+            "Slowest statement per request",
+            labels,
+        ),
+        "cache": prometheus_client.Counter(
+            "tenant_cache_requests",
+            "Reads of the cached listings by outcome",
+            ["namespace", "outcome"],
+        ),
+    }
+
+
+def enabled():
+    return bool(_metrics)
+
+
+def _endpoint():
+    # The route template, not the path, keeps the label values bounded
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def start_request():
+    _local.profile = {
+        "start": time.perf_counter(),
+        "sql_count": 0,
+        "sql_time": 0.0,
+        "sql_rows": 0,
+        "slowest": 0.0,
+        "slowest_statement": None,
+    }
+
+
+def end_request(response):
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        return response
+    _local.profile = None
+    labels = (_endpoint(), request.method)
+    _metrics["duration"].labels(*labels, response.status_code).observe(
+        time.perf_counter() - profile["start"]
+    )
+    _metrics["sql_count"].labels(*labels).observe(profile["sql_count"])
+    _metrics["sql_time"].labels(*labels).observe(profile["sql_time"])
+    _metrics["sql_rows"].labels(*labels).observe(profile["sql_rows"])
+    if profile["slowest_statement"] is not None:
+        _metrics["slowest"].labels(*labels).observe(profile["slowest"])
+        threshold = _settings["slow_statement_seconds"]
+        if threshold and profile["slowest"] >= threshold:
+            _logger.warning(
+                f"Slow statement {profile['slowest'] * 1000:.0f}ms on "
+                f"{request.method} {labels[0]}: "
+                f"{' '.join(profile['slowest_statement'].split())[:500]}"
+            )
+    return response
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, "profile", None) is not None:
+        conn.info.setdefault("profiling_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = getattr(_local, "profile", None)
+    starts = conn.info.get("profiling_start")
+    if profile is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    profile["sql_count"] += 1
+    profile["sql_time"] += elapsed
+    if cursor.rowcount > 0 and cursor.description is not None:
+        profile["sql_rows"] += cursor.rowcount
+    if elapsed > profile["slowest"]:
+        profile["slowest"] = elapsed
+        profile["slowest_statement"] = statement
+
+
+def count_cache(namespace, outcome):
+    """Read of a cache_services listing, counted when profiling is on."""
+    if _metrics:
+        _metrics["cache"].labels(namespace, outcome).inc()
+
+
+def render_metrics():
+    """
+    Metrics in the Prometheus text format and their content type. Under
+    uWSGI the workers write them to files in PROMETHEUS_MULTIPROC_DIR,
+    summed on each scrape.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    content_type = prometheus_client.CONTENT_TYPE_LATEST
+    return prometheus_client.generate_latest(registry), content_type
+
+
+def register_profiling(app, engine):
+    """
+    Record the latency, SQL statements, database time, rows and slowest
+    statement of every request by endpoint, for GET /metrics. The cost
+    is a few counters per statement and file-backed observations per
+    request, low enough to stay on in production.
+    """
+    if prometheus_client is None:
+        _logger.warning("prometheus_client is not installed, profiling is off")
+        return
+    if not _metrics:
+        _metrics.update(_create_metrics())
+    _settings["slow_statement_seconds"] = app.config["PROFILING_SLOW_SQL_MS"] / 1000
+    app.before_request(start_request)
+    app.after_request(end_request)
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
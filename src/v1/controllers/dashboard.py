@@ -1,9 +1,9 @@
 from flask_restx import Resource
+from flask_jwt_extended import get_jwt_claims
 
-from src import cache
-from src.utilities.custom_decorator import custom_jwt_required
+from src.utilities.custom_decorator import custom_jwt_required, super_admin_required
 from src.version_handler import api_version_1_web
-from src.services import dashboard_services  # You need to create this
+from src.services import cache_services, dashboard_services
 
 # Create a new namespace for the dashboard
 dashboard_ns = api_version_1_web.namespace(
@@ -15,13 +15,22 @@ dashboard_ns = api_version_1_web.namespace(
 class DashboardController(Resource):
     @dashboard_ns.response(200, "Success")
     @custom_jwt_required()  # or @custom_jwt_required() if you have a custom JWT decorator
-    @cache.cached(timeout=3600)
     def get(self):
         """Retrieve dashboard data"""
-        # Fetch data for the dashboard using a service
-        data = dashboard_services.get_dashboard_data()
+        # Fetch data for the dashboard using a service, cached per team
+        teams_id = get_jwt_claims()["teams_id"]
+        data = dashboard_services.get_dashboard_data(teams_id)
         return data, 200
 
 
+class CacheStatsController(Resource):
+    @dashboard_ns.response(200, "Success")
+    @super_admin_required()
+    def get(self):
+        """Hits and misses of the cached listings, of the worker answering"""
+        return cache_services.cache_stats(), 200
+
+
 # Registering the resource
 dashboard_ns.add_resource(DashboardController, "/")
+dashboard_ns.add_resource(CacheStatsController, "/cache")
@@ -3,6 +3,7 @@
 from flask_jwt_extended import get_jwt_claims
 from flask_restx import fields, Resource
 
+from src import app
 from src.parsers import page_parser, event_page_parser
 from src.services import events_services  # Import your events services
 from src.version_handler import api_version_1_web
@@ -25,6 +26,11 @@ event_model = events_ns.model(
     },
 )
 
+event_bulk_model = events_ns.model(
+    "EventBulkModel",
+    {"events": fields.List(fields.Nested(event_model), required=True)},
+)
+
 event_update_model = events_ns.model(
     "EventUpdateModel",
     {
@@ -56,15 +62,22 @@ class EventsController(Resource):
         search = args.get("search", "")
         receiver = args.get("receiver", "")
         giver = args.get("giver", "")
-        events = events_services.get_all_events(
-            page=page,
-            per_page=per_page,
-            sort_by=sort_by,
-            sort_order=sort_order,
-            search=search,
-            receiver_username=receiver,
-            giver_username=giver,
-        )
+        claims = get_jwt_claims()
+        try:
+            events = events_services.get_all_events(
+                page=page,
+                per_page=per_page,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                search=search,
+                receiver_username=receiver,
+                giver_username=giver,
+                cursor=args.get("cursor"),
+                count=args.get("count"),
+                teams_id=claims["teams_id"],
+            )
+        except ValueError as err:
+            return {"message": str(err)}, 400
         return events, 200
 
     @events_ns.expect(event_model)
@@ -83,6 +96,27 @@ class EventsController(Resource):
         return event.repr_name(), 201
 
 
+class EventsBulkController(Resource):
+    """Class for /events/bulk functionalities."""
+
+    @events_ns.expect(event_bulk_model)
+    @events_ns.response(201, "Events created")
+    @events_ns.response(400, "Bad Request")
+    @custom_jwt_required()
+    def post(self):
+        """Create many events in one request"""
+        data = events_ns.payload or {}
+        events = data.get("events")
+        if not isinstance(events, list) or not events:
+            return {"message": "events is required"}, 400
+        max_events = app.config["EVENTS_BULK_MAX_SIZE"]
+        if len(events) > max_events:
+            return {"message": f"At most {max_events} events per request"}, 400
+        claims = get_jwt_claims()
+        result = events_services.bulk_create_events(events, claims["teams_id"])
+        return result, 201
+
+
 class EventIdController(Resource):
     """Class for /events/<event_id> functionalities."""
 
@@ -123,4 +157,5 @@ class EventIdController(Resource):
 
 # Registering the resources
 events_ns.add_resource(EventsController, "/")
+events_ns.add_resource(EventsBulkController, "/bulk")
 events_ns.add_resource(EventIdController, "/<string:event_id>")
@@ -2,7 +2,8 @@
 from flask_restx import fields, Resource
 from flask_jwt_extended import get_jwt_claims
 
-from src.parsers import page_parser, profile_page_parse
+from src import app
+from src.parsers import page_parser, profile_page_parse, top_posts_parser
 from src.services import post_services
 from src.version_handler import api_version_1_web
 from src.utilities.custom_decorator import custom_jwt_required
@@ -26,6 +27,11 @@ post_model = posts_ns.model(
     },
 )
 
+post_bulk_model = posts_ns.model(
+    "PostBulkModel",
+    {"posts": fields.List(fields.Nested(post_model), required=True)},
+)
+
 post_update_model = posts_ns.model(
     "PostUpdateModel",
     {
@@ -56,9 +62,21 @@ class PostsController(Resource):
         sort_order = args.get("sort_order", "desc")
         search = args.get("search", "")
         profile_id = args.get("profile_id", "")
-        posts = post_services.get_all_posts(
-            page, per_page, sort_by, sort_order, search, profile_id
-        )
+        claims = get_jwt_claims()
+        try:
+            posts = post_services.get_all_posts(
+                page,
+                per_page,
+                sort_by,
+                sort_order,
+                search,
+                profile_id,
+                cursor=args.get("cursor"),
+                count=args.get("count"),
+                teams_id=claims["teams_id"],
+            )
+        except ValueError as err:
+            return {"message": str(err)}, 400
         return posts, 200
 
     @posts_ns.expect(post_model)
@@ -76,6 +94,50 @@ class PostsController(Resource):
         return post.repr_name(), 201
 
 
+class PostsBulkController(Resource):
+    """Class for /posts/bulk functionalities."""
+
+    @posts_ns.expect(post_bulk_model)
+    @posts_ns.response(200, "Posts upserted")
+    @posts_ns.response(400, "Bad Request")
+    @custom_jwt_required()
+    def post(self):
+        """Create or update many posts by tw_post_id in one request"""
+        data = posts_ns.payload or {}
+        posts = data.get("posts")
+        if not isinstance(posts, list) or not posts:
+            return {"message": "posts is required"}, 400
+        max_posts = app.config["POSTS_BULK_MAX_SIZE"]
+        if len(posts) > max_posts:
+            return {"message": f"At most {max_posts} posts per request"}, 400
+        claims = get_jwt_claims()
+        result = post_services.bulk_upsert_posts(posts, claims["user_id"])
+        return result, 200
+
+
+class TopPostsController(Resource):
+    """Class for /posts/top functionalities."""
+
+    @posts_ns.expect(top_posts_parser)
+    @posts_ns.response(200, "Success")
+    @posts_ns.response(400, "Bad Request")
+    @custom_jwt_required()
+    def get(self):
+        """Retrieve the posts with the highest metric in a posted_at window"""
+        args = top_posts_parser.parse_args()
+        try:
+            posts = post_services.get_top_posts(
+                metric=args.get("metric"),
+                profile_id=args.get("profile_id"),
+                start=args.get("start_date"),
+                end=args.get("end_date"),
+                limit=args.get("limit"),
+            )
+        except ValueError as err:
+            return {"message": str(err)}, 400
+        return posts, 200
+
+
 class PostIdController(Resource):
     """Class for /posts/<post_id> functionalities."""
 
@@ -117,4 +179,6 @@ class PostIdController(Resource):
 
 # Registering the resources
 posts_ns.add_resource(PostsController, "/")
+posts_ns.add_resource(PostsBulkController, "/bulk")
+posts_ns.add_resource(TopPostsController, "/top")
 posts_ns.add_resource(PostIdController, "/<string:tw_post_id>")
@@ -6,10 +6,11 @@ import random
 from flask_restx import fields, Resource
 from flask_jwt_extended import get_jwt_claims, get_jwt_identity
 
-from src import cache, executor, db
+from src import cache, db
 from src.services import profiles_services, setting_services
 from src.services import hma_services, teams_services
-from src.tasks.worker import create_profiles, delete_profile, update_profile
+from src.services import profile_import_services
+from src.tasks.worker import delete_profile, update_profile
 from src.utilities.custom_decorator import custom_jwt_required
 from src.v1.controllers.utils import make_cache_key
 from src.version_handler import api_version_1_web
@@ -121,9 +122,21 @@ class ProfilesController(Resource):
         group_id = args.get("group_id", "")
         filter_by_type = args.get("filter", "all")
         """Used to retrieve list of profiles"""
-        profiles = profiles_services.get_all_profiles(
-            page, per_page, sort_by, sort_order, search, user_id, filter_by_type
-        )
+        try:
+            profiles = profiles_services.get_all_profiles(
+                page,
+                per_page,
+                sort_by,
+                sort_order,
+                search,
+                user_id,
+                filter_by_type,
+                cursor=args.get("cursor"),
+                count=args.get("count"),
+                teams_id=claims["teams_id"],
+            )
+        except ValueError as err:
+            return {"message": str(err)}, 400
 
         return profiles, 200
 
@@ -181,11 +194,12 @@ class ProfilesController(Resource):
             return {"message": f"Vui lòng kiểm tra HMA account"}, 400
         if hma_token == "Account has been deleted":
             return {"message": "HMA account has been deleted"}, 400
-        account_info = hma_services.get_account_info(hma_token)
+        credentials = (hma_account, hma_password)
+        account_info = hma_services.get_account_info(hma_token, credentials)
         if account_info["code"] != 1:
             return {"message": f"Vui lòng kiểm tra HMA account"}, 400
         # profile_count = account_info["result"]["profiles"]
-        user_profiles = hma_services.get_hma_profiles(hma_token)
+        user_profiles = hma_services.get_hma_profiles(hma_token, credentials)
         if user_profiles == "Please check your HMA account":
             return {"message": "Vui lòng kiểm tra HMA account"}
 
@@ -196,16 +210,38 @@ class ProfilesController(Resource):
             return {
                 "message": f"Vui lòng nâng cấp tài khoản HMA {profile_count}/{max_profile}"
             }, 400
-        executor.submit(
-            create_profiles,
+        profile_import = profile_import_services.start_import(
             profiles,
             user_id,
             device_id,
             teams_id,
             hma_token,
             browser_version,
+            credentials=credentials,
+            hma_profiles=user_profiles,
         )
-        return {"message": f"Đang tạo tài khoản, vui lòng chờ trong giây lát"}, 200
+        return {
+            "message": f"Đang tạo tài khoản, vui lòng chờ trong giây lát",
+            "import_id": profile_import["import_id"],
+        }, 200
+
+
+class ProfilesImportController(Resource):
+    @profiles_ns2.response(
+        401,
+        "Authorization information is missing or invalid.",
+        unauthorized_response_model,
+    )
+    @custom_jwt_required()
+    def get(self, import_id):
+        """Progress and result of a profile import"""
+        claims = get_jwt_claims()
+        profile_import = profile_import_services.get_import(
+            claims.get("teams_id"), import_id
+        )
+        if not profile_import:
+            return {"message": "Import not found"}, 404
+        return profile_import, 200
 
 
 class ProfilesIdController(Resource):
@@ -227,10 +263,10 @@ class ProfilesIdController(Resource):
     def put(self, profile_id):
         """Update a profile by ID"""
         data = profiles_ns2.payload
-        # claims = get_jwt_claims()
-        # teams_id = claims.get("teams_id")
+        claims = get_jwt_claims()
+        teams_id = claims.get("teams_id")
         # executor.submit(update_profile, profile_id, teams_id, data)
-        profiles_services.update_profile(profile_id, data)
+        profiles_services.update_profile(profile_id, data, teams_id)
         return {"message": "Profile updated successfully"}, 200
 
     @profiles_ns2.response(
@@ -256,10 +292,7 @@ class ProfilesIdController(Resource):
             profile.hma_profile_id, user_id, device_id
         )
         if delete_status:
-            profile.is_disable = True
-            profile.hma_profile_id = ""
-            db.session.flush()
-            # executor.submit(delete_profile, profile_id, user_id, device_id, teams_id)
+            profiles_services.delete_profile(profile_id, user_id, device_id, teams_id)
             return {"message": "Profile deleted successfully"}, 200
         return {"message": "Profile deleted error, please check your HMA account"}, 500
 
@@ -300,22 +333,19 @@ class ProfilesBrowserController(Resource):
             # if not profile.browser_data or body_data != profile.tz_info:
             # profile.tz_info = body_data
             db.session.flush()
-            hma_account = settings.get("hideMyAccAccount")
-            hma_password = settings.get("hideMyAccPassword")
-            hma_token = hma_services.authenticate(hma_account, hma_password)
-            if not hma_token:
-                return {
-                    "message": "HMA account not found, please check your settings"
-                }, 400
-            if hma_token == "Account has been deleted":
-                return {"message": "Account has been deleted"}, 400
-            status, hma_result = hma_services.get_browser_data(
-                hma_token, profile.hma_profile_id, body_data
-            )
+            try:
+                status, hma_result = hma_services.get_cached_browser_data(
+                    settings.get("hideMyAccAccount"),
+                    settings.get("hideMyAccPassword"),
+                    profile.hma_profile_id,
+                    body_data,
+                )
+            except hma_services.HMAUnavailable as ex:
+                return {"message": str(ex)}, 503
             if not status:
-                return {"message": "HMA profile not found error"}, 400
+                return {"message": hma_result}, 400
 
-            browser_data = hma_result["result"]
+            browser_data = hma_result
 
         if not profile.debugger_port:
             debugger_port = random.randint(20000, 60000)
@@ -361,6 +391,7 @@ class ProfilesOfUserController(Resource):
 
 profiles_ns2.add_resource(ProfilesController, "/")
 profiles_ns2.add_resource(ProfilesIdController, "/<string:profile_id>")
+profiles_ns2.add_resource(ProfilesImportController, "/imports/<string:import_id>")
 profiles_ns2.add_resource(ProfilesByUserController, "/user/<string:user_id>")
 profiles_ns2.add_resource(ProfilesOfUserController, "/user")
 profiles_ns2.add_resource(ProfilesBrowserController, "/<string:profile_id>/browserdata")
@@ -206,6 +206,7 @@ class Teams(Resource):
             # Read any filters specified
             filters = json.loads(args.get("filter")) if args.get("filter") else None
             # Fetch results based on request parameters
+            cursor = args.get("cursor")
             if user_id == UserTypeEnums.SuperAdmin.value:
                 status, data = teams_services.fetch_teams(
                     page=page,
@@ -213,7 +214,12 @@ class Teams(Resource):
                     sort_by=sort_by,
                     sort_order=sort_order,
                     filters=filters,
+                    cursor=cursor,
+                    count=args.get("count"),
                 )
+                if status and cursor is not None:
+                    # Keyset pages carry their next_cursor
+                    return data, 200
             else:
                 status, data = teams_services.search_user_org_list(
                     user_id,
@@ -0,0 +1,51 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks are plain scripts, not unit tests. They need a real Postgres
+(and Redis where noted) configured through the usual runtime env variables,
+and they are run as modules, e.g.
+
+    python -m tests.benchmarks.bench_dispatch_pool --help
+"""
+
+import argparse
+import statistics
+import time
+
+
+def base_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--teams-id", required=True, help="Tenant whose schema is benchmarked"
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=200, help="Timed calls per scenario"
+    )
+    return parser
+
+
+def measure(fn, iterations, warmup=5):
+    """Call fn repeatedly and return the wall time of each call in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, samples):
+    print(
+        f"{name:<40} n={len(samples):<6} "
+        f"mean={statistics.mean(samples):8.2f}ms "
+        f"p50={percentile(samples, 50):8.2f}ms "
+        f"p95={percentile(samples, 95):8.2f}ms "
+        f"max={max(samples):8.2f}ms"
+    )
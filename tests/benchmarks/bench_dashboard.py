@@ -0,0 +1,128 @@
+"""Dashboard latency: grouped aggregates against the former per-user queries.
+
+Seeds synthetic users (mapped to the team) and profiles into an existing
+tenant, times both ways of computing the dashboard without the cache and
+deletes the seeded rows afterwards. Only run it against a development
+database:
+
+    python -m tests.benchmarks.bench_dashboard \
+        --teams-id <teams_id> --users 500 --profiles 50000 --iterations 20
+"""
+
+import random
+import uuid
+
+from sqlalchemy import text
+
+from src import db, app
+from src.models import Profiles, User, UserTeamsMapping
+from src.services import dashboard_services, migration_services
+from tests.benchmarks import base_parser, measure, report
+
+USERNAME_PREFIX = "bench_dashboard_"
+
+# The five queries get_summary used to issue for every user
+LEGACY_SUMMARY_QUERIES = [
+    "SELECT COUNT(*) FROM profiles WHERE owner = :owner",
+    """SELECT COUNT(username) FROM profiles WHERE owner = :owner
+    AND profile_data IS NOT NULL AND CAST(profile_data -> 'verify' AS TEXT) = 'true'
+    AND CAST(profile_data -> 'monetizable' AS TEXT) = 'false'
+    AND main_profile = FALSE AND is_disable = FALSE""",
+    """SELECT COUNT(username) FROM profiles WHERE owner = :owner
+    AND profile_data IS NOT NULL AND CAST(profile_data -> 'verify' AS TEXT) = 'false'
+    AND is_disable = FALSE""",
+    """SELECT COUNT(username) FROM profiles WHERE owner = :owner
+    AND profile_data IS NOT NULL
+    AND json_extract_path_text(profile_data, 'account_status') IN ('NotStarted', 'OK')
+    AND main_profile = TRUE AND is_disable = FALSE""",
+    """SELECT SUM((value::numeric)) FROM profiles p,
+    LATERAL json_array_elements_text(p.profile_data->'payouts') AS value
+    WHERE p.profile_data->'payouts' IS NOT NULL
+    AND json_array_length(p.profile_data->'payouts') > 1 AND p.owner = :owner""",
+]
+
+
+def seed(teams_id, users, profiles):
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    db.session.execute(
+        User.__table__.insert(),
+        [
+            {"user_id": user_id, "username": f"{USERNAME_PREFIX}{index}"}
+            for index, user_id in enumerate(user_ids)
+        ],
+    )
+    db.session.execute(
+        UserTeamsMapping.__table__.insert(),
+        [{"user_id": user_id, "teams_id": teams_id} for user_id in user_ids],
+    )
+    rows = []
+    for index in range(profiles):
+        rows.append(
+            {
+                "profile_id": str(uuid.uuid4()),
+                "username": f"{USERNAME_PREFIX}{index}",
+                "owner": random.choice(user_ids),
+                "main_profile": index % 10 == 0,
+                "is_disable": index % 50 == 0,
+                "profile_data": {
+                    "verify": random.random() < 0.8,
+                    "monetizable": random.random() < 0.3,
+                    "account_status": random.choice(["NotStarted", "OK", "ERROR"]),
+                    "payouts": [round(random.random() * 100, 2) for _ in range(3)],
+                },
+            }
+        )
+    for start in range(0, len(rows), 1000):
+        db.session.execute(Profiles.__table__.insert(), rows[start : start + 1000])
+    db.session.commit()
+    return user_ids
+
+
+def cleanup(user_ids):
+    Profiles.query.filter(Profiles.username.like(f"{USERNAME_PREFIX}%")).delete(
+        synchronize_session=False
+    )
+    UserTeamsMapping.query.filter(UserTeamsMapping.user_id.in_(user_ids)).delete(
+        synchronize_session=False
+    )
+    User.query.filter(User.user_id.in_(user_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def legacy_summaries(user_ids):
+    for user_id in user_ids:
+        for query in LEGACY_SUMMARY_QUERIES:
+            db.session.execute(text(query), {"owner": user_id}).scalar()
+
+
+def grouped_dashboard(teams_id):
+    dashboard_services.cache.delete(dashboard_services._dashboard_cache_key(teams_id))
+    dashboard_services.get_dashboard_data(teams_id)
+
+
+def main():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--profiles", type=int, default=50000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        migration_services.set_search_path(args.teams_id)
+        user_ids = seed(args.teams_id, args.users, args.profiles)
+        try:
+            migration_services.set_search_path(args.teams_id)
+            report(
+                f"per-user queries ({len(user_ids) * 5} queries)",
+                measure(lambda: legacy_summaries(user_ids), args.iterations, warmup=1),
+            )
+            report(
+                "grouped aggregates (3 queries)",
+                measure(lambda: grouped_dashboard(args.teams_id), args.iterations),
+            )
+        finally:
+            migration_services.set_search_path(args.teams_id)
+            cleanup(user_ids)
+
+
+if __name__ == "__main__":
+    main()
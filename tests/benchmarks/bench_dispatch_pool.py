@@ -0,0 +1,105 @@
+"""Poll latency of the dispatch pool against the ORDER BY random() SQL path.
+
+Seeds synthetic profiles into an existing tenant schema, times both ways of
+picking receiver/giver pairs and deletes the seeded rows afterwards. Only
+run it against a development database:
+
+    python -m tests.benchmarks.bench_dispatch_pool \
+        --teams-id <teams_id> --user-id <user_id> --profiles 5000
+"""
+
+import random
+import uuid
+
+from src import app, db
+from src.models import Profiles
+from src.services import dispatch_services, migration_services
+from src.services import mission_schedule_services
+from tests.benchmarks import base_parser, measure, report
+
+USERNAME_PREFIX = "bench_dispatch_"
+
+
+def seed_profiles(user_id, count):
+    rows = []
+    for index in range(count):
+        rows.append(
+            {
+                "profile_id": str(uuid.uuid4()),
+                "username": f"{USERNAME_PREFIX}{index}",
+                "owner": user_id,
+                "main_profile": index % 10 == 0,
+                "is_disable": False,
+                "click_count": random.randint(0, 320),
+                "status": "",
+                "profile_data": {"verify": True, "suspended": False},
+            }
+        )
+    for start in range(0, len(rows), 1000):
+        db.session.execute(Profiles.__table__.insert(), rows[start : start + 1000])
+    db.session.commit()
+
+
+def delete_profiles():
+    Profiles.query.filter(Profiles.username.like(f"{USERNAME_PREFIX}%")).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+
+
+def sql_path(user_id, threads):
+    receivers = mission_schedule_services.get_profile_with_event_count_below_limit_v2(
+        "clickAds", threads
+    )
+    mission_schedule_services.find_unique_interaction_partner_v2(
+        receivers, "clickAds", 1, user_id, threads
+    )
+
+
+def pool_path(teams_id, user_id, threads):
+    dispatch_services.get_dispatch_pairs(
+        teams_id,
+        "clickAds",
+        user_id,
+        threads,
+        receiver_owner_ids=mission_schedule_services.get_receiver_owner_ids(),
+    )
+
+
+def main():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument("--user-id", required=True, help="Owner of seeded profiles")
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=20)
+    args = parser.parse_args()
+
+    with app.app_context():
+        migration_services.set_search_path(args.teams_id)
+        seed_profiles(args.user_id, args.profiles)
+        try:
+            migration_services.set_search_path(args.teams_id)
+            build = measure(
+                lambda: dispatch_services.build_pools(args.teams_id),
+                iterations=5,
+                warmup=0,
+            )
+            report("pool rebuild", build)
+            report(
+                "sql path (ORDER BY random())",
+                measure(lambda: sql_path(args.user_id, args.threads), args.iterations),
+            )
+            report(
+                f"pool path ({app.config['DISPATCH_POOL_BACKEND']})",
+                measure(
+                    lambda: pool_path(args.teams_id, args.user_id, args.threads),
+                    args.iterations,
+                ),
+            )
+        finally:
+            migration_services.set_search_path(args.teams_id)
+            delete_profiles()
+            dispatch_services.invalidate_pools(args.teams_id)
+
+
+if __name__ == "__main__":
+    main()
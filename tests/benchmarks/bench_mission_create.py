@@ -0,0 +1,109 @@
+"""create_mission latency for missions over 10, 1k and 10k profiles.
+
+Seeds profiles and a group in an existing tenant, times create_mission
+with the multi-row schedule INSERTs against the former one ORM object per
+schedule, each call in a savepoint rolled back afterwards. Nothing is
+committed. Only run it against a development database:
+
+    python -m tests.benchmarks.bench_mission_create \
+        --teams-id <teams_id> --iterations 10
+"""
+
+import uuid
+from contextlib import nullcontext
+from unittest import mock
+
+from src import app, db
+from src.models import Groups, MissionSchedule, MissionTask, Profiles, Task
+from src.services import migration_services, mission_services
+from tests.benchmarks import base_parser, measure, report
+
+PREFIX = "bench_mission_"
+
+
+def seed(profiles):
+    group_id = str(uuid.uuid4())
+    db.session.execute(
+        Groups.__table__.insert(),
+        {"group_id": group_id, "group_name": f"{PREFIX}group"},
+    )
+    usernames = [f"{PREFIX}{index}" for index in range(profiles)]
+    db.session.execute(
+        Profiles.__table__.insert(),
+        [
+            {"profile_id": str(uuid.uuid4()), "username": username, "owner": None}
+            for username in usernames
+        ],
+    )
+    tasks = [row.tasks_id for row in db.session.query(Task.tasks_id).limit(5)]
+    return group_id, usernames, tasks
+
+
+def orm_insert_mission_schedules(mission_id, group_id, profile_ids, schedule_json):
+    """The former create_mission path, one ORM object per schedule."""
+    for profile_id in profile_ids:
+        db.session.add(
+            MissionSchedule(group_id, profile_id, mission_id, schedule_json)
+        )
+    db.session.flush()
+
+
+def orm_insert_mission_tasks(mission_id, tasks_ids, config=None):
+    for tasks_id in tasks_ids:
+        db.session.add(MissionTask(mission_id, tasks_id))
+    db.session.flush()
+
+
+def create(group_id, usernames, tasks):
+    savepoint = db.session.begin_nested()
+    try:
+        mission_services.create_mission(
+            {
+                "mission_name": f"{PREFIX}mission",
+                "group_id": group_id,
+                "user_id": str(uuid.uuid4()),
+                "profile_ids": "\n".join(usernames),
+                "tasks": tasks,
+                "mission_schedule": ["Monday"],
+                "start_date": "2026-10-18T08:00",
+            }
+        )
+        db.session.flush()
+    finally:
+        savepoint.rollback()
+
+
+def main():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.set_defaults(iterations=10)
+    args = parser.parse_args()
+
+    with app.app_context():
+        migration_services.set_search_path(args.teams_id)
+        try:
+            for profiles in args.profiles:
+                group_id, usernames, tasks = seed(profiles)
+                orm = mock.patch.multiple(
+                    mission_services,
+                    insert_mission_schedules=orm_insert_mission_schedules,
+                    insert_mission_tasks=orm_insert_mission_tasks,
+                )
+                for label, context in (("bulk", nullcontext()), ("orm", orm)):
+                    with context:
+                        report(
+                            f"{label} {profiles} profiles",
+                            measure(
+                                lambda: create(group_id, usernames, tasks),
+                                args.iterations,
+                                warmup=1,
+                            ),
+                        )
+                db.session.rollback()
+                migration_services.set_search_path(args.teams_id)
+        finally:
+            db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Requests per second of GET /mission_schedule with and without pooling.
+
+Drives a running API with concurrent clients. Start the API once with
+DB_POOL_MODE=null and once with DB_POOL_MODE=queue (same uWSGI settings)
+and compare the two reports:
+
+    python -m tests.benchmarks.bench_mission_schedule_rps \
+        --url http://localhost:8080/api/v1/mission_schedule/ \
+        --token <access_token> --clients 20 --seconds 30
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+from tests.benchmarks import report
+
+
+def client(url, token, deadline, samples, errors, lock):
+    session = requests.Session()
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.get(url, headers=headers, timeout=15)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if ok:
+                samples.append(elapsed)
+            else:
+                errors.append(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--token", required=True, help="Access token of a client")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--label", default="", help="e.g. null or queue")
+    args = parser.parse_args()
+
+    samples, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(
+            target=client,
+            args=(args.url, args.token, deadline, samples, errors, lock),
+        )
+        for _ in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    print(
+        f"{args.label or 'run'}: {len(samples) / duration:.1f} req/s, "
+        f"{len(errors)} errors, {args.clients} clients, {duration:.1f}s"
+    )
+    if samples:
+        report("GET /mission_schedule latency", samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Posts search latency with the trigram indexes against a sequential scan.
+
+Seeds synthetic posts (1M by default, generated server side) into an
+existing tenant, times get_all_posts searches with the planner free to use
+the gin_trgm_ops indexes and with index scans disabled (the former
+sequential scan), then deletes the seeded rows. Only run it against a
+development database:
+
+    python -m tests.benchmarks.bench_post_search \
+        --teams-id <teams_id> --posts 1000000 --iterations 20
+"""
+
+import hashlib
+import uuid
+
+from sqlalchemy import text
+
+from src import app, db
+from src.models import Posts, Profiles
+from src.services import migration_services, post_services
+from tests.benchmarks import base_parser, measure, report
+
+PREFIX = "bench_search_"
+
+WORDS = ["crypto", "football", "recipe", "travel", "music", "gaming", "news", "pets"]
+
+
+def seed(posts):
+    profile_id = str(uuid.uuid4())
+    db.session.execute(
+        Profiles.__table__.insert(),
+        {"profile_id": profile_id, "username": f"{PREFIX}profile", "owner": None},
+    )
+    db.session.execute(
+        text(
+            """
+            INSERT INTO posts (title, content, tw_post_id, profile_id, username)
+            SELECT
+                'Post ' || i || ' about ' || (:words)[1 + i % 8],
+                repeat((:words)[1 + (i / 8) % 8] || ' ', 1 + i % 5)
+                    || md5(i::text) || ' ' || (:words)[1 + (i / 64) % 8],
+                :prefix || i,
+                :profile_id,
+                'user_' || (i % 5000)
+            FROM generate_series(1, :posts) AS i
+            """
+        ),
+        {"words": WORDS, "prefix": PREFIX, "profile_id": profile_id, "posts": posts},
+    )
+    db.session.commit()
+    db.session.execute("ANALYZE posts")
+    return profile_id
+
+
+def cleanup(profile_id):
+    Posts.query.filter(Posts.profile_id == profile_id).delete(
+        synchronize_session=False
+    )
+    Profiles.query.filter(Profiles.profile_id == profile_id).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+
+
+def search(term, count):
+    post_services.get_all_posts(page=1, per_page=20, search=term, count=count)
+
+
+def set_index_scans(enabled):
+    value = "on" if enabled else "off"
+    db.session.execute(f"SET enable_bitmapscan = {value}")
+    db.session.execute(f"SET enable_indexscan = {value}")
+
+
+def main():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument(
+        "--count",
+        default="exact",
+        choices=("exact", "estimate", "none"),
+        help="result_count mode of the searches",
+    )
+    args = parser.parse_args()
+    terms = {
+        "rare (md5 fragment)": hashlib.md5(b"424242").hexdigest()[:12],
+        "tw_post_id": f"{PREFIX}31337",
+        "username": "user_4999",
+        "common word": "football",
+    }
+
+    with app.app_context():
+        migration_services.set_search_path(args.teams_id)
+        profile_id = seed(args.posts)
+        try:
+            for enabled, label in ((True, "trigram"), (False, "seq scan")):
+                migration_services.set_search_path(args.teams_id)
+                set_index_scans(enabled)
+                for name, term in terms.items():
+                    report(
+                        f"{label} {name}",
+                        measure(
+                            lambda: search(term, args.count), args.iterations, warmup=1
+                        ),
+                    )
+        finally:
+            set_index_scans(True)
+            migration_services.set_search_path(args.teams_id)
+            cleanup(profile_id)
+
+
+if __name__ == "__main__":
+    main()
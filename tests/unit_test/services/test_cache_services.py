@@ -0,0 +1,105 @@
+"""Test for the per tenant cache of the listings."""
+
+import unittest
+from collections import Counter
+from types import SimpleNamespace
+from unittest import mock
+
+
+class TestCacheServices(unittest.TestCase):
+    """Unit testing for cache_services, on the SimpleCache of the tests."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import cache
+        from src.services import cache_services
+
+        cls.cache = cache
+        cls.cache_services = cache_services
+
+    def setUp(self):
+        self.cache.clear()
+        self.session = SimpleNamespace(info={})
+        patchers = [
+            mock.patch.object(self.cache_services.db, "session", self.session),
+            mock.patch.object(self.cache_services, "_stats", Counter()),
+            mock.patch.object(
+                self.cache_services, "current_teams_id", return_value="t1"
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.calls = []
+
+        @self.cache_services.tenant_cached(self.cache_services.TASKS)
+        def get_tasks(user_id):
+            self.calls.append(user_id)
+            return [{"user_id": user_id}]
+
+        self.get_tasks = get_tasks
+
+    def commit(self):
+        self.cache_services._apply_invalidations(self.session)
+
+    def test_cached_per_tenant_and_arguments(self):
+        self.assertEqual(self.get_tasks("u1"), [{"user_id": "u1"}])
+        self.assertEqual(self.get_tasks("u1"), [{"user_id": "u1"}])
+        self.get_tasks("u2")
+        self.assertEqual(self.calls, ["u1", "u2"])
+        with mock.patch.object(
+            self.cache_services, "current_teams_id", return_value="t2"
+        ):
+            self.get_tasks("u1")
+        self.assertEqual(self.calls, ["u1", "u2", "u1"])
+        stats = self.cache_services.cache_stats()["tasks"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 3))
+
+    def test_invalidated_on_commit_only(self):
+        self.get_tasks("u1")
+        self.cache_services.invalidate(self.cache_services.TASKS)
+        # Written in this transaction: read from the database, not cached
+        self.get_tasks("u1")
+        self.assertEqual(len(self.calls), 2)
+        self.commit()
+        self.get_tasks("u1")
+        self.get_tasks("u1")
+        self.assertEqual(len(self.calls), 3)
+
+    def test_rollback_discards_invalidations(self):
+        self.get_tasks("u1")
+        self.cache_services.invalidate(self.cache_services.TASKS)
+        self.cache_services._discard_invalidations(
+            self.session, SimpleNamespace(parent=None)
+        )
+        self.commit()
+        self.get_tasks("u1")
+        self.assertEqual(len(self.calls), 1)
+
+    def test_no_tenant_bypasses_the_cache(self):
+        with mock.patch.object(
+            self.cache_services, "current_teams_id", return_value=None
+        ):
+            self.get_tasks("u1")
+            self.get_tasks("u1")
+        self.assertEqual(len(self.calls), 2)
+
+    @mock.patch("src.services.profiles_services.groups_services")
+    @mock.patch("src.services.profiles_services.dispatch_services")
+    @mock.patch("src.services.profiles_services.Profiles")
+    def test_profile_delete_invalidates_profiles(self, profiles, dispatch, groups):
+        from src.services import profiles_services
+
+        @self.cache_services.tenant_cached(self.cache_services.PROFILES)
+        def get_profiles():
+            self.calls.append("profiles")
+            return []
+
+        get_profiles()
+        self.session.flush = mock.Mock()
+        profiles_services.delete_profile("p1", "u1", "d1", "t1")
+        self.commit()
+        get_profiles()
+        self.assertEqual(self.calls, ["profiles", "profiles"])
+        self.assertTrue(profiles.query.get.return_value.is_disable)
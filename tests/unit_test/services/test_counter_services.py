@@ -0,0 +1,145 @@
+"""Test for profile counters."""
+
+import time
+import unittest
+from unittest import mock
+
+
+class TestCounterServices(unittest.TestCase):
+    """Unit testing for counter_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import app
+        from src.services import counter_services
+
+        cls.app = app
+        cls.counter_services = counter_services
+
+    def test_buffer_aggregates_per_profile(self):
+        buffer = self.counter_services.CounterBuffer()
+        buffer.add("p1", "clickAds")
+        buffer.add("p1", "clickAds")
+        buffer.add("p1", "like")
+        buffer.add("p2", "comment", 3)
+        buffer.add("p3", "unknown")
+        self.assertEqual(len(buffer), 3)
+        deltas = buffer.drain()
+        self.assertEqual(
+            deltas["p1"],
+            {
+                "click_count": 2,
+                "comment_count": 0,
+                "like_count": 1,
+                "clicks_given": 0,
+                "clicks_received": 0,
+            },
+        )
+        self.assertEqual(deltas["p2"]["comment_count"], 3)
+        self.assertEqual(deltas["p3"]["click_count"], 0)
+        self.assertEqual(len(buffer), 0)
+
+    @mock.patch("src.services.counter_services.db")
+    def test_failed_worker_flush_keeps_the_increments(self, mock_db):
+        buffer = self.counter_services.CounterBuffer()
+        buffer.add("p1", "clickAds")
+        mock_db.engine.begin.side_effect = OSError("connection refused")
+        with mock.patch.dict(self.counter_services._worker_buffers, {"t1": buffer}):
+            self.counter_services.flush_worker_buffers(force=True)
+            buffer.add("p1", "clickAds")
+            buffer.add("p2", "like")
+            self.counter_services.flush_worker_buffers(force=True)
+        self.assertEqual(mock_db.engine.begin.call_count, 2)
+        deltas = buffer.drain()
+        self.assertEqual(deltas["p1"]["click_count"], 2)
+        self.assertEqual(deltas["p2"]["like_count"], 1)
+
+    @mock.patch.dict("src.services.counter_services._flusher", {"thread": None})
+    @mock.patch.dict("src.services.counter_services._worker_buffers", {})
+    @mock.patch("src.services.counter_services.flush_worker_buffers")
+    def test_worker_buffers_flushed_without_new_increments(self, flush):
+        with mock.patch.dict(self.app.config, {"COUNTER_FLUSH_INTERVAL": 0.02}):
+            self.counter_services._worker_buffer("t1").add("p1", "clickAds")
+            for _ in range(100):
+                if flush.called:
+                    break
+                time.sleep(0.01)
+        self.assertTrue(flush.called)
+
+    @mock.patch("src.services.groups_services.apply_click_deltas")
+    def test_apply_deltas_adds_clicks_to_owner_groups(self, apply_click_deltas):
+        buffer = self.counter_services.CounterBuffer()
+        buffer.add("r1", "clickAds", role="receiver")
+        buffer.add("g1", "clickAds", role="giver")
+        buffer.add("g2", "clickAds", role="giver")
+        buffer.add("g2", "like", role="giver")
+        connection = mock.MagicMock()
+        connection.execute.return_value.fetchall.return_value = [
+            mock.Mock(profile_id="r1", owner="u1"),
+            mock.Mock(profile_id="g1", owner="u2"),
+            mock.Mock(profile_id="g2", owner="u2"),
+        ]
+        self.counter_services.apply_deltas(buffer.drain(), connection=connection)
+        owner_clicks, _, used_connection = apply_click_deltas.call_args[0]
+        self.assertEqual(owner_clicks, {"u1": [0, 1], "u2": [2, 0]})
+        self.assertIs(used_connection, connection)
+
+    def test_apply_deltas_is_one_statement(self):
+        connection = mock.MagicMock()
+        connection.execute.return_value.fetchall.return_value = []
+        deltas = {
+            "p1": {"click_count": 2, "comment_count": 0, "like_count": 1},
+            "p2": {"click_count": 1, "comment_count": 0, "like_count": 0},
+        }
+        self.counter_services.apply_deltas(deltas, connection=connection)
+        self.assertEqual(connection.execute.call_count, 1)
+        statement, params = connection.execute.call_args[0]
+        self.assertIn("click_count = CASE", str(statement))
+        self.assertEqual(params["profile_id_0"], "p1")
+        self.assertEqual(params["click_0"], 2)
+        self.assertEqual(params["profile_id_1"], "p2")
+
+    def test_apply_deltas_skips_empty(self):
+        connection = mock.MagicMock()
+        self.assertEqual(self.counter_services.apply_deltas({}, connection=connection), [])
+        connection.execute.assert_not_called()
+
+    def test_apply_deltas_resets_counters_of_previous_day(self):
+        connection = mock.MagicMock()
+        connection.execute.return_value.fetchall.return_value = []
+        deltas = {"p1": {"click_count": 1, "comment_count": 0, "like_count": 0}}
+        with mock.patch.object(self.counter_services, "local_today") as local_today:
+            self.counter_services.apply_deltas(deltas, connection=connection)
+        statement, params = connection.execute.call_args[0]
+        self.assertIn("WHEN p.counters_date = :today", str(statement))
+        self.assertIn("counters_date = :today", str(statement))
+        self.assertEqual(params["today"], local_today.return_value)
+
+    @mock.patch("src.services.migration_services.set_search_path")
+    @mock.patch("src.services.dispatch_services.invalidate_pools")
+    @mock.patch("src.services.counter_services.db")
+    def test_reset_daily_counters_runs_until_no_row_left(
+        self, mock_db, invalidate, set_search_path
+    ):
+        import datetime
+
+        chunks = [mock.Mock(rowcount=1000), mock.Mock(rowcount=200), mock.Mock(rowcount=0)]
+        count = mock.Mock()
+        count.scalar.return_value = 1200
+        mock_db.session.execute.side_effect = lambda statement, *args: (
+            count if "COUNT" in str(statement)
+            else chunks.pop(0) if "UPDATE" in str(statement)
+            else None
+        )
+        result = self.counter_services.reset_daily_counters(
+            "t1", day=datetime.date(2024, 1, 2), chunk_size=1000
+        )
+        self.assertEqual(
+            result,
+            {"teams_id": "t1", "day": "2024-01-02", "pending": 1200, "reset": 1200, "chunks": 2},
+        )
+        self.assertEqual(mock_db.session.commit.call_count, 3)
+        # The tenant is set again after every commit
+        self.assertEqual(set_search_path.call_args_list, [mock.call("t1")] * 3)
+        invalidate.assert_called_once_with("t1")
@@ -0,0 +1,79 @@
+"""Test for the dashboard."""
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+def summary_row(owner, **counts):
+    row = {
+        "owner": owner,
+        "profiles_count": 0,
+        "verified_profiles_count": 0,
+        "unverified_profiles_count": 0,
+        "monetizable_profiles_count": 0,
+        "team_verified_profiles_count": 0,
+    }
+    row.update(counts)
+    return SimpleNamespace(**row)
+
+
+class TestDashboardServices(unittest.TestCase):
+    """Unit testing for dashboard_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import app
+        from src.services import dashboard_services
+
+        cls.app = app
+        cls.dashboard_services = dashboard_services
+
+    @mock.patch("src.services.dashboard_services.cache")
+    @mock.patch("src.services.dashboard_services.db")
+    def test_dashboard_is_built_from_grouped_queries(self, mock_db, mock_cache):
+        mock_cache.get.return_value = None
+        mock_db.session.execute.side_effect = [
+            mock.Mock(
+                fetchall=mock.Mock(
+                    return_value=[
+                        summary_row("u1", profiles_count=3, verified_profiles_count=2,
+                                    team_verified_profiles_count=1),
+                        summary_row(None, profiles_count=1),
+                    ]
+                )
+            ),
+            mock.Mock(
+                fetchall=mock.Mock(
+                    return_value=[SimpleNamespace(owner="u1", total_payout=12.5)]
+                )
+            ),
+        ]
+        query = mock_db.session.query.return_value.join.return_value.filter.return_value
+        query.all.return_value = [
+            SimpleNamespace(user_id="u1", username="alice"),
+            SimpleNamespace(user_id="u2", username="bob"),
+        ]
+
+        data = self.dashboard_services.get_dashboard_data("t1")
+
+        self.assertEqual(mock_db.session.execute.call_count, 2)
+        self.assertEqual(data["user_count"], 2)
+        self.assertEqual(data["profiles_count"], 4)
+        self.assertEqual(data["verified_profiles_count"], 1)
+        self.assertEqual(data["total_earnings"], 12.5)
+        self.assertEqual(
+            [(item["username"], item["verified_profiles_count"]) for item in data["summaries"]],
+            [("alice", 2), ("bob", 0)],
+        )
+        self.assertNotIn("team_verified_profiles_count", data["summaries"][0])
+        mock_cache.set.assert_called_once()
+        self.assertEqual(mock_cache.set.call_args[0][0], "dashboard:t1")
+
+    @mock.patch("src.services.dashboard_services.cache")
+    @mock.patch("src.services.dashboard_services.db")
+    def test_dashboard_cache_hit(self, mock_db, mock_cache):
+        mock_cache.get.return_value = {"user_count": 1}
+        self.assertEqual(self.dashboard_services.get_dashboard_data("t1"), {"user_count": 1})
+        mock_db.session.execute.assert_not_called()
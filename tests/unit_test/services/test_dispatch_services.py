@@ -0,0 +1,114 @@
+"""Test for dispatch pools."""
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+def make_profile(**kwargs):
+    profile = {
+        "profile_id": "p1",
+        "owner": "u1",
+        "main_profile": False,
+        "is_disable": False,
+        "click_count": 0,
+        "status": "",
+        "profile_data": {"verify": True, "suspended": False},
+    }
+    profile.update(kwargs)
+    return SimpleNamespace(**profile)
+
+
+class TestDispatchServices(unittest.TestCase):
+    """Unit testing for dispatch_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import app
+        from src.services import dispatch_services
+
+        cls.app = app
+        cls.dispatch_services = dispatch_services
+
+    def setUp(self):
+        self.store = self.dispatch_services.MemoryPoolStore()
+        patcher = mock.patch.object(
+            self.dispatch_services, "get_store", return_value=self.store
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app.config["DISPATCH_POOL_ENABLED"] = True
+
+    def test_memory_store_add_remove_sample(self):
+        for member in ["a", "b", "c", "d"]:
+            self.store.add(["k"], member)
+        self.store.add(["k"], "a")
+        self.store.remove(["k"], "b")
+        self.store.remove(["k"], "missing")
+        self.assertEqual(sorted(self.store.sample("k", 10)), ["a", "c", "d"])
+        self.assertEqual(len(self.store.sample("k", 2)), 2)
+        self.assertEqual(self.store.sample("other", 2), [])
+
+    def test_replace_drops_previous_team_pools(self):
+        self.store.add(["dispatch:t1:clickAds:receivers:all"], "old")
+        self.store.add(["dispatch:t2:clickAds:receivers:all"], "kept")
+        self.store.replace("t1", {"dispatch:t1:clickAds:receivers:all": ["new"]}, 60)
+        self.assertTrue(self.store.is_fresh("t1"))
+        self.assertEqual(
+            self.store.sample("dispatch:t1:clickAds:receivers:all", 5), ["new"]
+        )
+        self.assertEqual(
+            self.store.sample("dispatch:t2:clickAds:receivers:all", 5), ["kept"]
+        )
+        self.store.invalidate("t1")
+        self.assertFalse(self.store.is_fresh("t1"))
+
+    def test_sync_profile_follows_click_limit(self):
+        receiver = make_profile(profile_id="r1", main_profile=True, click_count=10)
+        self.dispatch_services.sync_profile("t1", receiver)
+        self.assertEqual(self.dispatch_services.get_receivers("t1", "clickAds", 5), ["r1"])
+        self.assertEqual(
+            self.dispatch_services.get_receivers("t1", "clickAds", 5, ["u1"]), ["r1"]
+        )
+        self.assertEqual(self.dispatch_services.get_receivers("t1", "clickAds", 5, []), [])
+
+        receiver.click_count = 300
+        self.dispatch_services.sync_profile("t1", receiver)
+        self.assertEqual(self.dispatch_services.get_receivers("t1", "clickAds", 5), [])
+
+    def test_sync_profile_moves_giver_between_owners(self):
+        giver = make_profile(profile_id="g1", owner="u2")
+        self.dispatch_services.sync_profile("t1", giver)
+        self.assertEqual(
+            self.dispatch_services.get_givers("t1", "clickAds", "u2", 5), ["g1"]
+        )
+
+        giver.owner = "u3"
+        self.dispatch_services.sync_profile("t1", giver, previous_owner="u2")
+        self.assertEqual(self.dispatch_services.get_givers("t1", "clickAds", "u2", 5), [])
+        self.assertEqual(
+            self.dispatch_services.get_givers("t1", "clickAds", "u3", 5), ["g1"]
+        )
+
+        giver.profile_data = {"verify": True, "suspended": True}
+        self.dispatch_services.sync_profile("t1", giver)
+        self.assertEqual(self.dispatch_services.get_givers("t1", "clickAds", "u3", 5), [])
+
+    def test_get_dispatch_pairs_uses_fresh_pools(self):
+        self.store.replace(
+            "t1",
+            {
+                "dispatch:t1:clickAds:receivers:all": ["r1", "r2"],
+                "dispatch:t1:clickAds:givers:u1": ["g1", "g2", "g3"],
+            },
+            60,
+        )
+        with mock.patch.object(self.dispatch_services, "build_pools") as build_pools:
+            receivers, givers = self.dispatch_services.get_dispatch_pairs(
+                "t1", "clickAds", "u1", 2
+            )
+        build_pools.assert_not_called()
+        self.assertEqual(sorted(receivers), ["r1", "r2"])
+        self.assertEqual(len(givers), 2)
+        self.assertTrue(set(givers) <= {"g1", "g2", "g3"})
@@ -0,0 +1,73 @@
+"""Test for the events partitions."""
+
+import datetime
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+class TestEventPartitionServices(unittest.TestCase):
+    """Unit testing for event_partition_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import app
+        from src.services import event_partition_services
+
+        cls.app = app
+        cls.event_partition_services = event_partition_services
+
+    def test_day_bounds_cover_one_partition(self):
+        start, end = self.event_partition_services.day_bounds(datetime.date(2024, 2, 28))
+        self.assertEqual(start, datetime.datetime(2024, 2, 28))
+        self.assertEqual(end, datetime.datetime(2024, 2, 29))
+        self.assertEqual(
+            self.event_partition_services.partition_name(datetime.date(2024, 2, 28)),
+            "events_20240228",
+        )
+
+    @mock.patch(
+        "src.services.event_partition_services.get_archive_end", return_value=None
+    )
+    @mock.patch("src.services.event_partition_services.rollup_day")
+    @mock.patch("src.services.event_partition_services.db")
+    def test_detach_partitions_older_than_retention(self, mock_db, rollup_day, _):
+        today = datetime.datetime.utcnow().date()
+        names = [
+            self.event_partition_services.partition_name(
+                today - datetime.timedelta(days=days)
+            )
+            for days in (0, 1, 40, 41)
+        ]
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(relname=name) for name in names + ["events_archive"]
+        ]
+        detached = self.event_partition_services.detach_partitions("t1", 30)
+        self.assertEqual(detached, [names[3], names[2]])
+        self.assertEqual(rollup_day.call_count, 2)
+        statements = [str(call[0][0]) for call in mock_db.session.execute.call_args_list]
+        self.assertIn(f"ALTER TABLE events DETACH PARTITION {names[3]}", statements)
+        self.assertEqual(self.event_partition_services.detach_partitions("t1", 0), [])
+
+    @mock.patch("src.services.event_partition_services.get_partitions", return_value=[])
+    @mock.patch("src.services.event_partition_services.rollup_archive")
+    @mock.patch("src.services.event_partition_services.db")
+    def test_detach_archive_once_expired(self, mock_db, rollup_archive, _):
+        services = self.event_partition_services
+        mock_db.session.execute.return_value.scalar.return_value = (
+            "FOR VALUES FROM (MINVALUE) TO ('2024-01-10 00:00:00')"
+        )
+        self.assertEqual(services.get_archive_end("t1"), datetime.date(2024, 1, 10))
+
+        today = datetime.datetime.utcnow().date()
+        with mock.patch.object(services, "get_archive_end", return_value=today):
+            self.assertEqual(services.detach_partitions("t1", 30), [])
+            rollup_archive.assert_not_called()
+        self.assertEqual(
+            services.detach_partitions("t1", 30), [services.ARCHIVE_PARTITION]
+        )
+        rollup_archive.assert_called_once_with()
+        mock_db.session.execute.assert_called_with(
+            "ALTER TABLE events DETACH PARTITION events_archive"
+        )
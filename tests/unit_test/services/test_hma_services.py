@@ -0,0 +1,117 @@
+"""Test for the HMA client against a local fake HMA server."""
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+
+class FakeHMA(BaseHTTPRequestHandler):
+    """Issues a new token on every /auth, only the latest one is valid."""
+
+    token_number = 0
+    auth_calls = 0
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/auth":
+            FakeHMA.auth_calls += 1
+            FakeHMA.token_number += 1
+            self.reply(200, {"code": 1, "result": {"token": f"t{FakeHMA.token_number}"}})
+        elif self.headers.get("Authorization") != f"Bearer t{FakeHMA.token_number}":
+            self.reply(401, {"code": 0})
+        else:
+            self.reply(200, {"code": 1, "result": {"path": self.path}})
+
+
+class TestHmaServices(unittest.TestCase):
+    """Unit testing for hma_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import app, cache
+        from src.services import hma_services
+
+        cls.app = app
+        cls.cache = cache
+        cls.hma_services = hma_services
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeHMA)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        patcher = mock.patch.object(
+            self.hma_services, "base_url", f"http://127.0.0.1:{self.server.server_port}"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        FakeHMA.auth_calls = 0
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        self.cache.clear()
+
+    def test_token_is_cached_per_account(self):
+        token = self.hma_services.authenticate("account", "password")
+        self.assertEqual(self.hma_services.authenticate("account", "password"), token)
+        self.assertEqual(FakeHMA.auth_calls, 1)
+        self.hma_services.authenticate("other", "password")
+        self.assertEqual(FakeHMA.auth_calls, 2)
+
+    def test_expired_token_is_renewed_on_401(self):
+        token = self.hma_services.authenticate("account", "password")
+        # Another client logging in invalidates the cached token
+        self.hma_services.authenticate("account", "password", force=True)
+        FakeHMA.token_number += 1
+        status, result = self.hma_services.get_browser_data(
+            token, "hma1", {"tz": "UTC"}, credentials=("account", "password")
+        )
+        self.assertTrue(status)
+        self.assertEqual(result["result"]["path"], "/browser/marco/data/hma1")
+        self.assertEqual(FakeHMA.auth_calls, 3)
+
+        status, _ = self.hma_services.get_browser_data(token, "hma1", {"tz": "UTC"})
+        self.assertFalse(status)
+
+    def test_browser_data_cached_per_profile_and_tz(self):
+        fetch = mock.patch.object(
+            self.hma_services,
+            "get_browser_data",
+            wraps=self.hma_services.get_browser_data,
+        )
+        with fetch as get_browser_data:
+            for tz in ({"tz": "UTC"}, {"tz": "UTC"}, {"tz": "Asia/Bangkok"}):
+                status, data = self.hma_services.get_cached_browser_data(
+                    "account", "password", "hma1", tz
+                )
+                self.assertTrue(status)
+                self.assertEqual(data, {"path": "/browser/marco/data/hma1"})
+        self.assertEqual(get_browser_data.call_count, 2)
+
+    def test_slow_or_busy_hma_fails_fast(self):
+        with self.assertRaises(self.hma_services.HMAUnavailable):
+            self.hma_services.call_with_deadline(time.sleep, 1, timeout=0.05)
+        with mock.patch.object(
+            self.hma_services, "_slots", threading.BoundedSemaphore(1)
+        ) as slots:
+            slots.acquire()
+            with self.assertRaises(self.hma_services.HMAUnavailable):
+                self.hma_services.call_with_deadline(time.sleep, 0)
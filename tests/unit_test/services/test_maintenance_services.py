@@ -0,0 +1,88 @@
+"""Test for the VACUUM and storage parameters of the tenant tables."""
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+def table_stats(relname, live, dead, modified=0, reloptions=None):
+    return SimpleNamespace(
+        relname=relname,
+        n_live_tup=live,
+        n_dead_tup=dead,
+        n_mod_since_analyze=modified,
+        n_tup_upd=100,
+        n_tup_hot_upd=40,
+        reloptions=reloptions,
+    )
+
+
+class TestMaintenanceServices(unittest.TestCase):
+    """Unit testing for maintenance_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src.services import maintenance_services
+
+        cls.maintenance_services = maintenance_services
+
+    def test_table_action(self):
+        table_action = self.maintenance_services.table_action
+        self.assertEqual(
+            table_action(table_stats("posts", 5000, 2000)), "VACUUM (ANALYZE)"
+        )
+        # Few dead rows, or a small share of the table
+        self.assertIsNone(table_action(table_stats("posts", 100, 50)))
+        self.assertIsNone(table_action(table_stats("posts", 100000, 5000)))
+        self.assertEqual(
+            table_action(table_stats("posts", 10000, 0, modified=3000)), "ANALYZE"
+        )
+
+    def test_settings_changes(self):
+        tuned = [
+            f"{name}={value}"
+            for name, value in self.maintenance_services.TABLE_SETTINGS[
+                "profiles"
+            ].items()
+        ]
+        self.assertEqual(
+            self.maintenance_services.settings_changes(
+                table_stats("profiles", 0, 0, reloptions=tuned)
+            ),
+            {},
+        )
+        changes = self.maintenance_services.settings_changes(
+            table_stats("profiles", 0, 0, reloptions=["fillfactor=100"])
+        )
+        self.assertEqual(changes["fillfactor"], "80")
+        self.assertEqual(
+            self.maintenance_services.settings_changes(table_stats("posts", 0, 0)), {}
+        )
+
+    @mock.patch("src.services.maintenance_services.db")
+    def test_maintain_tables_on_autocommit_connection(self, mock_db):
+        opened = mock_db.engine.connect.return_value.__enter__.return_value
+        connection = opened.execution_options.return_value
+        connection.dialect.identifier_preparer.quote = lambda name: f'"{name}"'
+        connection.execute.return_value.fetchall.return_value = [
+            table_stats("posts", 100000, 10),
+            table_stats("profiles", 5000, 2000),
+        ]
+        report = self.maintenance_services.maintain_tables("t1")
+
+        opened.execution_options.assert_called_once_with(isolation_level="AUTOCOMMIT")
+        calls = connection.execute.call_args_list[1:]
+        statements = [str(call[0][0]) for call in calls]
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(
+            statements[0].startswith(
+                'ALTER TABLE "cs_t1"."profiles" SET (fillfactor = 80'
+            )
+        )
+        self.assertEqual(statements[1], 'VACUUM (ANALYZE) "cs_t1"."profiles"')
+        self.assertEqual(
+            [action["action"] for action in report["actions"]],
+            ["SET", "VACUUM (ANALYZE)"],
+        )
+        self.assertEqual(report["hot_updates"], {"profiles": 0.4})
@@ -0,0 +1,100 @@
+"""Test for the mission fire times and the bulk inserts of new missions."""
+
+import datetime
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+class TestMissionServices(unittest.TestCase):
+    """Unit testing for mission_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src.services import mission_services
+
+        cls.mission_services = mission_services
+        cls.now = datetime.datetime(2026, 10, 18, 0, 30)
+
+    def test_compute_next_fire_at(self):
+        # 08:00 in Ho Chi Minh (UTC+7) is 01:00 UTC
+        self.assertEqual(
+            self.mission_services.compute_next_fire_at("0 8 * * *", self.now),
+            datetime.datetime(2026, 10, 18, 1, 0),
+        )
+        self.assertIsNone(self.mission_services.compute_next_fire_at("", self.now))
+        self.assertIsNone(self.mission_services.compute_next_fire_at("bad", self.now))
+
+    @mock.patch("src.services.mission_services.Mission.query")
+    @mock.patch("src.services.mission_services.db")
+    def test_get_due_missions(self, mock_db, mock_query):
+        candidates = [
+            SimpleNamespace(
+                mission_id="soon",
+                mission_json={"cron": "31 7 * * *"},
+                next_fire_at=self.now + datetime.timedelta(seconds=30),
+                force_start=False,
+            ),
+            SimpleNamespace(
+                mission_id="passed",
+                mission_json={"cron": "0 8 * * *"},
+                next_fire_at=self.now - datetime.timedelta(days=1),
+                force_start=False,
+            ),
+            SimpleNamespace(
+                mission_id="forced",
+                mission_json={"cron": ""},
+                next_fire_at=None,
+                force_start=True,
+            ),
+        ]
+        session = mock_db.session
+        session.query.return_value.filter.return_value.all.return_value = candidates
+        loaded = session.query.return_value.options.return_value.filter.return_value
+        loaded.all.return_value = [
+            mock.Mock(repr_name=lambda: {"mission_id": "soon"}),
+            mock.Mock(repr_name=lambda: {"mission_id": "forced"}),
+        ]
+
+        missions = self.mission_services.get_due_missions("u1", self.now)
+
+        self.assertEqual([m["mission_id"] for m in missions], ["soon", "forced"])
+        mock_query.filter_by.assert_called_once_with(mission_id="passed")
+        mock_query.filter_by.return_value.update.assert_called_once_with(
+            {"next_fire_at": datetime.datetime(2026, 10, 18, 1, 0)},
+            synchronize_session=False,
+        )
+        session.query.return_value.options.assert_called_once()
+
+    @mock.patch("src.services.mission_services.db")
+    def test_nothing_due_loads_nothing(self, mock_db):
+        mock_db.session.query.return_value.filter.return_value.all.return_value = []
+        self.assertEqual(self.mission_services.get_due_missions("u1", self.now), [])
+        mock_db.session.query.return_value.options.assert_not_called()
+
+    @mock.patch("src.services.mission_services.INSERT_BATCH_SIZE", 2)
+    @mock.patch("src.services.mission_services.db")
+    def test_insert_mission_schedules_in_batches(self, mock_db):
+        inserted = self.mission_services.insert_mission_schedules(
+            "m1", "g1", ["p1", "p2", "p3"], {"cron": ""}
+        )
+        self.assertEqual(inserted, 3)
+        statements = [call.args[0] for call in mock_db.session.execute.call_args_list]
+        self.assertEqual(len(statements), 2)
+        rows = [
+            params
+            for statement in statements
+            for params in statement.compile().construct_params().items()
+            if params[0].startswith("schedule_id")
+        ]
+        # client side ids, one per profile
+        self.assertEqual(len({value for _, value in rows}), 3)
+
+    @mock.patch("src.services.mission_services.db")
+    def test_insert_mission_tasks_once(self, mock_db):
+        inserted = self.mission_services.insert_mission_tasks("m1", ["t1", "t2", "t1"])
+        self.assertEqual(inserted, 2)
+        mock_db.session.execute.assert_called_once()
+        self.assertEqual(self.mission_services.insert_mission_tasks("m1", []), 0)
+        mock_db.session.execute.assert_called_once()
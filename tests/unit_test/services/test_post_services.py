@@ -0,0 +1,80 @@
+"""Test for the posts bulk upsert."""
+
+import datetime
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from sqlalchemy.dialects import postgresql
+
+
+class TestPostServices(unittest.TestCase):
+    """Unit testing for post_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src.services import post_services
+
+        cls.post_services = post_services
+
+    def test_cursor_only_on_created_at(self):
+        with self.assertRaises(ValueError):
+            self.post_services.get_all_posts(sort_by="view_count", cursor="abc")
+
+    def test_top_posts_invalid_metric(self):
+        with self.assertRaises(ValueError):
+            self.post_services.get_top_posts(metric="retweet")
+
+    def test_top_posts_window_and_limit(self):
+        query = mock.MagicMock()
+        query.options.return_value = query
+        query.filter.return_value = query
+        query.order_by.return_value = query
+        query.limit.return_value = query
+        query.all.return_value = []
+        end = datetime.datetime(2026, 10, 18, 12, tzinfo=datetime.timezone.utc)
+        with mock.patch.object(self.post_services.Posts, "query", query):
+            result = self.post_services.get_top_posts(
+                metric="like", profile_id="p1", end=end, limit=1000
+            )
+        query.limit.assert_called_once_with(
+            self.post_services.app.config["TOP_POSTS_MAX_LIMIT"]
+        )
+        self.assertEqual(query.filter.call_count, 2)
+        self.assertEqual(result["end"], "2026-10-18T12:00:00")
+        self.assertEqual(result["start"], "2026-10-11T12:00:00")
+
+    @mock.patch("src.services.post_services.db")
+    def test_bulk_upsert_dedupes_and_counts(self, mock_db):
+        mock_db.session.query.return_value.filter.return_value.all.return_value = [
+            SimpleNamespace(profile_id="p1")
+        ]
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(inserted=True),
+            SimpleNamespace(inserted=False),
+        ]
+        posts = [
+            {"tw_post_id": "1", "profile_id": "p1", "like": "1"},
+            {"tw_post_id": "2", "profile_id": "p1", "like": "2"},
+            {"tw_post_id": "1", "profile_id": "p1", "like": "3", "post_id": "x"},
+            {"tw_post_id": "3", "profile_id": "unknown"},
+            {"profile_id": "p1"},
+        ]
+        result = self.post_services.bulk_upsert_posts(posts, "u1")
+
+        self.assertEqual(mock_db.session.execute.call_count, 1)
+        statement = mock_db.session.execute.call_args[0][0]
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        self.assertIn("ON CONFLICT (tw_post_id) DO UPDATE", sql)
+        self.assertIn("RETURNING (xmax = 0) AS inserted", sql)
+        params = statement.compile(dialect=postgresql.dialect()).params
+        self.assertEqual(
+            sorted(value for key, value in params.items() if key.startswith("like")),
+            ["2", "3"],
+        )
+        self.assertNotIn("x", params.values())
+        self.assertEqual(result["inserted"], 1)
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(result["duplicates"], 1)
+        self.assertEqual([error["index"] for error in result["errors"]], [4, 3])
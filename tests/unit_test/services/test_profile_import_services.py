@@ -0,0 +1,66 @@
+"""Test for bulk profile imports."""
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+class TestProfileImportServices(unittest.TestCase):
+    """Unit testing for profile_import_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import app
+        from src.services import profile_import_services
+
+        cls.app = app
+        cls.profile_import_services = profile_import_services
+
+    @mock.patch("src.services.dispatch_services.invalidate_pools")
+    @mock.patch("src.services.groups_services.refresh_profile_counts")
+    @mock.patch("src.services.migration_services.set_search_path")
+    @mock.patch("src.services.hma_services.get_hma_profiles")
+    @mock.patch("src.services.hma_services.create_marco_browser_profile")
+    @mock.patch("src.services.profile_import_services.db")
+    def test_import_lists_hma_once_and_upserts_once(
+        self, mock_db, create_marco, get_hma_profiles, *mocks
+    ):
+        mock_db.session.query.return_value.filter.return_value.all.return_value = [
+            SimpleNamespace(username="taken")
+        ]
+        mock_db.session.execute.return_value.fetchall.return_value = [1, 2]
+        create_marco.side_effect = lambda token, data, credentials: {
+            "code": 1,
+            "result": {"id": f"hma-{data['name']}"},
+        }
+        profiles = [
+            {"username": " new ", "password": "pw", "click_count": 5},
+            {"username": "Existing", "password": "pw"},
+            {"username": "taken", "password": "pw"},
+            {"username": ""},
+        ]
+        progress = self.profile_import_services.ImportProgress("t1", "i1", len(profiles))
+        state = self.profile_import_services.run_import(
+            progress,
+            profiles,
+            "u1",
+            "d1",
+            "t1",
+            "token",
+            119,
+            hma_profiles={"result": [{"name": "existing", "id": "hma-old"}]},
+        )
+
+        get_hma_profiles.assert_not_called()
+        self.assertEqual(create_marco.call_count, 1)
+        self.assertEqual(mock_db.session.execute.call_count, 1)
+        statement = mock_db.session.execute.call_args[0][0]
+        self.assertIn("ON CONFLICT (username) DO UPDATE", str(statement))
+        self.assertEqual(state["status"], "done")
+        self.assertEqual(state["imported"], 2)
+        self.assertEqual(state["skipped"], 1)
+        self.assertEqual(state["errors"][0]["username"], "taken")
+        self.assertEqual(
+            self.profile_import_services.get_import("t1", "i1")["status"], "done"
+        )
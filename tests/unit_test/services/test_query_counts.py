@@ -0,0 +1,171 @@
+"""Query count regression tests of the listings serialized with repr_name.
+
+The listings run against an in-memory sqlite copy of the tables, the
+count of statements must not grow with the number of rows.
+"""
+
+import datetime
+import unittest
+import uuid
+from unittest import mock
+
+from sqlalchemy import JSON, MetaData, String, create_engine, event, types
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+ROWS = 5
+
+
+def sqlite_engine(metadata):
+    """
+    sqlite engine with the tables of metadata, without the uuid_generate_v4
+    defaults and with the postgres only types swapped.
+    """
+    engine = create_engine("sqlite://")
+    copy = MetaData()
+    for table in metadata.sorted_tables:
+        table = table.to_metadata(copy)
+        for column in table.columns:
+            if "uuid_generate_v4" in str(getattr(column.server_default, "arg", "")):
+                column.server_default = None
+            try:
+                column.type.compile(dialect=sqlite.dialect())
+            except Exception:
+                is_json = isinstance(column.type, types.JSON)
+                column.type = JSON() if is_json else String()
+    copy.create_all(engine)
+    return engine
+
+
+class TestQueryCounts(unittest.TestCase):
+    """Statements issued by get_all_posts, get_all_events and get_all_missions."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import db
+        from src import models
+        from src.services import events_services, mission_services, post_services
+
+        cls.db = db
+        cls.models = models
+        cls.events_services = events_services
+        cls.mission_services = mission_services
+        cls.post_services = post_services
+        cls.engine = sqlite_engine(db.metadata)
+        cls.statements = []
+        event.listen(
+            cls.engine,
+            "before_cursor_execute",
+            lambda *args: cls.statements.append(args[2]),
+        )
+
+    def setUp(self):
+        self.session = scoped_session(sessionmaker(bind=self.engine))
+        patcher = mock.patch.object(self.db, "session", self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.session.remove)
+        for table in reversed(self.db.metadata.sorted_tables):
+            self.session.execute(table.delete())
+        self.seed()
+        self.session.commit()
+        self.statements.clear()
+
+    def seed(self):
+        models = self.models
+        now = datetime.datetime.utcnow()
+        self.user_id = str(uuid.uuid4())
+        tasks_id = str(uuid.uuid4())
+        rows = {
+            models.User: [{"user_id": self.user_id, "username": "owner"}],
+            models.Task: [{"tasks_id": tasks_id, "tasks_name": "Check follow"}],
+        }
+        for index in range(ROWS):
+            receiver, giver, mission_id = (str(uuid.uuid4()) for _ in range(3))
+            rows.setdefault(models.Profiles, []).extend(
+                [
+                    {"profile_id": receiver, "username": f"receiver{index}"},
+                    {"profile_id": giver, "username": f"giver{index}"},
+                ]
+            )
+            rows.setdefault(models.Posts, []).append(
+                {
+                    "post_id": str(uuid.uuid4()),
+                    "tw_post_id": str(index),
+                    "profile_id": receiver,
+                    "crawl_by": self.user_id,
+                    "created_at": now,
+                    "is_deleted": False,
+                }
+            )
+            rows.setdefault(models.Events, []).append(
+                {
+                    "event_id": str(uuid.uuid4()),
+                    "event_type": "clickAds",
+                    "profile_id": receiver,
+                    "profile_id_interact": giver,
+                    "issue": "OK",
+                    "created_at": now,
+                }
+            )
+            rows.setdefault(models.Mission, []).append(
+                {
+                    "mission_id": mission_id,
+                    "mission_name": f"mission{index}",
+                    "user_id": self.user_id,
+                    "mission_json": {"cron": "", "loop_count": 1},
+                    "created_at": now,
+                }
+            )
+            rows.setdefault(models.MissionSchedule, []).append(
+                {
+                    "schedule_id": str(uuid.uuid4()),
+                    "group_id": "group",
+                    "profile_id": receiver,
+                    "mission_id": mission_id,
+                }
+            )
+            rows.setdefault(models.MissionTask, []).append(
+                {"mission_id": mission_id, "tasks_id": tasks_id}
+            )
+        for model, model_rows in rows.items():
+            self.session.execute(model.__table__.insert(), model_rows)
+
+    def test_get_all_posts(self):
+        result = self.post_services.get_all_posts(page=1, per_page=50)
+        self.assertEqual(len(result["data"]), ROWS)
+        self.assertEqual(result["data"][0]["user_crawl"], "owner")
+        # count and page
+        self.assertEqual(len(self.statements), 2, self.statements)
+
+    def test_get_all_events(self):
+        result = self.events_services.get_all_events(page=1, per_page=50)
+        self.assertEqual(len(result["data"]), ROWS)
+        self.assertTrue(result["data"][0]["giver"]["username"].startswith("giver"))
+        # count and page
+        self.assertEqual(len(self.statements), 2, self.statements)
+
+    def test_get_all_missions(self):
+        missions = self.mission_services.get_all_missions(self.user_id)
+        self.assertEqual(len(missions), ROWS)
+        self.assertEqual(
+            missions[0]["mission_tasks"][0]["tasks"]["tasks_name"], "Check follow"
+        )
+        # missions, their schedules, their tasks (joined with the task)
+        self.assertEqual(len(self.statements), 3, self.statements)
+
+    def test_post_metrics_of_the_trigger_reloaded(self):
+        # Stands for posts_sync_metric_columns
+        self.session.execute(
+            """
+            CREATE TRIGGER posts_sync_like AFTER UPDATE OF "like" ON posts
+            BEGIN
+                UPDATE posts SET like_count = CAST(NEW."like" AS INTEGER)
+                WHERE post_id = NEW.post_id;
+            END
+            """
+        )
+        self.addCleanup(self.session.execute, "DROP TRIGGER posts_sync_like")
+        post = self.post_services.create_or_update_post("0", {"like": "7"})
+        self.assertEqual(post.repr_name()["like_count"], 7)
@@ -0,0 +1,39 @@
+"""Test for the listings search."""
+
+import unittest
+from unittest import mock
+
+from sqlalchemy.dialects import postgresql
+
+
+class TestSearchServices(unittest.TestCase):
+    """Unit testing for search_services."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src.services import post_services, search_services
+
+        cls.columns = post_services.SEARCH_COLUMNS
+        cls.search_services = search_services
+
+    def compile(self, clause):
+        return clause.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+
+    def test_escape_like(self):
+        self.assertEqual(self.search_services.escape_like("50%_a\\b"), "50\\%\\_a\\\\b")
+
+    def test_search_filter_matches_every_column(self):
+        clause = self.search_services.search_filter(self.columns, "a%b")
+        compiled = clause.compile(dialect=postgresql.dialect())
+        for column in ("title", "username", "content", "tw_post_id"):
+            self.assertIn(f"posts.{column} ILIKE", str(compiled))
+        self.assertEqual(str(compiled).count(" OR "), 3)
+        self.assertEqual(set(compiled.params.values()), {"%a\\%b%"})
+
+    def test_search_rank(self):
+        sql = str(self.compile(self.search_services.search_rank(self.columns, "news")))
+        self.assertTrue(sql.startswith("greatest(word_similarity('news', posts.title)"))
+        self.assertEqual(sql.count("word_similarity"), 4)
@@ -0,0 +1,66 @@
+"""Test for cached user expiry."""
+
+import datetime
+import unittest
+from unittest import mock
+
+
+class TestUserExpiry(unittest.TestCase):
+    """Unit testing for user_services.get_user_expired_at."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import app, cache
+        from src.services import user_services
+
+        cls.app = app
+        cls.cache = cache
+        cls.user_services = user_services
+
+    def setUp(self):
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.cache.clear()
+
+    def tearDown(self):
+        self.ctx.pop()
+
+    @mock.patch("src.services.user_services.db")
+    def test_cache_hit_skips_database(self, mock_db):
+        expired_at = datetime.datetime(2030, 1, 1)
+        user = mock.MagicMock(expired_at=expired_at)
+        query = mock_db.session.query.return_value.filter.return_value
+        query.first.return_value = user
+
+        self.assertEqual(self.user_services.get_user_expired_at("u1", "t1"), expired_at)
+        self.assertEqual(self.user_services.get_user_expired_at("u1", "t1"), expired_at)
+        self.assertEqual(mock_db.session.query.call_count, 1)
+
+        mock_db.session.info = {}
+        self.user_services.invalidate_user_expired_at("u1")
+        # Still the committed value until the change commits
+        self.user_services.get_user_expired_at("u1", "t1")
+        self.assertEqual(mock_db.session.query.call_count, 1)
+        self.user_services._drop_expired_at(mock_db.session)
+        self.user_services.get_user_expired_at("u1", "t1")
+        self.assertEqual(mock_db.session.query.call_count, 2)
+
+    @mock.patch("src.services.user_services.delete_user_public_constraints")
+    @mock.patch("src.services.user_services.delete_user_teams_constraints")
+    @mock.patch("src.services.user_services.check_user_exists", return_value=True)
+    @mock.patch("src.services.user_services.db")
+    def test_delete_user_drops_cached_expiry(self, mock_db, *_):
+        mock_db.session.info = {}
+        self.cache.set("user_expired_at:u1", datetime.datetime(2030, 1, 1))
+        status, _ = self.user_services.delete_user("u1", None)
+        self.assertTrue(status)
+        self.assertIsNotNone(self.cache.get("user_expired_at:u1"))
+        self.user_services._drop_expired_at(mock_db.session)
+        self.assertIsNone(self.cache.get("user_expired_at:u1"))
+
+    @mock.patch("src.services.user_services.db")
+    def test_unknown_user(self, mock_db):
+        query = mock_db.session.query.return_value.filter.return_value
+        query.first.return_value = None
+        self.assertIsNone(self.user_services.get_user_expired_at("u2", "t1"))
@@ -0,0 +1,82 @@
+"""Test for the periodic jobs run per tenant."""
+
+import unittest
+from unittest import mock
+
+
+class TestTenantJobs(unittest.TestCase):
+    """Unit testing for tenant_jobs, the database mocked."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src.tasks import tenant_jobs
+
+        cls.tenant_jobs = tenant_jobs
+
+    def setUp(self):
+        self.recorded = {}
+        patchers = [
+            mock.patch.object(self.tenant_jobs, "db"),
+            mock.patch.object(self.tenant_jobs, "migration_services"),
+            mock.patch.object(
+                self.tenant_jobs, "get_teams_ids", return_value=["t1", "t2", "t3"]
+            ),
+            mock.patch.object(
+                self.tenant_jobs,
+                "tenant_writes",
+                return_value={"t1": 10, "t2": 20, "t3": 30},
+            ),
+            # t2 had no writes since the last run
+            mock.patch.object(
+                self.tenant_jobs, "last_writes", side_effect=[5, 20, 0]
+            ),
+            mock.patch.object(
+                self.tenant_jobs, "record_run", side_effect=self.record_run
+            ),
+            # One tenant at a time keeps the order of last_writes
+            mock.patch.dict(
+                self.tenant_jobs.app.config, {"TENANT_JOB_CONCURRENCY": 1}
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def record_run(self, job_name, teams_id, started_at, run, writes):
+        self.recorded[teams_id] = (run["status"], writes)
+
+    def test_inactive_skipped_and_errors_recorded(self):
+        def job(teams_id):
+            if teams_id == "t3":
+                raise ValueError("boom")
+            return {"teams_id": teams_id}
+
+        progress = []
+        runs = self.tenant_jobs.run_for_tenants(
+            "job",
+            job,
+            watch=("events",),
+            on_done=lambda done, total: progress.append((done, total)),
+        )
+        runs = {run["teams_id"]: run for run in runs}
+        self.assertEqual(runs["t1"]["result"], {"teams_id": "t1"})
+        self.assertEqual(runs["t2"]["status"], self.tenant_jobs.SKIPPED)
+        self.assertEqual(runs["t3"]["error"], "boom")
+        self.assertEqual(
+            self.recorded,
+            {
+                "t1": (self.tenant_jobs.OK, 10),
+                "t2": (self.tenant_jobs.SKIPPED, 20),
+                "t3": (self.tenant_jobs.ERROR, 30),
+            },
+        )
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+        self.assertEqual(self.tenant_jobs.db.session.remove.call_count, 3)
+
+    def test_every_tenant_run_without_watch(self):
+        teams_ids = []
+        self.tenant_jobs.run_for_tenants("job", teams_ids.append)
+        self.assertEqual(sorted(teams_ids), ["t1", "t2", "t3"])
+        self.tenant_jobs.tenant_writes.assert_not_called()
+        self.tenant_jobs.last_writes.assert_not_called()
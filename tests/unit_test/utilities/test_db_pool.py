@@ -0,0 +1,26 @@
+"""Test for the tenant-safe connection pool hooks."""
+
+import unittest
+from unittest import mock
+
+from src.utilities import db_pool
+
+
+class TestDbPool(unittest.TestCase):
+    """Unit testing for db_pool."""
+
+    def test_checkout_resets_and_commits(self):
+        connection = mock.MagicMock()
+        db_pool.on_checkout(connection, mock.MagicMock(), mock.MagicMock())
+        cursor = connection.cursor.return_value
+        cursor.execute.assert_called_once_with(db_pool.RESET_SEARCH_PATH)
+        cursor.close.assert_called_once()
+        connection.commit.assert_called_once()
+
+    def test_checkin_invalidates_broken_connection(self):
+        connection = mock.MagicMock()
+        connection.cursor.return_value.execute.side_effect = Exception("closed")
+        record = mock.MagicMock()
+        db_pool.on_checkin(connection, record)
+        record.invalidate.assert_called_once()
+        connection.commit.assert_not_called()
@@ -0,0 +1,84 @@
+"""Test for the structured, redacted request logs."""
+
+import json
+import logging
+import queue
+import unittest
+from unittest import mock
+
+
+class TestLogConfig(unittest.TestCase):
+    """Unit testing for log_config and the request log entries."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src import app, log_config, routes
+
+        cls.app = app
+        cls.log_config = log_config
+        cls.routes = routes
+
+    def test_redact_nested_keys(self):
+        profiles = {
+            "profiles": [
+                {"username": "a", "password": "p", "fa": "2fa", "Cookies": "c"},
+                {"username": "b", "settings": {"hideMyAccPassword": "h"}},
+            ],
+            "gpt_key": "k",
+            "proxy": "http://u:p@host",
+        }
+        redacted = self.log_config.redact(profiles)
+        self.assertEqual(
+            redacted,
+            {
+                "profiles": [
+                    {"username": "a", "password": "***", "fa": "***", "Cookies": "***"},
+                    {"username": "b", "settings": {"hideMyAccPassword": "***"}},
+                ],
+                "gpt_key": "***",
+                "proxy": "***",
+            },
+        )
+        self.assertEqual(profiles["profiles"][0]["password"], "p")
+
+    def test_sample(self):
+        self.assertTrue(self.log_config.sample(1))
+        self.assertFalse(self.log_config.sample(0))
+
+    def test_queued_dict_record_formatted_as_json(self):
+        records = queue.SimpleQueue()
+        handler = self.log_config.RecordQueueHandler(records)
+        logger = logging.getLogger("test_log_config")
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        logger.warning({"request": {"path": "/x", "cookies": "c"}})
+        logger.warning("%s done", "import")
+
+        formatter = self.log_config.JsonFormatter()
+        first = json.loads(formatter.format(records.get_nowait()))
+        second = json.loads(formatter.format(records.get_nowait()))
+        self.assertEqual(first["request"], {"path": "/x", "cookies": "***"})
+        self.assertEqual(first["level"], "WARNING")
+        self.assertEqual(second["message"], "import done")
+
+    def test_request_entry_caps_the_body(self):
+        body = {"username": "a", "password": "secret"}
+        with self.app.test_request_context(
+            "/api/v1/profiles/?jwt=token&page=1", method="POST", json=body
+        ):
+            self.routes.log_request_info()
+            entry = self.routes.request_log_entry(mock.Mock(status_code=201))
+        self.assertEqual(entry["request"]["body"], {"username": "a", "password": "***"})
+        self.assertEqual(entry["request"]["args"], {"jwt": "***", "page": "1"})
+        self.assertEqual(entry["request"]["status"], 201)
+
+        large = {"profiles": ["x" * 100] * 100}
+        with self.app.test_request_context(
+            "/api/v1/profiles/", method="POST", json=large
+        ):
+            self.routes.log_request_info()
+            entry = self.routes.request_log_entry(mock.Mock(status_code=201))
+        self.assertNotIn("body", entry["request"])
+        self.assertGreater(entry["request"]["body_size"], 2048)
@@ -0,0 +1,105 @@
+"""Test for keyset pagination and optional counts."""
+
+import datetime
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+class TestPaginationUtil(unittest.TestCase):
+    """Unit testing for pagination_util."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src.models import Profiles
+        from src.utilities import pagination_util
+
+        cls.pagination_util = pagination_util
+        cls.keyset = [Profiles.created_at, Profiles.profile_id]
+
+    def query(self, rows):
+        query = mock.MagicMock()
+        query.filter.return_value = query
+        query.order_by.return_value = query
+        query.limit.return_value = query
+        query.offset.return_value = query
+        query.all.return_value = rows
+        query.count.return_value = 42
+        return query
+
+    def test_cursor_round_trip(self):
+        created_at = datetime.datetime(2026, 10, 18, 7, 30, 15, 120000)
+        cursor = self.pagination_util.encode_cursor([created_at, "profile-1"])
+        self.assertEqual(
+            self.pagination_util.decode_cursor(cursor, self.keyset),
+            [created_at, "profile-1"],
+        )
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.pagination_util.decode_cursor("not-a-cursor", self.keyset)
+        cursor = self.pagination_util.encode_cursor(["yesterday", "profile-1"])
+        with self.assertRaises(ValueError):
+            self.pagination_util.decode_cursor(cursor, self.keyset)
+
+    def test_keyset_page_returns_next_cursor_without_count(self):
+        created_at = datetime.datetime(2026, 10, 18)
+        rows = [
+            SimpleNamespace(created_at=created_at, profile_id=str(index))
+            for index in range(3)
+        ]
+        query = self.query(rows)
+        page, details = self.pagination_util.paginate(
+            query, per_page=2, cursor="", keyset=self.keyset
+        )
+        self.assertEqual(page, rows[:2])
+        query.limit.assert_called_once_with(3)
+        query.offset.assert_not_called()
+        query.count.assert_not_called()
+        self.assertIsNone(details["result_count"])
+        self.assertEqual(
+            self.pagination_util.decode_cursor(details["next_cursor"], self.keyset),
+            [created_at, "1"],
+        )
+
+    def test_last_keyset_page_has_no_next_cursor(self):
+        query = self.query([SimpleNamespace(created_at=None, profile_id="1")])
+        page, details = self.pagination_util.paginate(
+            query, per_page=2, cursor="", keyset=self.keyset
+        )
+        self.assertEqual(len(page), 1)
+        self.assertIsNone(details["next_cursor"])
+
+    def test_offset_mode_counts_exactly(self):
+        query = self.query([])
+        _, details = self.pagination_util.paginate(query, page=3, per_page=20)
+        query.offset.assert_called_once_with(40)
+        self.assertEqual(details, {"result_count": 42, "max_pages": 3})
+
+    @mock.patch("src.utilities.pagination_util._count_cache_key", return_value="key")
+    @mock.patch("src.utilities.pagination_util.cache")
+    def test_cached_count(self, mock_cache, mock_key):
+        mock_cache.get.return_value = 7
+        query = self.query([])
+        count = self.pagination_util.count_rows(query, "cached", scope="team")
+        self.assertEqual(count, 7)
+        query.count.assert_not_called()
+
+        mock_cache.get.return_value = None
+        count = self.pagination_util.count_rows(query, "cached", scope="team")
+        self.assertEqual(count, 42)
+        mock_cache.set.assert_called_once()
+
+    def test_invalid_count_mode(self):
+        with self.assertRaises(ValueError):
+            self.pagination_util.paginate(self.query([]), count="all")
+
+    @mock.patch("src.services.profiles_services.db")
+    @mock.patch("src.utilities.pagination_util.paginate", return_value=([], {}))
+    def test_profiles_cursor_pages_in_offset_order(self, paginate, mock_db):
+        from src.services import profiles_services
+
+        # Offset pages are created_at asc whatever the sort_order
+        profiles_services.get_all_profiles.__wrapped__(sort_order="desc", cursor="c")
+        self.assertEqual(paginate.call_args.kwargs["sort_order"], "asc")
@@ -0,0 +1,82 @@
+"""Test for the request profiling metrics."""
+
+import unittest
+from unittest import mock
+
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+
+class TestProfiling(unittest.TestCase):
+    """Unit testing for profiling, on a small app and a sqlite engine."""
+
+    @classmethod
+    @mock.patch("sentry_sdk.init", return_value=True)
+    def setUpClass(cls, mock_sentry):
+        from src.utilities import profiling
+
+        if profiling.prometheus_client is None:
+            raise unittest.SkipTest("prometheus_client is not installed")
+        cls.profiling = profiling
+        cls.engine = create_engine("sqlite://")
+        cls.app = Flask(__name__)
+        cls.app.config["PROFILING_SLOW_SQL_MS"] = 0
+
+        @cls.app.route("/items/<int:count>")
+        def items(count):
+            with cls.engine.connect() as connection:
+                for _ in range(count):
+                    connection.execute(text("SELECT 1 UNION ALL SELECT 2")).all()
+            return "ok"
+
+        profiling.register_profiling(cls.app, cls.engine)
+
+    def sample(self, name, **labels):
+        from prometheus_client import REGISTRY
+
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_metrics_by_route(self):
+        labels = {"endpoint": "/items/<int:count>", "method": "GET"}
+        before = self.sample("http_request_sql_statements_sum", **labels)
+        requests = self.sample(
+            "http_request_duration_seconds_count", status="200", **labels
+        )
+
+        client = self.app.test_client()
+        self.assertEqual(client.get("/items/3").status_code, 200)
+        client.get("/items/2")
+
+        self.assertEqual(
+            self.sample("http_request_sql_statements_sum", **labels) - before, 5
+        )
+        self.assertEqual(
+            self.sample("http_request_duration_seconds_count", status="200", **labels)
+            - requests,
+            2,
+        )
+        self.assertGreater(
+            self.sample("http_request_slowest_sql_seconds_sum", **labels), 0
+        )
+        self.assertGreaterEqual(
+            self.sample("http_request_slowest_sql_seconds_count", **labels), 2
+        )
+
+    def test_rows_of_the_statements_returning_rows(self):
+        # sqlite has no rowcount for a SELECT, psycopg2 has
+        self.profiling.start_request()
+        for rowcount, description in ((20, [("id",)]), (3, None), (-1, [("id",)])):
+            cursor = mock.Mock(rowcount=rowcount, description=description)
+            connection = mock.Mock(info={})
+            self.profiling.before_cursor_execute(connection, cursor, "", {}, None, 0)
+            self.profiling.after_cursor_execute(connection, cursor, "", {}, None, 0)
+        profile = self.profiling._local.profile
+        self.profiling._local.profile = None
+        self.assertEqual(profile["sql_count"], 3)
+        self.assertEqual(profile["sql_rows"], 20)
+
+    def test_render_metrics(self):
+        self.app.test_client().get("/items/1")
+        body, content_type = self.profiling.render_metrics()
+        self.assertIn(b"http_request_sql_seconds_bucket", body)
+        self.assertTrue(content_type.startswith("text/plain"))